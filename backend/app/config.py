@@ -21,11 +21,73 @@ class Settings(BaseSettings):
 
     # --- Database ---
     DATABASE_URL: str = f"sqlite:///{BASE_DIR / 'data' / 'nps_onboarding.db'}"
+    DATA_DIR: str = str(BASE_DIR / "data")   # Checkpoints, archives and other on-disk state
+    DB_POOL_SIZE: int = 10                 # Connections kept open per engine
+    DB_MAX_OVERFLOW: int = 20              # Extra connections allowed under burst load
+    DB_POOL_TIMEOUT: int = 30              # Seconds to wait for a free connection
+    DB_SERIALIZE_WRITES: bool = True       # Admit one async write transaction at a time
+
+    # --- SQLite Profile ---
+    SQLITE_TUNING: bool = True             # Apply the PRAGMAs below (off = driver defaults)
+    SQLITE_JOURNAL_MODE: str = "WAL"       # WAL lets readers proceed while a write commits
+    SQLITE_SYNCHRONOUS: str = "NORMAL"     # NORMAL is durable across app crashes in WAL mode
+    SQLITE_CACHE_SIZE_KB: int = 65536      # Page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456      # Bytes of the database file memory-mapped (0 = off)
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000    # How long a blocked writer retries before "database is locked"
+
+    # --- Audit Trail ---
+    AUDIT_WRITE_BEHIND: bool = False       # Buffer audit entries and flush them in batches
+    AUDIT_FLUSH_BATCH_SIZE: int = 200      # Flush as soon as this many entries are queued
+    AUDIT_FLUSH_INTERVAL_MS: int = 250     # ...or after this long, whichever comes first
+    AUDIT_MAX_QUEUE: int = 10000           # New audit writes wait for a flush beyond this depth (backpressure)
+    AUDIT_CHAIN_CACHE: bool = True         # Cache chain heads in memory; single worker process only
+    AUDIT_CHAIN_CACHE_SIZE: int = 50000    # Sessions whose chain head is kept in memory (LRU)
+    AUDIT_VERIFY_WORKERS: int = 0          # Bulk verification processes (0 = one per CPU)
+    AUDIT_VERIFY_CHUNK_SIZE: int = 5000    # Rows streamed per query during bulk verification
+    AUDIT_CHECKPOINT_SIZE: int = 1024      # Audit rows covered by one Merkle checkpoint
+    AUDIT_CHECKPOINT_INTERVAL_SECONDS: int = 300  # How often new checkpoints are sealed (0 = off)
+    AUDIT_ARCHIVE_AFTER_DAYS: int = 90     # Completed sessions older than this move to cold storage
+    AUDIT_ARCHIVE_SEGMENT_SESSIONS: int = 1000  # Sessions written per compressed segment file
+    AUDIT_ARCHIVE_INTERVAL_SECONDS: int = 0     # How often the archival job runs (0 = manual only)
+
+    # --- Session Cache ---
+    SESSION_CACHE_SIZE: int = 10000        # Session snapshots kept in memory (LRU)
+    SESSION_CACHE_TTL_SECONDS: float = 5.0 # Upper bound on staleness across worker processes
+
+    # --- Dashboard ---
+    DASHBOARD_RECONCILE_INTERVAL_SECONDS: int = 3600  # Full rebuild of rollup counters (0 = off)
+    DASHBOARD_STREAM_QUEUE_SIZE: int = 1000          # Undelivered updates per viewer before it is resynced
+    DASHBOARD_STREAM_KEEPALIVE_SECONDS: int = 15     # Idle interval between SSE keepalive comments
+
+    # --- PoP Agents ---
+    POP_AGENT_CACHE_SIZE: int = 50000      # Agent profiles kept in memory (LRU)
+    POP_AGENT_CACHE_TTL_SECONDS: float = 60.0  # Registry changes from other processes show up within this
+    POP_PIN_BCRYPT_ROUNDS: int = 12        # Cost factor for new PIN hashes
+    POP_PIN_CACHE_TTL_SECONDS: float = 300.0   # How long a verified agent/PIN pair skips bcrypt
+    POP_SEED_DEMO_AGENTS: bool = True      # Insert the demo agents when the table is empty
+    POP_TOKEN_TTL_MINUTES: int = 480       # Lifetime of a PoP agent token (one shift)
+    POP_TOKEN_CACHE_SIZE: int = 10000      # Verified tokens kept in memory until they expire
+    POP_COMMISSION_PAISA: int = 5000       # Commission per PRAN issued through an agent (₹50)
+    POP_LEADERBOARD_CACHE_SECONDS: float = 5.0  # Identical leaderboard queries within this window share a result
 
     # --- AI / OCR ---
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-1.5-flash-latest"
     OCR_CONFIDENCE_THRESHOLD: int = 85
+    OCR_CACHE_SIZE: int = 1000             # Extractions kept in memory per process (LRU)
+    OCR_CACHE_MEMORY_TTL_SECONDS: float = 3600.0  # How long an extraction stays in the memory tier
+    OCR_CACHE_DISK_TTL_HOURS: float = 24.0 # Lifetime of on-disk extractions (0 = memory tier only)
+    OCR_CACHE_PRUNE_INTERVAL_SECONDS: int = 3600  # How often expired disk entries are deleted (0 = off)
+    OCR_MAX_CONCURRENCY: int = 4           # Gemini calls in flight per worker (dedicated threads)
+    OCR_TIMEOUT_SECONDS: float = 30.0      # Give up on one Gemini call after this long
+    OCR_QUEUE_TIMEOUT_SECONDS: float = 10.0  # How long a scan waits for a free slot before 503
+
+    # --- Rate Limiting ---
+    RATE_LIMIT_KEY: str = "ip"             # What a limit is counted per: ip, session or pop_agent
+    RATE_LIMIT_MAX_KEYS: int = 100000      # Buckets kept in memory; least recently used are evicted
+    RATE_LIMIT_SHARDS: int = 64            # Independently locked partitions of the bucket table
+    RATE_LIMIT_BACKEND: str = "memory"     # memory (per process) or sqlite (shared by all workers on the host)
+    RATE_LIMIT_DB_PATH: str = ""           # SQLite bucket file for the sqlite backend (default DATA_DIR/rate_limits.db)
 
     # --- Security ---
     SECRET_KEY: str = "nps-onboarding-secret-key-change-in-production"
@@ -1,9 +1,15 @@
 """
 Database Engine & Session Management
-SQLAlchemy async-ready setup with dependency injection for FastAPI.
+SQLAlchemy sync and async engines with dependency injection for FastAPI.
 """
+import asyncio
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+import weakref
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 
 from app.config import get_settings
@@ -13,14 +19,193 @@ settings = get_settings()
 # Ensure data directory exists
 os.makedirs(os.path.dirname(settings.DATABASE_URL.replace("sqlite:///", "")), exist_ok=True)
 
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+
+def _pool_args() -> dict:
+    """Sized connection pool (in-memory SQLite keeps its single-connection pool)."""
+    if ":memory:" in settings.DATABASE_URL:
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def _apply_sqlite_profile(dbapi_connection, connection_record):
+    """Per-connection PRAGMAs from the SQLite profile in Settings."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},  # Required for SQLite
     echo=settings.DEBUG,
+    **_pool_args(),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str) -> str:
+    """Async driver URL for the configured database (sqlite -> aiosqlite)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return url
+
+
+# Async engine for request handlers. Admin tooling, background jobs and the
+# CLI keep using the sync engine above; both point at the same database.
+async_engine = create_async_engine(_async_url(settings.DATABASE_URL), echo=settings.DEBUG, **_pool_args())
+
+if IS_SQLITE and settings.SQLITE_TUNING:
+    event.listen(engine, "connect", _apply_sqlite_profile)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_profile)
+
+
+# ─── Single-writer queue ────────────────────────────────────────────
+
+class WriterQueue:
+    """FIFO gate that admits one write transaction at a time.
+
+    SQLite allows a single writer per database; letting every request race
+    for the file lock means retries, busy-waits and, past the busy timeout,
+    "database is locked". Async sessions instead queue here from their first
+    write until commit or rollback. Waiting is an await, so queued requests
+    do not hold a thread. Sync sessions (admin, jobs, CLI) are not gated and
+    rely on the busy timeout.
+    """
+
+    def __init__(self):
+        # One lock per event loop: asyncio locks cannot be shared across loops
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self._acquired = 0
+        self._waiting = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def acquire(self):
+        start = time.perf_counter()
+        with self._stats_lock:
+            self._waiting += 1
+        try:
+            await self._loop_lock().acquire()
+        finally:
+            with self._stats_lock:
+                self._waiting -= 1
+        waited_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._acquired += 1
+            self._total_wait_ms += waited_ms
+            self._max_wait_ms = max(self._max_wait_ms, waited_ms)
+
+    def release(self):
+        self._loop_lock().release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "enabled": settings.DB_SERIALIZE_WRITES,
+                "waiting": self._waiting,
+                "write_transactions": self._acquired,
+                "avg_wait_ms": round(self._total_wait_ms / self._acquired, 2) if self._acquired else 0.0,
+                "max_wait_ms": round(self._max_wait_ms, 2),
+            }
+
+
+writer_queue = WriterQueue()
+
+
+class SerializedWriteSession(AsyncSession):
+    """AsyncSession that holds the writer queue from its first write until the
+    transaction ends. Pure reads never queue.
+
+    Lock order: the writer queue is always taken before any audit chain lock
+    (AuditService joins the queue before locking a chain), so a request that
+    audits first and one that writes first cannot wait on each other."""
+
+    _holds_writer = False
+
+    @property
+    def holds_writer(self) -> bool:
+        return self._holds_writer
+
+    async def begin_write(self):
+        """Join the writer queue now rather than at the first write."""
+        await self._begin_write()
+
+    async def _begin_write(self):
+        if not self._holds_writer:
+            # Check out a connection before queueing: a writer must never wait
+            # for the pool while holding the queue, or sessions queued behind
+            # it with their connections checked out would starve it.
+            await self.connection()
+            await writer_queue.acquire()
+            self._holds_writer = True
+
+    def _end_write(self):
+        if self._holds_writer:
+            self._holds_writer = False
+            writer_queue.release()
+
+    def _has_pending_writes(self) -> bool:
+        return bool(self.new or self.dirty or self.deleted)
+
+    async def execute(self, statement, *args, **kwargs):
+        if getattr(statement, "is_dml", False):
+            await self._begin_write()
+        return await super().execute(statement, *args, **kwargs)
+
+    async def flush(self, objects=None):
+        if self._has_pending_writes():
+            await self._begin_write()
+        await super().flush(objects)
+
+    async def commit(self):
+        if self._has_pending_writes():
+            await self._begin_write()
+        try:
+            await super().commit()
+        finally:
+            self._end_write()
+
+    async def rollback(self):
+        try:
+            await super().rollback()
+        finally:
+            self._end_write()
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            self._end_write()
+
+
+# expire_on_commit=False: handlers read attributes after commit, and an
+# expired attribute cannot be lazily reloaded from async code.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=SerializedWriteSession if settings.DB_SERIALIZE_WRITES else AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -33,11 +218,126 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """FastAPI dependency: yields an async database session, auto-closes on finish."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_uow():
+    """FastAPI dependency: request-scoped unit of work.
+
+    Yields an async session and commits it exactly once after the handler
+    returns, or rolls it back if the handler raises. Handlers and services
+    only add and flush. Use with `Depends(get_uow, scope="function")` so the
+    commit happens before the response is sent and a failed commit becomes
+    an error response rather than a silently lost write.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+
+def dialect_insert(db, model):
+    """INSERT for `model` in the session's SQL dialect, so callers can use
+    `.on_conflict_do_update()` (SQLite and PostgreSQL share that API)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported for {dialect}")
+    return insert(model)
+
+
 def init_db():
     """Create all tables. Called once at application startup."""
     from app.models import session as _session_model   # noqa: F401
     from app.models import audit as _audit_model       # noqa: F401
     from app.models import kyc as _kyc_model           # noqa: F401
     from app.models import payment as _payment_model   # noqa: F401
+    from app.models import dashboard as _dashboard_model  # noqa: F401
+    from app.models import pop as _pop_model           # noqa: F401
+    from app.models import commission as _commission_model  # noqa: F401
 
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns_and_indexes()
+    if IS_SQLITE:
+        _enable_sqlite_autoincrement()
+
+
+def _add_missing_columns_and_indexes():
+    """Bring existing tables up to date with the models.
+
+    create_all() only creates missing tables, so columns and indexes added to
+    an existing model later are applied here. New columns must be nullable.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+# Highest id a table has handed out to rows that now live elsewhere
+AUTOINCREMENT_FLOORS = {
+    "audit_logs": "SELECT max(last_id) FROM audit_archive_parts",
+}
+
+
+def _enable_sqlite_autoincrement():
+    """Rebuild tables that declare sqlite_autoincrement but were created without it.
+
+    SQLite cannot add AUTOINCREMENT to an existing table, so the rows are copied
+    into a new table that replaces the old one. The id sequence continues after
+    the highest live id, or the AUTOINCREMENT_FLOORS id if that is higher.
+    """
+    from sqlalchemy.schema import CreateTable
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not table.kwargs.get("sqlite_autoincrement"):
+                continue
+            ddl = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": table.name},
+            ).scalar()
+            if not ddl or "AUTOINCREMENT" in ddl.upper():
+                continue
+
+            staging = f"{table.name}_rebuild"
+            create = str(CreateTable(table).compile(dialect=engine.dialect))
+            columns = ", ".join(f'"{c.name}"' for c in table.columns)
+            conn.execute(text(create.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {staging} ", 1)))
+            conn.execute(text(f"INSERT INTO {staging} ({columns}) SELECT {columns} FROM {table.name}"))
+            conn.execute(text(f"DROP TABLE {table.name}"))
+            conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table.name}"))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+            floor = AUTOINCREMENT_FLOORS.get(table.name)
+            highest = conn.execute(text(floor)).scalar() if floor else None
+            if highest:
+                conn.execute(
+                    text("UPDATE sqlite_sequence SET seq = max(seq, :n) WHERE name = :name"),
+                    {"n": highest, "name": table.name},
+                )
+                conn.execute(
+                    text("INSERT INTO sqlite_sequence (name, seq) SELECT :name, :n"
+                         " WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"),
+                    {"n": highest, "name": table.name},
+                )
+            print(f"[DB] Rebuilt {table.name} with AUTOINCREMENT")
+
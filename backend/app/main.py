@@ -15,7 +15,17 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import SessionLocal, init_db
+from app.services.audit_writer import audit_writer
+from app.services.audit_archive import archive_job
+from app.services.audit_checkpoint_service import seal_checkpoints_job
+from app.services.dashboard_service import DashboardRollupService, reconcile_dashboard_job
+from app.services.funnel_service import FunnelService
+from app.services.ocr_cache import prune_ocr_cache_job
+from app.services.pop_agent_service import PopAgentService
+from app.services.pop_stats_service import PopStatsService
+from app.services.commission_service import CommissionService
+from app.services.scheduler import scheduler
 from app.routes import session_router, kyc_router, payment_router, esign_router, admin_router, notification_router, pop_router
 
 settings = get_settings()
@@ -42,6 +52,26 @@ def on_startup():
     """Initialize database tables and log boot info."""
     init_db()
 
+    db = SessionLocal()
+    try:
+        DashboardRollupService.ensure_initialized(db)
+        FunnelService.ensure_initialized(db)
+        PopAgentService.ensure_seeded(db)
+        PopStatsService.ensure_initialized(db)
+        CommissionService.ensure_initialized(db)
+    finally:
+        db.close()
+
+    if settings.AUDIT_WRITE_BEHIND:
+        audit_writer.start()
+
+    # Periodic maintenance jobs
+    scheduler.add_job("audit-checkpoints", settings.AUDIT_CHECKPOINT_INTERVAL_SECONDS, seal_checkpoints_job)
+    scheduler.add_job("audit-archive", settings.AUDIT_ARCHIVE_INTERVAL_SECONDS, archive_job)
+    scheduler.add_job("dashboard-reconcile", settings.DASHBOARD_RECONCILE_INTERVAL_SECONDS, reconcile_dashboard_job)
+    scheduler.add_job("ocr-cache-prune", settings.OCR_CACHE_PRUNE_INTERVAL_SECONDS, prune_ocr_cache_job)
+    scheduler.start()
+
     # Ensure log directory
     os.makedirs(settings.LOG_DIR, exist_ok=True)
 
@@ -61,6 +91,14 @@ def on_startup():
         f.write(boot_msg)
 
 
+@app.on_event("shutdown")
+def on_shutdown():
+    """Stop background jobs and drain buffered audit entries before the process exits."""
+    scheduler.stop()
+    if settings.AUDIT_WRITE_BEHIND:
+        audit_writer.stop()
+
+
 # ─── Middleware ──────────────────────────────────────────────────────
 app.add_middleware(
     CORSMiddleware,
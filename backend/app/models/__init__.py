@@ -1,6 +1,9 @@
-from app.models.session import UserSession
-from app.models.audit import AuditLog
+from app.models.session import UserSession, ProfileField
+from app.models.audit import AuditLog, AuditCheckpoint, ArchivedAuditPart
 from app.models.kyc import KYCRecord
 from app.models.payment import PaymentRecord
+from app.models.pop import PopAgent, PopAgentDailyStats
+from app.models.commission import CommissionEntry, CommissionPayout, CommissionBalance
+from app.models.dashboard import DashboardRollup, CompletionHistogramBucket, FunnelBucket
 
-__all__ = ["UserSession", "AuditLog", "KYCRecord", "PaymentRecord"]
+__all__ = ["UserSession", "ProfileField", "AuditLog", "AuditCheckpoint", "ArchivedAuditPart", "KYCRecord", "PaymentRecord", "PopAgent", "PopAgentDailyStats", "CommissionEntry", "CommissionPayout", "CommissionBalance", "DashboardRollup", "CompletionHistogramBucket", "FunnelBucket"]
@@ -3,13 +3,19 @@ Audit Log Model — Immutable, tamper-evident audit trail.
 Every action is SHA-256 hashed and timestamped.
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey, Index
 
 from app.database import Base
 
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Chain walks and bulk verification stream rows in (session_id, id) order
+        Index("ix_audit_logs_session_id_id", "session_id", "id"),
+        # Ids are never reused, even after the newest rows were archived or deleted
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, index=True)
@@ -20,11 +26,57 @@ class AuditLog(Base):
     #          PAYMENT_INITIATED, PAYMENT_COMPLETED, PRAN_ISSUED,
     #          DIGILOCKER_FETCH, CKYC_LOOKUP, CONSENT_CAPTURED
 
-    payload_hash = Column(String(64))       # SHA-256 hash of the action payload
+    payload_hash = Column(String(64))       # Chain hash: SHA-256(previous_hash + content_hash)
     previous_hash = Column(String(64))      # Hash chain for tamper detection
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the payload itself (lets verifiers recompute payload_hash)
 
     ip_address = Column(String(45))
     user_agent = Column(String(256))
 
     log_metadata = Column(JSON, default=dict)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AuditCheckpoint(Base):
+    """
+    Merkle root over a contiguous id range of audit_logs.
+    Lets auditors prove a single entry (or re-check one batch) without
+    replaying whole session chains. Each root also links to its predecessor.
+    """
+    __tablename__ = "audit_checkpoints"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    start_id = Column(Integer, nullable=False)             # First audit_logs.id covered
+    end_id = Column(Integer, nullable=False, unique=True, index=True)  # Last audit_logs.id covered
+    leaf_count = Column(Integer, nullable=False)
+
+    merkle_root = Column(String(64), nullable=False)
+    previous_root = Column(String(64), default="")         # Root of the preceding checkpoint
+
+    first_timestamp = Column(DateTime)                     # Time span of the covered entries
+    last_timestamp = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedAuditPart(Base):
+    """
+    Index of audit entries moved to compressed cold-storage segments.
+    One row per (session, segment): where the session's gzip member lives and
+    the hash-chain boundary values needed to keep verifying across the move.
+    """
+    __tablename__ = "audit_archive_parts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    session_id = Column(String(36), nullable=False, index=True)
+
+    segment = Column(String(128), nullable=False)   # File name under DATA_DIR/audit_archive
+    offset = Column(Integer, nullable=False)        # Byte offset of the session's gzip member
+    length = Column(Integer, nullable=False)        # Compressed length in bytes
+
+    entry_count = Column(Integer, nullable=False)
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False, index=True)
+    first_previous_hash = Column(String(64), default="")  # previous_hash of the first archived entry
+    head_hash = Column(String(64), nullable=False)        # payload_hash of the last archived entry
+
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,52 @@
+"""
+Commission Models — PoP agent commission ledger, payout batches and balances.
+Maps to the 'commission_ledger', 'commission_payouts' and 'commission_balances' tables.
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
+
+from app.database import Base
+
+
+class CommissionEntry(Base):
+    """One commission earned by an agent for one issued PRAN. Rows are only
+    ever inserted; settlement sets `payout_id` once and nothing else changes."""
+    __tablename__ = "commission_ledger"
+    __table_args__ = (
+        # Payout runs select an agent's unsettled entries
+        Index("ix_commission_ledger_payout_agent", "payout_id", "agent_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    agent_id = Column(String(32), nullable=False, index=True)
+    session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, unique=True)
+    pran = Column(String(20))
+    amount = Column(Integer, nullable=False)      # Amount in paisa
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    payout_id = Column(Integer, ForeignKey("commission_payouts.id"), nullable=True)
+
+
+class CommissionPayout(Base):
+    """A settlement batch covering every unsettled entry up to `cutoff`
+    (for one agent, or all agents when agent_id is NULL)."""
+    __tablename__ = "commission_payouts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    agent_id = Column(String(32), nullable=True)
+    cutoff = Column(DateTime, nullable=False)
+    entry_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Integer, nullable=False, default=0)   # Paisa
+    reference = Column(String(64))                # Bank / NEFT batch reference
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class CommissionBalance(Base):
+    """Running per-agent totals, updated with every ledger insert and payout."""
+    __tablename__ = "commission_balances"
+
+    agent_id = Column(String(32), primary_key=True)
+    entry_count = Column(Integer, nullable=False, default=0)
+    earned = Column(Integer, nullable=False, default=0)    # Paisa
+    paid = Column(Integer, nullable=False, default=0)      # Paisa
+    last_payout_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,51 @@
+"""
+Dashboard Rollup Models — Pre-aggregated session counters for the admin dashboard.
+Maps to the 'dashboard_rollups', 'completion_histogram' and 'funnel_buckets' tables.
+"""
+from sqlalchemy import Column, DateTime, Float, Integer, String, UniqueConstraint
+
+from app.database import Base
+
+
+class DashboardRollup(Base):
+    """Number of sessions per (dimension, value), e.g. ("status", "completed").
+    The "total" dimension has a single row with an empty value."""
+    __tablename__ = "dashboard_rollups"
+    __table_args__ = (UniqueConstraint("dimension", "value", name="uq_dashboard_rollup_dimension_value"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dimension = Column(String(24), nullable=False)   # total | status | kyc_method | risk_level
+    value = Column(String(32), nullable=False, default="")  # "" stands for NULL
+    count = Column(Integer, nullable=False, default=0)
+
+
+class CompletionHistogramBucket(Base):
+    """Completed sessions whose onboarding took at most `upper_bound_seconds`
+    (and more than the previous bucket's bound), with their summed durations."""
+    __tablename__ = "completion_histogram"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    upper_bound_seconds = Column(Integer, nullable=False, unique=True)
+    count = Column(Integer, nullable=False, default=0)
+    seconds_sum = Column(Float, nullable=False, default=0.0)
+
+
+class FunnelBucket(Base):
+    """Funnel events in one hour or day, per stage, KYC method and PoP agent.
+    Empty kyc_method / pop_agent_id stand for NULL."""
+    __tablename__ = "funnel_buckets"
+    __table_args__ = (
+        # Leading (granularity, bucket_start) serves the admin range queries
+        UniqueConstraint(
+            "granularity", "bucket_start", "stage", "kyc_method", "pop_agent_id",
+            name="uq_funnel_bucket_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)      # hour | day
+    bucket_start = Column(DateTime, nullable=False)      # UTC, truncated to the granularity
+    stage = Column(String(24), nullable=False)           # started | kyc_done | esign_done | payment_done | pran_issued
+    kyc_method = Column(String(24), nullable=False, default="")
+    pop_agent_id = Column(String(32), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
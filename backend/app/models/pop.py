@@ -0,0 +1,46 @@
+"""
+PoP Agent Models — Registered Point of Presence agents.
+Maps to the 'pop_agents' table, loaded from the PFRDA PoP registry, and the
+'pop_agent_daily_stats' rollup behind the agent leaderboard.
+"""
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, UniqueConstraint
+
+from app.database import Base
+
+
+class PopAgent(Base):
+    __tablename__ = "pop_agents"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    agent_id = Column(String(32), unique=True, index=True, nullable=False)  # e.g. SBI-2024-001
+    pin_hash = Column(String(60), nullable=False)   # bcrypt; the PIN itself is never stored
+
+    name = Column(String(128), nullable=False)
+    organization = Column(String(128))
+    branch = Column(String(256))
+    pop_id = Column(String(32))
+    registration_no = Column(String(64))
+    role = Column(String(64))
+    tier = Column(String(16), default="silver")     # platinum | gold | silver
+    photo_initials = Column(String(4))
+    active = Column(Boolean, default=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PopAgentDailyStats(Base):
+    """Sessions attributed to an agent, by day the session was created, and
+    sessions it completed, by day of completion. Maintained incrementally."""
+    __tablename__ = "pop_agent_daily_stats"
+    __table_args__ = (
+        # Leading `day` serves the leaderboard's date-range scans
+        UniqueConstraint("day", "agent_id", name="uq_pop_agent_daily_stats_day_agent"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    agent_id = Column(String(32), nullable=False, index=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
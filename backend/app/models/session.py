@@ -1,15 +1,22 @@
 """
 Session Model — Tracks onboarding session lifecycle.
-Maps to the 'sessions' table.
+Maps to the 'sessions' table; profile fields live in 'session_profile_fields'.
 """
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, JSON, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, JSON, Integer, Boolean, ForeignKey, Index, UniqueConstraint
 
 from app.database import Base
 
 
 class UserSession(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Admin session listing pages newest-first on a (created_at, id) keyset
+        Index("ix_sessions_created_at_id", "created_at", "id"),
+        Index("ix_sessions_status_created_at_id", "status", "created_at", "id"),
+        # PoP agent dashboard aggregates and recent-session listing
+        Index("ix_sessions_pop_agent_created_at", "pop_agent_id", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     resume_token = Column(String(64), unique=True, index=True)
@@ -33,7 +40,7 @@ class UserSession(Base):
     pran = Column(String(20))
     pop_agent_id = Column(String(32), nullable=True, index=True)  # PoP agent attribution
 
-    data = Column(JSON, default=dict)   # Stores all captured profile data
+    data = Column(JSON, default=dict)   # Legacy profile blob; new fields go to ProfileField
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -41,3 +48,19 @@ class UserSession(Base):
 
     ip_address = Column(String(45))
     user_agent = Column(String(256))
+
+
+class ProfileField(Base):
+    """One captured profile field of a session (key/value).
+
+    Each wizard step only inserts or updates the fields it changed instead of
+    rewriting a whole JSON document.
+    """
+    __tablename__ = "session_profile_fields"
+    __table_args__ = (UniqueConstraint("session_id", "key", name="uq_profile_field_session_key"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, index=True)
+    key = Column(String(64), nullable=False)
+    value = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
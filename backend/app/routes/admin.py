@@ -1,78 +1,276 @@
 """
 Admin Routes — Regulator dashboard and audit trail access.
 """
-from datetime import datetime
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.session import UserSession
-from app.models.audit import AuditLog
 from app.schemas.schemas import AuditLogEntry, AdminDashboardResponse
 
+settings = get_settings()
+
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 
 @router.get("/dashboard", response_model=AdminDashboardResponse)
 def get_dashboard(db: Session = Depends(get_db)):
     """Get aggregated dashboard metrics for regulators."""
+    from app.services.dashboard_service import DashboardRollupService
+
+    # Counters are maintained incrementally; see dashboard_service
+    return _build_dashboard(db, DashboardRollupService.read(db))
+
 
-    total = db.query(func.count(UserSession.id)).scalar() or 0
-    completed = db.query(func.count(UserSession.id)).filter(
-        UserSession.status == "completed"
-    ).scalar() or 0
-    pending = db.query(func.count(UserSession.id)).filter(
-        UserSession.status.notin_(["completed", "started"])
-    ).scalar() or 0
+def _build_dashboard(db: Session, rollups: dict) -> AdminDashboardResponse:
+    from app.services.dashboard_service import DashboardRollupService
+
+    by_status = rollups.get("status", {})
+
+    total = rollups.get("total", {}).get("", 0)
+    completed = by_status.get("completed", 0)
+    pending = sum(c for status, c in by_status.items() if status not in ("completed", "started", ""))
 
     completion_rate = (completed / total * 100) if total > 0 else 0.0
 
     # KYC method distribution
-    kyc_methods = db.query(
-        UserSession.kyc_method, func.count(UserSession.id)
-    ).filter(
-        UserSession.kyc_method.isnot(None)
-    ).group_by(UserSession.kyc_method).all()
-    kyc_dist = {m: c for m, c in kyc_methods}
+    kyc_dist = {m: c for m, c in rollups.get("kyc_method", {}).items() if m}
 
     # Risk distribution
-    risk_levels = db.query(
-        UserSession.risk_level, func.count(UserSession.id)
-    ).group_by(UserSession.risk_level).all()
-    risk_dist = {r: c for r, c in risk_levels}
-
-    # Average completion time (seconds)
-    avg_time = 0.0
-    completed_sessions = db.query(UserSession).filter(
-        UserSession.status == "completed",
-        UserSession.completed_at.isnot(None),
-    ).all()
-    if completed_sessions:
-        total_seconds = sum(
-            (s.completed_at - s.created_at).total_seconds()
-            for s in completed_sessions
-            if s.completed_at and s.created_at
-        )
-        avg_time = total_seconds / len(completed_sessions)
+    risk_dist = {(r or None): c for r, c in rollups.get("risk_level", {}).items()}
+
+    # Completion time (seconds), from the incrementally updated histogram
+    completion = DashboardRollupService.completion_stats(db)
 
     return AdminDashboardResponse(
         total_onboardings=total,
         completion_rate=round(completion_rate, 1),
         pending_verification=pending,
-        avg_completion_seconds=round(avg_time, 1),
+        avg_completion_seconds=round(completion["avg_seconds"], 1),
+        completion_percentiles=completion["percentiles"],
         kyc_distribution=kyc_dist,
         risk_distribution=risk_dist,
     )
 
 
+def _dashboard_snapshot() -> dict:
+    from app.database import SessionLocal
+    from app.services.dashboard_service import DashboardRollupService, VERSION_DIMENSION
+
+    db = SessionLocal()
+    try:
+        # One SELECT: the counters and their version come from the same commit
+        rollups = DashboardRollupService.read(db)
+        return {
+            **_build_dashboard(db, rollups).model_dump(),
+            "version": rollups.get(VERSION_DIMENSION, {}).get("", 0),
+        }
+    finally:
+        db.close()
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard(request: Request):
+    """Server-sent events: a `snapshot` of the dashboard, then one `update`
+    with counter deltas per committed state change. Viewers that fall behind
+    receive a fresh snapshot. Only changes committed in this worker process
+    are streamed; the snapshot covers all of them."""
+    from app.services.event_bus import dashboard_bus
+
+    async def events():
+        sub = dashboard_bus.subscribe()
+        try:
+            # Subscribed before the snapshot is read, so no change is missed.
+            # Every transaction that moves a counter bumps the rollup version
+            # and its update carries the new value: updates at or below the
+            # snapshot's version are already in it and are skipped.
+            snapshot_version = None
+            while not await request.is_disconnected():
+                if snapshot_version is None or sub.overflowed:
+                    sub.drain()
+                    snap = await run_in_threadpool(_dashboard_snapshot)
+                    snapshot_version = snap["version"]
+                    yield _sse("snapshot", {**snap, "timestamp": datetime.utcnow().isoformat()})
+                try:
+                    message = await asyncio.wait_for(
+                        sub.queue.get(), timeout=settings.DASHBOARD_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message["version"] is None or message["version"] > snapshot_version:
+                    yield _sse("update", message)
+        finally:
+            dashboard_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/funnel")
+def get_funnel(
+    start: datetime = None,
+    end: datetime = None,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    group_by: str = Query(None, pattern="^(kyc_method|pop_agent)$"),
+    db: Session = Depends(get_db),
+):
+    """Funnel counts per hour or day over [start, end), optionally split by
+    KYC method or PoP agent. Defaults to the last 30 days (or 48 hours)."""
+    from app.services.funnel_service import FunnelService, STAGE_ORDER
+
+    end = end or datetime.utcnow()
+    start = start or end - (timedelta(hours=48) if granularity == "hour" else timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    buckets = FunnelService.query(db, start, end, granularity=granularity, group_by=group_by)
+    return {
+        "granularity": granularity,
+        "group_by": group_by,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "stages": list(STAGE_ORDER),
+        "totals": {stage: sum(b[stage] for b in buckets) for stage in STAGE_ORDER},
+        "buckets": buckets,
+    }
+
+
+# Static /audit/... paths must be registered before /audit/{session_id}.
+
+@router.post("/audit/checkpoints")
+def seal_audit_checkpoints(include_partial: bool = False, db: Session = Depends(get_db)):
+    """Seal Merkle checkpoints over audit entries not yet covered by one."""
+    from app.services.audit_checkpoint_service import AuditCheckpointService
+    created = AuditCheckpointService.seal_pending(db, include_partial=include_partial)
+    return {"created": [AuditCheckpointService.to_dict(c) for c in created]}
+
+
+@router.get("/audit/checkpoints")
+def list_audit_checkpoints(
+    since: datetime = None,
+    until: datetime = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
+    """List Merkle checkpoints, optionally those covering entries in a time window."""
+    from app.models.audit import AuditCheckpoint
+    from app.services.audit_checkpoint_service import AuditCheckpointService
+
+    query = db.query(AuditCheckpoint)
+    if since:
+        query = query.filter(AuditCheckpoint.last_timestamp >= since)
+    if until:
+        query = query.filter(AuditCheckpoint.first_timestamp <= until)
+    checkpoints = query.order_by(AuditCheckpoint.end_id.asc()).limit(min(limit, 1000)).all()
+    return [AuditCheckpointService.to_dict(c) for c in checkpoints]
+
+
+@router.get("/audit/checkpoints/{checkpoint_id}/verify")
+def verify_audit_checkpoint(checkpoint_id: int, db: Session = Depends(get_db)):
+    """Recompute a checkpoint's Merkle root from the rows it covers."""
+    from app.services.audit_checkpoint_service import AuditCheckpointService
+    result = AuditCheckpointService.verify_checkpoint(db, checkpoint_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Checkpoint not found")
+    return result
+
+
+@router.get("/audit/entries/{entry_id}/proof")
+def audit_inclusion_proof(entry_id: int, db: Session = Depends(get_db)):
+    """Merkle inclusion proof of one audit entry against its checkpoint root."""
+    from app.services.audit_checkpoint_service import AuditCheckpointService
+    try:
+        proof = AuditCheckpointService.proof_for(db, entry_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if proof is None:
+        raise HTTPException(status_code=409, detail="Entry is not yet covered by a checkpoint")
+    return proof
+
+
+@router.get("/audit/export")
+def export_audit_logs(
+    format: str = "ndjson",
+    session_id: str = None,
+    action: str = None,
+    since: datetime = None,
+    until: datetime = None,
+    page_size: int = 1000,
+):
+    """Stream audit entries as NDJSON or CSV, filtered by session, action and time range."""
+    from app.services import audit_export
+    from app.services.audit_writer import audit_writer
+
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Invalid format. Use 'ndjson' or 'csv'.")
+
+    audit_writer.flush()
+    pages = audit_export.iter_audit_pages(
+        session_id=session_id, action=action, since=since, until=until,
+        page_size=max(1, min(page_size, 10000)),
+    )
+    if format == "csv":
+        body, media_type = audit_export.csv_stream(pages), "text/csv"
+    else:
+        body, media_type = audit_export.ndjson_stream(pages), "application/x-ndjson"
+
+    filename = f"audit-export-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/audit/verify-all", status_code=202)
+def start_bulk_verification(resume: bool = False, workers: int = 0):
+    """Verify every session's audit chain in a separate `manage.py verify-audit`
+    process. Poll GET /api/admin/audit/verify-all for progress and the summary."""
+    from app.services import audit_verifier
+
+    try:
+        pid = audit_verifier.start_subprocess(workers=workers or None, resume=resume)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"accepted": True, "resume": resume, "pid": pid}
+
+
+@router.get("/audit/verify-all")
+def bulk_verification_status():
+    """Progress and summary of the latest bulk audit verification."""
+    from app.services import audit_verifier
+
+    checkpoint = audit_verifier.load_checkpoint()
+    running = audit_verifier.is_running()
+    if not checkpoint and running:
+        return {"status": "starting", "running": True}
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="No bulk verification has been run")
+    return {**checkpoint, "running": running}
+
+
 @router.get("/audit/{session_id}", response_model=list[AuditLogEntry])
 def get_audit_trail(session_id: str, db: Session = Depends(get_db)):
     """Get the full audit trail for a session."""
-    logs = db.query(AuditLog).filter(
-        AuditLog.session_id == session_id
-    ).order_by(AuditLog.timestamp.asc()).all()
+    from app.services.audit_service import AuditService
+    logs = AuditService.get_trail(db, session_id)
 
     if not logs:
         raise HTTPException(status_code=404, detail="No audit logs found for this session")
@@ -87,34 +285,191 @@ def verify_audit_chain(session_id: str, db: Session = Depends(get_db)):
     return AuditService.verify_chain(db, session_id)
 
 
+@router.get("/audit-writer")
+def audit_writer_stats():
+    """Queue depth, flush latency and chain-head cache counters of the audit pipeline."""
+    from app.services.audit_writer import audit_writer
+    from app.services.audit_chain import chain_heads
+    return {**audit_writer.stats(), "chain_heads": chain_heads.stats()}
+
+
+@router.get("/db")
+def database_stats(db: Session = Depends(get_db)):
+    """Effective SQLite settings, connection pool usage and writer queue counters."""
+    from sqlalchemy import text
+    from app.database import IS_SQLITE, async_engine, engine, writer_queue
+
+    pragmas = {}
+    if IS_SQLITE:
+        for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout"):
+            pragmas[name] = db.execute(text(f"PRAGMA {name}")).scalar()
+    return {
+        "pragmas": pragmas,
+        "pool": {"sync": engine.pool.status(), "async": async_engine.pool.status()},
+        "writer_queue": writer_queue.stats(),
+    }
+
+
+@router.post("/commission/payouts")
+def create_commission_payout(
+    agent_id: str = None,
+    cutoff: datetime = None,
+    reference: str = None,
+    db: Session = Depends(get_db),
+):
+    """Settle unsettled commission up to `cutoff` (default now) for one agent or all agents."""
+    from app.services.commission_service import CommissionService
+    payout = CommissionService.create_payout(
+        db, agent_id=agent_id.upper() if agent_id else None, cutoff=cutoff, reference=reference,
+    )
+    if payout is None:
+        return {"settled": False, "message": "No unsettled commission up to the cutoff"}
+    return {
+        "settled": True,
+        "payout_id": payout.id,
+        "agent_id": payout.agent_id,
+        "cutoff": payout.cutoff.isoformat(),
+        "entries": payout.entry_count,
+        "total_amount": payout.total_amount / 100,
+        "reference": payout.reference,
+    }
+
+
+@router.get("/commission/payouts")
+def list_commission_payouts(limit: int = Query(50, ge=1, le=500), db: Session = Depends(get_db)):
+    """Most recent payout batches."""
+    from app.models.commission import CommissionPayout
+    payouts = db.query(CommissionPayout).order_by(CommissionPayout.id.desc()).limit(limit).all()
+    return [
+        {
+            "payout_id": p.id,
+            "agent_id": p.agent_id,
+            "cutoff": p.cutoff.isoformat(),
+            "entries": p.entry_count,
+            "total_amount": p.total_amount / 100,
+            "reference": p.reference,
+            "created_at": p.created_at.isoformat(),
+        }
+        for p in payouts
+    ]
+
+
+@router.get("/commission/balances/{agent_id}")
+def get_commission_balance(agent_id: str, db: Session = Depends(get_db)):
+    """Running commission balance of one agent (amounts in rupees)."""
+    from app.models.commission import CommissionBalance
+    balance = db.get(CommissionBalance, agent_id.upper())
+    if balance is None:
+        raise HTTPException(status_code=404, detail="No commission recorded for this agent")
+    return {
+        "agent_id": balance.agent_id,
+        "entries": balance.entry_count,
+        "earned": balance.earned / 100,
+        "paid": balance.paid / 100,
+        "pending": (balance.earned - balance.paid) / 100,
+        "last_payout_at": balance.last_payout_at.isoformat() if balance.last_payout_at else None,
+    }
+
+
+@router.get("/pop-agent-cache")
+def pop_agent_cache_stats():
+    """PoP agent profile, verified-PIN and verified-token cache counters."""
+    from app.services.pop_agent_service import PopAgentService
+    from app.utils.pop_auth import token_cache_stats
+    return {**PopAgentService.stats(), "verified_tokens": token_cache_stats()}
+
+
+@router.get("/dashboard-stream")
+def dashboard_stream_stats():
+    """Connected dashboard stream viewers and event bus counters."""
+    from app.services.event_bus import dashboard_bus
+    return dashboard_bus.stats()
+
+
+@router.get("/ocr-cache")
+def ocr_cache_stats():
+    """OCR result cache hit rates by tier."""
+    from app.services.ocr_cache import ocr_cache
+    return ocr_cache.stats()
+
+
+@router.get("/rate-limiter")
+def rate_limiter_stats():
+    """Rate limiter bucket table size and allow/limit/eviction counters."""
+    from app.utils.rate_limiter import rate_limit_stats
+    return rate_limit_stats()
+
+
+@router.get("/session-cache")
+def session_cache_stats():
+    """Hit/miss counters of the session snapshot cache."""
+    from app.services.session_cache import session_cache
+    return session_cache.stats()
+
+
 @router.get("/sessions")
 def list_sessions(
     status: str = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
+    include_total: bool = True,
     db: Session = Depends(get_db),
 ):
-    """List all onboarding sessions with optional status filter."""
-    query = db.query(UserSession).order_by(UserSession.created_at.desc())
+    """List onboarding sessions newest-first with optional status filter.
+
+    Pages with a (created_at, id) keyset: pass the returned `next_cursor` to
+    fetch the following page. `total` comes from the dashboard rollup counters
+    rather than a COUNT over the table.
+    """
+    columns = (
+        UserSession.id, UserSession.status, UserSession.account_type, UserSession.kyc_method,
+        UserSession.risk_level, UserSession.pran, UserSession.created_at, UserSession.completed_at,
+    )
+    query = db.query(*columns).order_by(UserSession.created_at.desc(), UserSession.id.desc())
     if status:
         query = query.filter(UserSession.status == status)
+    if cursor:
+        created_at, session_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(UserSession.created_at, UserSession.id) < (created_at, session_id))
 
-    sessions = query.offset(offset).limit(limit).all()
-    total = query.count()
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    total = None
+    if include_total:
+        from app.services.dashboard_service import DashboardRollupService
+        rollups = DashboardRollupService.read(db)
+        total = rollups.get("status", {}).get(status, 0) if status else rollups.get("total", {}).get("", 0)
 
     return {
         "total": total,
+        "next_cursor": _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
         "sessions": [
             {
-                "id": s.id,
-                "status": s.status,
-                "account_type": s.account_type,
-                "kyc_method": s.kyc_method,
-                "risk_level": s.risk_level,
-                "pran": s.pran,
-                "created_at": s.created_at.isoformat() if s.created_at else None,
-                "completed_at": s.completed_at.isoformat() if s.completed_at else None,
+                "id": r.id,
+                "status": r.status,
+                "account_type": r.account_type,
+                "kyc_method": r.kyc_method,
+                "risk_level": r.risk_level,
+                "pran": r.pran,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "completed_at": r.completed_at.isoformat() if r.completed_at else None,
             }
-            for s in sessions
+            for r in rows
         ],
     }
+
+
+def _encode_cursor(created_at: datetime, session_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{session_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, session_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), session_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -5,9 +5,9 @@ Supports Aadhaar OTP e-Sign and DSC.
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_uow
 from app.models.session import UserSession
 from app.schemas.schemas import (
     ESignInitRequest, ESignInitResponse,
@@ -20,14 +20,14 @@ router = APIRouter(prefix="/api/esign", tags=["e-Sign"])
 
 
 @router.post("/initiate", response_model=ESignInitResponse)
-def initiate_esign(
+async def initiate_esign(
     payload: ESignInitRequest,
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Initiate an e-Sign process (Aadhaar OTP or DSC)."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -38,10 +38,9 @@ def initiate_esign(
 
     # Update session
     session.esign_method = payload.method
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "ESIGN_INITIATED",
         payload={"method": payload.method, "reference_id": result["reference_id"]},
         ip_address=request.client.host if request.client else None,
@@ -57,14 +56,14 @@ def initiate_esign(
 
 
 @router.post("/verify", response_model=ESignVerifyResponse)
-def verify_esign(
+async def verify_esign(
     payload: ESignVerifyRequest,
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Verify an e-Sign with OTP or DSC token."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -77,10 +76,9 @@ def verify_esign(
     if result.get("success"):
         session.esign_complete = True
         session.status = "esign_done"
-        db.commit()
 
         # Audit
-        AuditService.log(
+        await AuditService.log(
             db, session_id, "ESIGN_COMPLETED",
             payload={"reference_id": payload.reference_id, "method": session.esign_method},
             ip_address=request.client.host if request.client else None,
@@ -6,17 +6,18 @@ import uuid
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, Header, UploadFile, File, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_uow
 from app.config import get_settings
 from app.models.session import UserSession
 from app.models.kyc import KYCRecord
 from app.schemas.schemas import CKYCLookupResponse, DigiLockerResponse, OCRScanResponse, ConsentArchiveRequest
 from app.services.compliance_service import ComplianceService
-from app.services.ocr_service import OCRService
+from app.services.ocr_service import OCRBusyError, OCRService, OCRTimeoutError
 from app.services.risk_engine import RiskEngine
 from app.services.audit_service import AuditService
+from app.services.event_bus import publish_on_commit
 from app.utils.hashing import generate_hash
 from app.utils.validators import validate_pan
 from app.utils.rate_limiter import rate_limit
@@ -26,10 +27,10 @@ router = APIRouter(prefix="/api/kyc", tags=["KYC"])
 
 
 @router.post("/consent/archive")
-def archive_consent(
+async def archive_consent(
     payload: ConsentArchiveRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_uow, scope="function")
 ):
     """
     Archives a user consent artifact for regulatory compliance.
@@ -39,8 +40,8 @@ def archive_consent(
         "user_agent": request.headers.get("user-agent", "Unknown")
     }
     
-    artifact = ComplianceService.archive_consent(
-        db=db,
+    artifact = await db.run_sync(
+        ComplianceService.archive_consent,
         session_id=payload.session_id,
         consent_type=payload.consent_type,
         consent_text=payload.consent_text,
@@ -52,11 +53,11 @@ def archive_consent(
 
 
 @router.get("/ckyc/{pan}", response_model=CKYCLookupResponse)
-def ckyc_lookup(
+async def ckyc_lookup(
     pan: str,
     request: Request,
     session_id: str = Header(None, alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Look up CKYC record by PAN number (simulated CKYCR registry)."""
     if not validate_pan(pan):
@@ -75,7 +76,7 @@ def ckyc_lookup(
 
     # Audit if session provided
     if session_id:
-        AuditService.log(
+        await AuditService.log(
             db, session_id, "CKYC_LOOKUP",
             payload={"pan": pan.upper()},
             ip_address=request.client.host if request.client else None,
@@ -94,14 +95,14 @@ async def scan_document(
     request: Request,
     session_id: str = Header(..., alias="session-id"),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
     _throttle: bool = Depends(rate_limit(requests=5, window=60)),
 ):
     """AI-powered document scan using Gemini 1.5 Flash.
     Accepts PAN, Aadhaar, DL, or Passport images.
     """
     # Validate session
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -115,6 +116,13 @@ async def scan_document(
         extracted = await OCRService.scan_document(contents, file.content_type)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
+    except OCRBusyError:
+        raise HTTPException(
+            status_code=503, detail="Document scanning is busy, please try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+    except OCRTimeoutError:
+        raise HTTPException(status_code=504, detail="AI scan timed out. Please try again.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI Scan Failed: {str(e)}")
 
@@ -144,15 +152,15 @@ async def scan_document(
     session.status = "kyc_done"
     session.risk_level = extracted.get("risk_level", "Standard")
     session.risk_reasons = extracted.get("reasons", [])
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "KYC_SCAN",
         payload=extracted,
         ip_address=request.client.host if request.client else None,
         metadata={"source": extracted.get("source"), "confidence": extracted.get("ai_confidence")},
     )
+    publish_on_commit(db, "kyc.completed", session_id)
 
     return OCRScanResponse(
         success=True,
@@ -162,15 +170,15 @@ async def scan_document(
 
 
 @router.post("/digilocker", response_model=DigiLockerResponse)
-def fetch_digilocker(
+async def fetch_digilocker(
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Fetch verified documents from DigiLocker (Government of India).
     In production, this integrates with DigiLocker API.
     """
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -213,15 +221,15 @@ def fetch_digilocker(
     session.kyc_method = "digilocker"
     session.status = "kyc_done"
     session.risk_level = "Standard"
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "DIGILOCKER_FETCH",
         payload=dl_data,
         ip_address=request.client.host if request.client else None,
         metadata={"digilocker_ref": digilocker_ref},
     )
+    publish_on_commit(db, "kyc.completed", session_id)
 
     return DigiLockerResponse(
         success=True,
@@ -6,9 +6,10 @@ import uuid
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_uow
 from app.models.session import UserSession
 from app.models.payment import PaymentRecord
 from app.schemas.schemas import (
@@ -17,21 +18,23 @@ from app.schemas.schemas import (
 )
 from app.services.pran_service import PRANService
 from app.services.audit_service import AuditService
+from app.services.commission_service import CommissionService
+from app.services.event_bus import publish_on_commit
 from app.utils.rate_limiter import rate_limit
 
 router = APIRouter(prefix="/api/payment", tags=["Payment"])
 
 
 @router.post("/initiate", response_model=PaymentInitResponse)
-def initiate_payment(
+async def initiate_payment(
     payload: PaymentInitRequest,
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
     _throttle: bool = Depends(rate_limit(requests=5, window=60)),
 ):
     """Initiate a contribution payment."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -45,16 +48,15 @@ def initiate_payment(
         gateway_ref=f"GW-{uuid.uuid4().hex[:10].upper()}",
     )
     db.add(payment)
-    db.flush()  # Get the ID
+    await db.flush()  # Get the ID
 
     # Update session
     session.payment_method = payload.method
     session.payment_status = "processing"
     session.contribution_amount = payload.amount
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "PAYMENT_INITIATED",
         payload={"method": payload.method, "amount": payload.amount},
         ip_address=request.client.host if request.client else None,
@@ -85,17 +87,17 @@ def initiate_payment(
 
 
 @router.post("/confirm/{payment_id}", response_model=PaymentStatusResponse)
-def confirm_payment(
+async def confirm_payment(
     payment_id: int,
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Confirm a payment (simulates gateway callback)."""
-    payment = db.query(PaymentRecord).filter(
+    payment = await db.scalar(select(PaymentRecord).where(
         PaymentRecord.id == payment_id,
         PaymentRecord.session_id == session_id,
-    ).first()
+    ))
 
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
@@ -105,19 +107,18 @@ def confirm_payment(
     payment.completed_at = datetime.utcnow()
 
     # Update session
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if session:
         session.payment_status = "completed"
         session.status = "payment_done"
 
-    db.commit()
-
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "PAYMENT_COMPLETED",
         payload={"payment_id": payment_id, "amount": payment.amount, "method": payment.method},
         ip_address=request.client.host if request.client else None,
     )
+    publish_on_commit(db, "payment.completed", session_id)
 
     return PaymentStatusResponse(
         payment_id=payment.id,
@@ -129,13 +130,13 @@ def confirm_payment(
 
 
 @router.post("/generate-pran", response_model=PRANGenerateResponse)
-def generate_pran(
+async def generate_pran(
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Generate PRAN after successful payment and e-Sign."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -147,14 +148,17 @@ def generate_pran(
     session.pran = pran
     session.status = "completed"
     session.completed_at = now
-    db.commit()
+
+    # Agent commission, earned only if this transaction commits
+    await CommissionService.record(db, session, pran)
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "PRAN_ISSUED",
         payload={"pran": pran},
         ip_address=request.client.host if request.client else None,
         metadata={"pran": pran, "completed_at": now.isoformat()},
     )
+    publish_on_commit(db, "pran.issued", session_id)
 
     return PRANGenerateResponse(pran=pran, timestamp=now)
@@ -5,71 +5,26 @@ Enables registered PoP agents (bank staff, CSC operators, financial advisors)
 to log in and assist NPS subscribers with their onboarding.
 Tracks agent performance, session attribution, and commission eligibility.
 """
-import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, get_uow
 from app.models.session import UserSession
 from app.services.audit_service import AuditService
+from app.services.commission_service import CommissionService
+from app.services.pop_agent_service import PopAgentService
+from app.services.pop_stats_service import PopStatsService, default_range
+from app.services.session_cache import mark_changed
+from app.utils.pop_auth import current_pop_agent, issue_token
 
 router = APIRouter(prefix="/api/pop", tags=["PoP Agent"])
 
 
-# ─── Simulated PoP Agent Registry ─────────────────────────────────────
-# In production, this comes from PFRDA's PoP registration database.
-POP_AGENTS = {
-    "SBI-2024-001": {
-        "name": "Rajesh Kumar",
-        "pin": "1234",
-        "organization": "State Bank of India",
-        "branch": "Connaught Place, New Delhi",
-        "pop_id": "POP-SBI-00142",
-        "registration_no": "PFRDA/POP/2024/SBI/001",
-        "role": "Relationship Manager",
-        "tier": "platinum",
-        "photo_initials": "RK",
-    },
-    "HDFC-2024-005": {
-        "name": "Priya Sharma",
-        "pin": "5678",
-        "organization": "HDFC Bank",
-        "branch": "Bandra West, Mumbai",
-        "pop_id": "POP-HDFC-00087",
-        "registration_no": "PFRDA/POP/2024/HDFC/005",
-        "role": "Branch Manager",
-        "tier": "gold",
-        "photo_initials": "PS",
-    },
-    "CSC-2024-012": {
-        "name": "Amit Patel",
-        "pin": "9012",
-        "organization": "Common Service Centre",
-        "branch": "Gram Panchayat, Varanasi",
-        "pop_id": "POP-CSC-00321",
-        "registration_no": "PFRDA/POP/2024/CSC/012",
-        "role": "CSC Operator",
-        "tier": "silver",
-        "photo_initials": "AP",
-    },
-    "POST-2024-008": {
-        "name": "Sunita Devi",
-        "pin": "3456",
-        "organization": "India Post",
-        "branch": "Head Post Office, Jaipur",
-        "pop_id": "POP-POST-00198",
-        "registration_no": "PFRDA/POP/2024/POST/008",
-        "role": "Postal Agent",
-        "tier": "silver",
-        "photo_initials": "SD",
-    },
-}
-
-
 # ─── Schemas ──────────────────────────────────────────────────────────
 
 class PopLoginRequest(BaseModel):
@@ -79,9 +34,14 @@ class PopLoginRequest(BaseModel):
 class PopLoginResponse(BaseModel):
     success: bool
     token: str = ""
+    expires_at: int = 0          # Unix timestamp
     agent: dict = {}
     message: str = ""
 
+class PopBulkTagRequest(BaseModel):
+    agent_id: Optional[str] = Field(None, description="Must match the token's agent if given")
+    session_ids: list[str] = Field(..., min_length=1, max_length=1000)
+
 class PopDashboardResponse(BaseModel):
     agent: dict
     stats: dict
@@ -91,135 +51,205 @@ class PopDashboardResponse(BaseModel):
 
 # ─── Routes ───────────────────────────────────────────────────────────
 
+def _require_same_agent(agent: dict, agent_id: Optional[str]):
+    if agent_id and agent_id.upper() != agent["agent_id"]:
+        raise HTTPException(status_code=403, detail="Token does not belong to this agent")
+
+
 @router.post("/login", response_model=PopLoginResponse)
-def pop_login(payload: PopLoginRequest, request: Request, db: Session = Depends(get_db)):
+async def pop_login(payload: PopLoginRequest, request: Request, db: AsyncSession = Depends(get_uow, scope="function")):
     """
     Authenticate a PoP Agent.
     Returns agent profile + session token for assisted onboarding.
     """
-    agent_data = POP_AGENTS.get(payload.agent_id.upper())
-
-    if not agent_data:
+    try:
+        agent = await PopAgentService.authenticate(db, payload.agent_id, payload.pin)
+    except LookupError:
         raise HTTPException(status_code=401, detail="Agent ID not found in PFRDA registry")
 
-    if agent_data["pin"] != payload.pin:
+    if agent is None:
         raise HTTPException(status_code=401, detail="Invalid PIN")
 
-    # Generate session token
-    token = f"POP-{uuid.uuid4().hex[:16].upper()}"
+    # Signed bearer token carrying the agent profile
+    token, expires_at = issue_token(agent)
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, f"pop-{payload.agent_id}", "POP_AGENT_LOGIN",
-        payload={"agent_id": payload.agent_id, "organization": agent_data["organization"]},
+        payload={"agent_id": payload.agent_id, "organization": agent["organization"]},
         ip_address=request.client.host if request.client else None,
     )
 
     return PopLoginResponse(
         success=True,
         token=token,
-        agent={
-            "agent_id": payload.agent_id.upper(),
-            "name": agent_data["name"],
-            "organization": agent_data["organization"],
-            "branch": agent_data["branch"],
-            "pop_id": agent_data["pop_id"],
-            "registration_no": agent_data["registration_no"],
-            "role": agent_data["role"],
-            "tier": agent_data["tier"],
-            "photo_initials": agent_data["photo_initials"],
-        },
-        message=f"Welcome, {agent_data['name']}. Assisted mode activated.",
+        expires_at=expires_at,
+        agent=agent,
+        message=f"Welcome, {agent['name']}. Assisted mode activated.",
     )
 
 
 @router.get("/dashboard/{agent_id}", response_model=PopDashboardResponse)
-def pop_dashboard(agent_id: str, db: Session = Depends(get_db)):
+async def pop_dashboard(
+    agent_id: str,
+    agent: dict = Depends(current_pop_agent),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get PoP Agent dashboard with performance metrics.
     Shows onboarding stats, recent sessions, and commission tracking.
+    Agents can only open their own dashboard.
     """
-    agent_data = POP_AGENTS.get(agent_id.upper())
-    if not agent_data:
-        raise HTTPException(status_code=404, detail="Agent not found")
-
-    # Query sessions attributed to this agent
-    sessions = db.query(UserSession).filter(
-        UserSession.pop_agent_id == agent_id.upper()
-    ).order_by(UserSession.created_at.desc()).limit(20).all()
-
-    total = len(sessions)
-    completed = sum(1 for s in sessions if s.status == "completed")
-    in_progress = sum(1 for s in sessions if s.status not in ("completed", "expired"))
-
-    # Simulated commission (₹50 per completed onboarding as per PFRDA norms)
-    commission_per_enrollment = 50.0
-    total_commission = completed * commission_per_enrollment
+    _require_same_agent(agent, agent_id)
+    agent_id = agent["agent_id"]
+    stats = await PopStatsService.agent_stats(db, agent_id)
 
     # Recent sessions for display
-    recent = []
-    for s in sessions[:10]:
-        recent.append({
+    rows = (await db.execute(
+        select(
+            UserSession.id, UserSession.status, UserSession.account_type,
+            UserSession.kyc_method, UserSession.created_at, UserSession.pran,
+        )
+        .where(UserSession.pop_agent_id == agent_id)
+        .order_by(UserSession.created_at.desc())
+        .limit(10)
+    )).all()
+    recent = [
+        {
             "session_id": s.id[:8] + "...",
             "status": s.status,
             "account_type": s.account_type or "citizen",
             "kyc_method": s.kyc_method or "pending",
             "created_at": s.created_at.isoformat() if s.created_at else None,
             "pran": s.pran,
-        })
+        }
+        for s in rows
+    ]
 
     return PopDashboardResponse(
-        agent={
-            "agent_id": agent_id.upper(),
-            "name": agent_data["name"],
-            "organization": agent_data["organization"],
-            "branch": agent_data["branch"],
-            "pop_id": agent_data["pop_id"],
-            "registration_no": agent_data["registration_no"],
-            "role": agent_data["role"],
-            "tier": agent_data["tier"],
-            "photo_initials": agent_data["photo_initials"],
-        },
-        stats={
-            "total_sessions": total,
-            "completed": completed,
-            "in_progress": in_progress,
-            "success_rate": round((completed / total * 100) if total > 0 else 0, 1),
-            "avg_completion_minutes": 8.5,  # Simulated
-            "today_count": sum(1 for s in sessions if s.created_at and s.created_at.date() == datetime.utcnow().date()),
-        },
+        agent=agent,
+        stats=stats,
         recent_sessions=recent,
-        commission={
-            "rate_per_enrollment": commission_per_enrollment,
-            "total_earned": total_commission,
-            "pending_payout": total_commission * 0.3,  # 30% pending
-            "last_payout_date": (datetime.utcnow() - timedelta(days=15)).strftime("%d %b %Y"),
-        },
+        commission=await CommissionService.balance(db, agent_id),
     )
 
 
+@router.get("/leaderboard")
+async def pop_leaderboard(
+    start: date = None,
+    end: date = None,
+    sort: str = Query("completions", pattern="^(completions|conversion)$"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    agent: dict = Depends(current_pop_agent),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Rank all PoP agents over a date range (inclusive, default the last 30
+    days) by completed onboardings or by conversion rate. Lists agents' names
+    and earnings, so it is only served to signed-in agents."""
+    if start is None or end is None:
+        default_start, default_end = default_range()
+        start, end = start or default_start, end or default_end
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return await PopStatsService.leaderboard(db, start, end, sort=sort, limit=limit, offset=offset)
+
+
 @router.post("/tag-session")
-def tag_session_to_agent(
+async def tag_session_to_agent(
     request: Request,
     session_id: str = "",
     agent_id: str = "",
-    db: Session = Depends(get_db),
+    agent: dict = Depends(current_pop_agent),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
-    """Tag an onboarding session to a PoP agent for attribution."""
-    if not session_id or not agent_id:
-        raise HTTPException(status_code=400, detail="session_id and agent_id required")
-
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    """Tag an onboarding session to the calling PoP agent for attribution.
+    `agent_id` is optional and must match the token if given."""
+    if not session_id:
+        raise HTTPException(status_code=400, detail="session_id required")
+    _require_same_agent(agent, agent_id)
+    agent_id = agent["agent_id"]
+
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session.pop_agent_id = agent_id.upper()
-    db.commit()
+    session.pop_agent_id = agent_id
 
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "POP_SESSION_TAGGED",
         payload={"agent_id": agent_id},
         ip_address=request.client.host if request.client else None,
     )
 
     return {"success": True, "message": f"Session tagged to PoP agent {agent_id}"}
+
+
+@router.post("/tag-sessions")
+async def bulk_tag_sessions(
+    payload: PopBulkTagRequest,
+    request: Request,
+    agent: dict = Depends(current_pop_agent),
+    db: AsyncSession = Depends(get_uow, scope="function"),
+):
+    """Tag many onboarding sessions to the calling PoP agent at once (e.g. at a camp).
+
+    One query validates all ids, one UPDATE tags them and the audit entries
+    are appended as a batch. Each id gets a result: tagged, already_tagged or
+    not_found.
+    """
+    _require_same_agent(agent, payload.agent_id)
+    agent_id = agent["agent_id"]
+    session_ids = list(dict.fromkeys(payload.session_ids))
+
+    rows = {
+        row.id: row
+        for row in await db.execute(
+            select(
+                UserSession.id, UserSession.pop_agent_id, UserSession.status,
+                UserSession.created_at, UserSession.completed_at,
+            ).where(UserSession.id.in_(session_ids))
+        )
+    }
+    to_tag = [rows[sid] for sid in session_ids if sid in rows and rows[sid].pop_agent_id != agent_id]
+
+    if to_tag:
+        ids = [row.id for row in to_tag]
+        # The UPDATE takes the writer queue, then log_batch takes the chain
+        # locks: the same order as every other audited write (see
+        # SerializedWriteSession), so this cannot deadlock against the tagged
+        # sessions' own onboarding requests.
+        await db.execute(
+            update(UserSession)
+            .where(UserSession.id.in_(ids))
+            .values(pop_agent_id=agent_id, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        # A bulk UPDATE skips the ORM flush hooks: invalidate cached snapshots
+        # on commit and move the leaderboard counts explicitly.
+        mark_changed(db, ids)
+        deltas = PopStatsService.retag_deltas(to_tag, agent_id)
+        await db.run_sync(lambda session: PopStatsService.apply(session.connection(), deltas))
+
+        await AuditService.log_batch(
+            db, ids, "POP_SESSION_TAGGED",
+            payloads={row.id: {"agent_id": agent_id, "previous_agent_id": row.pop_agent_id} for row in to_tag},
+            ip_address=request.client.host if request.client else None,
+            metadata={"bulk": True, "batch_size": len(ids)},
+        )
+
+    tagged = {row.id for row in to_tag}
+    results = [
+        {
+            "session_id": sid,
+            "status": "tagged" if sid in tagged else "already_tagged" if sid in rows else "not_found",
+        }
+        for sid in session_ids
+    ]
+    return {
+        "agent_id": agent_id,
+        "tagged": len(tagged),
+        "already_tagged": sum(1 for r in results if r["status"] == "already_tagged"),
+        "not_found": sum(1 for r in results if r["status"] == "not_found"),
+        "results": results,
+    }
@@ -7,9 +7,10 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Header, Request, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, get_uow
 from app.models.session import UserSession
 from app.schemas.schemas import (
     SessionStartRequest, SessionStartResponse, SessionStatusResponse,
@@ -17,15 +18,18 @@ from app.schemas.schemas import (
 )
 from app.services.risk_engine import RiskEngine
 from app.services.audit_service import AuditService
+from app.services.event_bus import publish_on_commit
+from app.services.profile_service import ProfileService
+from app.services.session_cache import session_cache, snapshot
 
 router = APIRouter(prefix="/api/session", tags=["Session"])
 
 
 @router.post("/start", response_model=SessionStartResponse)
-def start_session(
+async def start_session(
     payload: SessionStartRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Create a new onboarding session."""
     session_id = str(uuid.uuid4())
@@ -40,86 +44,74 @@ def start_session(
         user_agent=request.headers.get("user-agent", "")[:256],
     )
     db.add(new_session)
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "SESSION_START",
         payload={"lang": payload.lang, "account_type": payload.account_type},
         ip_address=request.client.host if request.client else None,
         user_agent=request.headers.get("user-agent", "")[:256],
     )
+    publish_on_commit(db, "session.started", session_id)
 
     return SessionStartResponse(session_id=session_id, resume_token=resume_token)
 
 
 @router.get("/status", response_model=SessionStatusResponse)
-def get_session_status(
+async def get_session_status(
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get current status of a session."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    """Get current status of a session (served from the snapshot cache when warm)."""
+    snap = session_cache.get(session_id)
+    if snap is None:
+        epoch = session_cache.epoch()
+        session = await db.get(UserSession, session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        snap = snapshot(session, await ProfileService.get_profile(db, session))
+        session_cache.put(snap, epoch)
 
-    return SessionStatusResponse(
-        session_id=session.id,
-        status=session.status,
-        risk_level=session.risk_level,
-        kyc_method=session.kyc_method,
-        esign_complete=session.esign_complete,
-        payment_status=session.payment_status,
-        pran=session.pran,
-        resume_token=session.resume_token,
-        data=session.data,
-        created_at=session.created_at,
-    )
+    return SessionStatusResponse(**snap)
 
 
 @router.post("/resume", response_model=SessionStatusResponse)
-def resume_session(
+async def resume_session(
     payload: SessionResumeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Resume an existing session using a resume token."""
-    session = db.query(UserSession).filter(UserSession.resume_token == payload.resume_token).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Invalid resume token")
-
-    return SessionStatusResponse(
-        session_id=session.id,
-        status=session.status,
-        risk_level=session.risk_level,
-        kyc_method=session.kyc_method,
-        esign_complete=session.esign_complete,
-        payment_status=session.payment_status,
-        pran=session.pran,
-        resume_token=session.resume_token,
-        data=session.data,
-        created_at=session.created_at,
-    )
+    snap = session_cache.get_by_resume_token(payload.resume_token)
+    if snap is None:
+        epoch = session_cache.epoch()
+        session = await db.scalar(select(UserSession).where(UserSession.resume_token == payload.resume_token))
+        if not session:
+            raise HTTPException(status_code=404, detail="Invalid resume token")
+        snap = snapshot(session, await ProfileService.get_profile(db, session))
+        session_cache.put(snap, epoch)
+
+    return SessionStatusResponse(**snap)
 
 
 @router.post("/update", response_model=ProfileUpdateResponse)
-def update_profile(
+async def update_profile(
     payload: ProfileUpdateRequest,
     request: Request,
     session_id: str = Header(..., alias="session-id"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_uow, scope="function"),
 ):
     """Update profile fields and re-evaluate risk."""
-    session = db.query(UserSession).filter(UserSession.id == session_id).first()
+    session = await db.get(UserSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Merge new fields into session data
-    current_data = session.data or {}
-    current_data.update(payload.fields)
-    session.data = current_data
+    # Only fields whose value changed are written
+    current_data, changed = await ProfileService.update_fields(db, session, payload.fields)
 
     # Re-evaluate risk with updated data
-    risk_level, reasons = RiskEngine.evaluate(current_data, session.kyc_method, db_session=db)
+    risk_level, reasons = await db.run_sync(
+        lambda sync_db: RiskEngine.evaluate(current_data, session.kyc_method, db_session=sync_db)
+    )
     session.risk_level = risk_level
     session.risk_reasons = reasons
 
@@ -128,14 +120,13 @@ def update_profile(
         session.status = "profile_done"
 
     session.updated_at = datetime.utcnow()
-    db.commit()
 
     # Audit
-    AuditService.log(
+    await AuditService.log(
         db, session_id, "PROFILE_UPDATE",
-        payload=payload.fields,
+        payload=changed,
         ip_address=request.client.host if request.client else None,
-        metadata={"risk_level": risk_level, "reasons": reasons},
+        metadata={"risk_level": risk_level, "reasons": reasons, "unchanged_fields": len(payload.fields) - len(changed)},
     )
 
     return ProfileUpdateResponse(
@@ -153,6 +153,7 @@ class AdminDashboardResponse(BaseModel):
     completion_rate: float
     pending_verification: int
     avg_completion_seconds: float
+    completion_percentiles: Dict[str, float] = {}   # p50 / p90 / p99, estimated from a histogram
     kyc_distribution: Dict[str, int]
     risk_distribution: Dict[str, int]
 
@@ -3,5 +3,11 @@ from app.services.risk_engine import RiskEngine
 from app.services.pran_service import PRANService
 from app.services.esign_service import ESignService
 from app.services.audit_service import AuditService
+from app.services.session_cache import SessionSnapshotCache, session_cache
+from app.services.dashboard_service import DashboardRollupService
+from app.services.funnel_service import FunnelService
+from app.services.pop_agent_service import PopAgentService
+from app.services.pop_stats_service import PopStatsService
+from app.services.commission_service import CommissionService
 
-__all__ = ["OCRService", "RiskEngine", "PRANService", "ESignService", "AuditService"]
+__all__ = ["OCRService", "RiskEngine", "PRANService", "ESignService", "AuditService", "SessionSnapshotCache", "session_cache", "DashboardRollupService", "FunnelService", "PopAgentService", "PopStatsService", "CommissionService"]
@@ -0,0 +1,259 @@
+"""
+Audit Archive — Moves audit trails of old, completed sessions to cold storage.
+
+Each archival run writes one append-only segment file under
+DATA_DIR/audit_archive. Every session in it is a separate gzip member, so one
+trail can be read back by seeking to its offset without inflating the rest of
+the segment. `audit_archive_parts` indexes the members and their hash-chain
+boundary values and is what the read path consults; a JSON sidecar with the
+same index is written next to each segment once those rows have committed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.audit import AuditLog, ArchivedAuditPart
+from app.models.session import UserSession
+from app.services.audit_export import EXPORT_COLUMNS
+
+settings = get_settings()
+
+ARCHIVE_DIR = os.path.join(settings.DATA_DIR, "audit_archive")
+
+_archive_lock = threading.Lock()
+
+
+def segment_path(segment: str) -> str:
+    return os.path.join(ARCHIVE_DIR, segment)
+
+
+def _row_to_json(row: dict) -> dict:
+    row = dict(row)
+    row["timestamp"] = row["timestamp"].isoformat() if row["timestamp"] else None
+    return row
+
+
+def read_part(part) -> list[dict]:
+    """Entries of one archived member, in chain order."""
+    with open(segment_path(part.segment), "rb") as f:
+        f.seek(part.offset)
+        member = f.read(part.length)
+    return [json.loads(line) for line in gzip.decompress(member).decode("utf-8").splitlines() if line]
+
+
+def to_audit_log(row: dict) -> AuditLog:
+    """Transient AuditLog built from an archived row (never added to a session)."""
+    values = dict(row)
+    if values.get("timestamp"):
+        values["timestamp"] = datetime.fromisoformat(values["timestamp"])
+    return AuditLog(**values)
+
+
+class AuditArchiveService:
+    """Archives and reads back cold audit trails."""
+
+    @staticmethod
+    def parts_for(db: Session, session_id: str) -> list[ArchivedAuditPart]:
+        return (
+            db.query(ArchivedAuditPart)
+            .filter(ArchivedAuditPart.session_id == session_id)
+            .order_by(ArchivedAuditPart.first_id.asc())
+            .all()
+        )
+
+    @staticmethod
+    def archived_entries(db: Session, session_id: str) -> list[dict]:
+        """All archived entries of a session, oldest first ([] if never archived)."""
+        entries = []
+        for part in AuditArchiveService.parts_for(db, session_id):
+            entries.extend(read_part(part))
+        return entries
+
+    @staticmethod
+    def archived_head(db: Session, session_id: str) -> Optional[str]:
+        """payload_hash of the newest archived entry of a session, if any."""
+        row = (
+            db.query(ArchivedAuditPart.head_hash)
+            .filter(ArchivedAuditPart.session_id == session_id)
+            .order_by(ArchivedAuditPart.last_id.desc())
+            .first()
+        )
+        return row[0] if row else None
+
+    @staticmethod
+    def archived_heads(db: Session, session_ids: list[str]) -> dict[str, str]:
+        """Newest archived head per session for a batch of sessions."""
+        heads: dict[str, tuple] = {}
+        if not session_ids:
+            return {}
+        rows = (
+            db.query(ArchivedAuditPart.session_id, ArchivedAuditPart.last_id, ArchivedAuditPart.head_hash)
+            .filter(ArchivedAuditPart.session_id.in_(session_ids))
+            .all()
+        )
+        for session_id, last_id, head in rows:
+            if session_id not in heads or last_id > heads[session_id][0]:
+                heads[session_id] = (last_id, head)
+        return {sid: head for sid, (_, head) in heads.items()}
+
+    @staticmethod
+    def parts_in_id_order(db: Session, session_id: Optional[str] = None) -> list[ArchivedAuditPart]:
+        """Archived members (all, or one session's) ordered by their first entry id."""
+        query = db.query(ArchivedAuditPart)
+        if session_id:
+            query = query.filter(ArchivedAuditPart.session_id == session_id)
+        return query.order_by(ArchivedAuditPart.first_id.asc(), ArchivedAuditPart.id.asc()).all()
+
+    @staticmethod
+    def entries_in_range(db: Session, start_id: int, end_id: int) -> list[dict]:
+        """Archived entries whose id falls within [start_id, end_id]."""
+        parts = (
+            db.query(ArchivedAuditPart)
+            .filter(ArchivedAuditPart.first_id <= end_id, ArchivedAuditPart.last_id >= start_id)
+            .all()
+        )
+        return [
+            row for part in parts for row in read_part(part)
+            if start_id <= row["id"] <= end_id
+        ]
+
+    # ─── Archival Job ───────────────────────────────────────────────
+
+    @staticmethod
+    def archive_completed(
+        db: Session,
+        older_than_days: Optional[int] = None,
+        sessions_per_segment: Optional[int] = None,
+    ) -> dict:
+        """Move audit rows of completed sessions older than N days into segments.
+
+        Only rows already sealed by a Merkle checkpoint are moved (outstanding
+        rows are sealed first), so every archived entry stays provable.
+
+        Returns:
+            Summary with the segments written and session/entry counts.
+        """
+        from app.services.audit_checkpoint_service import AuditCheckpointService
+        from app.services.audit_writer import audit_writer
+
+        older_than_days = settings.AUDIT_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        sessions_per_segment = sessions_per_segment or settings.AUDIT_ARCHIVE_SEGMENT_SESSIONS
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        summary = {"segments": [], "sessions": 0, "entries": 0, "cutoff": cutoff.isoformat()}
+
+        with _archive_lock:
+            audit_writer.flush()
+            AuditCheckpointService.seal_pending(db, include_partial=True)
+            latest = AuditCheckpointService.latest(db)
+            if not latest:
+                return summary
+            # audit_logs is AUTOINCREMENT, so archived ids are never handed out again
+            sealed_upto = latest.end_id
+
+            while True:
+                session_ids = [
+                    sid for (sid,) in db.query(UserSession.id)
+                    .filter(
+                        UserSession.status == "completed",
+                        UserSession.completed_at < cutoff,
+                        exists().where(AuditLog.session_id == UserSession.id, AuditLog.id <= sealed_upto),
+                    )
+                    .order_by(UserSession.id)
+                    .limit(sessions_per_segment)
+                    .all()
+                ]
+                if not session_ids:
+                    break
+
+                written = AuditArchiveService._write_segment(db, session_ids, sealed_upto)
+                summary["segments"].append(written["segment"])
+                summary["sessions"] += written["sessions"]
+                summary["entries"] += written["entries"]
+
+        return summary
+
+    @staticmethod
+    def _write_segment(db: Session, session_ids: list[str], sealed_upto: int) -> dict:
+        columns = [getattr(AuditLog, name) for name in EXPORT_COLUMNS]
+        rows = (
+            db.query(*columns)
+            .filter(AuditLog.session_id.in_(session_ids), AuditLog.id <= sealed_upto)
+            .order_by(AuditLog.session_id, AuditLog.id)
+            .all()
+        )
+        by_session: dict[str, list[dict]] = {}
+        for row in rows:
+            by_session.setdefault(row.session_id, []).append(_row_to_json(dict(zip(EXPORT_COLUMNS, row))))
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        segment = f"segment-{datetime.utcnow():%Y%m%dT%H%M%S%f}.ndjson.gz"
+        index = {}
+        digest = hashlib.sha256()
+
+        # 'xb': segments are created once and never rewritten
+        with open(segment_path(segment), "xb") as f:
+            for session_id, entries in by_session.items():
+                member = gzip.compress(
+                    "".join(json.dumps(e, default=str) + "\n" for e in entries).encode("utf-8")
+                )
+                index[session_id] = {
+                    "offset": f.tell(),
+                    "length": len(member),
+                    "entry_count": len(entries),
+                    "first_id": entries[0]["id"],
+                    "last_id": entries[-1]["id"],
+                    "first_previous_hash": entries[0]["previous_hash"] or "",
+                    "head_hash": entries[-1]["payload_hash"],
+                }
+                f.write(member)
+                digest.update(member)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # The segment is durable; now swap live rows for index entries atomically.
+        # A segment whose swap fails is removed, so no file on disk duplicates
+        # live rows (a crash in between leaves one that nothing references).
+        try:
+            db.add_all([
+                ArchivedAuditPart(session_id=session_id, segment=segment, **meta)
+                for session_id, meta in index.items()
+            ])
+            db.query(AuditLog).filter(
+                AuditLog.session_id.in_(list(index)), AuditLog.id <= sealed_upto,
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            os.remove(segment_path(segment))
+            raise
+
+        sidecar = segment_path(segment.replace(".ndjson.gz", ".idx.json"))
+        with open(f"{sidecar}.tmp", "w") as f:
+            json.dump({
+                "segment": segment,
+                "created_at": datetime.utcnow().isoformat(),
+                "sha256": digest.hexdigest(),
+                "sessions": index,
+            }, f, indent=1)
+        os.replace(f"{sidecar}.tmp", sidecar)
+
+        return {"segment": segment, "sessions": len(index), "entries": len(rows)}
+
+
+def archive_job():
+    """Scheduler entry point for the archival job."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        AuditArchiveService.archive_completed(db)
+    finally:
+        db.close()
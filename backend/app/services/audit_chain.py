@@ -0,0 +1,128 @@
+"""
+Audit Chain Heads — In-process cache of the newest chain hash per session.
+
+Removes the "last entry" lookup from every audit write and serializes appends
+per session, so concurrent requests cannot read the same head and fork the
+chain. Misses (cold start, evicted sessions) fall back to the database.
+
+The cache assumes it sees every append, i.e. a single worker process: another
+process appending to the same session would leave a cached head stale, and
+the next append here would fork the chain. With AUDIT_CHAIN_CACHE off (which
+`run.py --workers N` selects) every append reads the head from the database;
+the per-session locks still apply within each process.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class ChainHeadCache:
+    """Bounded LRU of session_id -> chain hash, plus per-session append locks."""
+
+    def __init__(self, max_sessions: int, enabled: bool = True):
+        self.max_sessions = max(1, max_sessions)
+        self.enabled = enabled
+        self._heads: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        # session_id -> [lock, holders+waiters]; entries exist only while in use
+        self._session_locks: dict[str, list] = {}
+        self._hits = 0
+        self._misses = 0
+
+    # ─── Heads ──────────────────────────────────────────────────────
+
+    def get(self, session_id: str) -> Optional[str]:
+        """Cached head for a session, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            head = self._heads.get(session_id)
+            if head is None:
+                self._misses += 1
+                return None
+            self._heads.move_to_end(session_id)
+            self._hits += 1
+            return head
+
+    def set(self, session_id: str, head: str):
+        """Record the newest chain hash for a session, evicting the LRU entry if full."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._heads[session_id] = head
+            self._heads.move_to_end(session_id)
+            while len(self._heads) > self.max_sessions:
+                self._heads.popitem(last=False)
+
+    def invalidate(self, session_id: Optional[str] = None):
+        """Forget one session's head (or all of them); the next append re-reads the DB."""
+        with self._lock:
+            if session_id is None:
+                self._heads.clear()
+            else:
+                self._heads.pop(session_id, None)
+
+    # ─── Per-session serialization ──────────────────────────────────
+
+    async def acquire_session_lock(self, session_id: str):
+        """Take the append lock for one session. Locks are created on demand and
+        dropped once nobody holds or waits on them, so memory tracks concurrency
+        rather than the number of sessions ever seen. Appends run on the event
+        loop, so waiting yields to other requests instead of blocking a thread."""
+        with self._lock:
+            entry = self._session_locks.get(session_id)
+            if entry is None:
+                entry = self._session_locks[session_id] = [asyncio.Lock(), 0]
+            entry[1] += 1
+
+        try:
+            await entry[0].acquire()
+        except BaseException:
+            self._drop_waiter(session_id, entry)
+            raise
+
+    def release_session_lock(self, session_id: str):
+        """Release a lock taken with acquire_session_lock."""
+        with self._lock:
+            entry = self._session_locks[session_id]
+        entry[0].release()
+        self._drop_waiter(session_id, entry)
+
+    def _drop_waiter(self, session_id: str, entry: list):
+        with self._lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._session_locks[session_id]
+
+    @asynccontextmanager
+    async def session_lock(self, session_id: str):
+        """Hold the append lock for one session for the duration of a block."""
+        await self.acquire_session_lock(session_id)
+        try:
+            yield
+        finally:
+            self.release_session_lock(session_id)
+
+    # ─── Metrics ────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "cached_sessions": len(self._heads),
+                "max_sessions": self.max_sessions,
+                "active_locks": len(self._session_locks),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups * 100, 1) if lookups else 0.0,
+            }
+
+
+chain_heads = ChainHeadCache(max_sessions=settings.AUDIT_CHAIN_CACHE_SIZE, enabled=settings.AUDIT_CHAIN_CACHE)
@@ -0,0 +1,183 @@
+"""
+Audit Checkpoint Service — Periodic Merkle roots over the audit log.
+
+Seals contiguous id ranges of `audit_logs` into `audit_checkpoints` and serves
+inclusion proofs, so a single entry can be proven with O(log n) hashes and a
+batch can be re-checked without replaying every session chain.
+"""
+import threading
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.audit import AuditLog, AuditCheckpoint
+from app.utils.merkle import leaf_hash, merkle_root, inclusion_proof, verify_inclusion
+
+settings = get_settings()
+
+_seal_lock = threading.Lock()
+
+
+class AuditCheckpointService:
+    """Builds and serves Merkle checkpoints over audit_logs."""
+
+    @staticmethod
+    def leaf(entry_id: int, session_id: str, payload_hash: str) -> str:
+        """Leaf hash for one audit entry. Binding the id fixes the entry's position."""
+        return leaf_hash(f"{entry_id}:{session_id}:{payload_hash}")
+
+    @staticmethod
+    def _range_rows(db: Session, start_id: int, end_id: int) -> list[tuple]:
+        """(id, session_id, payload_hash) for every entry in the range, live or archived."""
+        from app.services.audit_archive import AuditArchiveService
+
+        rows = [
+            tuple(row) for row in
+            db.query(AuditLog.id, AuditLog.session_id, AuditLog.payload_hash)
+            .filter(AuditLog.id >= start_id, AuditLog.id <= end_id)
+            .all()
+        ]
+        rows += [
+            (e["id"], e["session_id"], e["payload_hash"])
+            for e in AuditArchiveService.entries_in_range(db, start_id, end_id)
+        ]
+        return sorted(rows)
+
+    @staticmethod
+    def latest(db: Session) -> Optional[AuditCheckpoint]:
+        return db.query(AuditCheckpoint).order_by(AuditCheckpoint.end_id.desc()).first()
+
+    @staticmethod
+    def seal_pending(db: Session, size: Optional[int] = None, include_partial: bool = False) -> list[AuditCheckpoint]:
+        """Create checkpoints for audit rows not yet covered.
+
+        Args:
+            db: Database session.
+            size: Rows per checkpoint (defaults to AUDIT_CHECKPOINT_SIZE).
+            include_partial: Also seal a trailing range smaller than `size`.
+
+        Returns:
+            The checkpoints created, oldest first.
+        """
+        size = size or settings.AUDIT_CHECKPOINT_SIZE
+        created = []
+
+        with _seal_lock:
+            last = AuditCheckpointService.latest(db)
+            last_end = last.end_id if last else 0
+            previous_root = last.merkle_root if last else ""
+
+            while True:
+                rows = (
+                    db.query(AuditLog.id, AuditLog.session_id, AuditLog.payload_hash, AuditLog.timestamp)
+                    .filter(AuditLog.id > last_end)
+                    .order_by(AuditLog.id.asc())
+                    .limit(size)
+                    .all()
+                )
+                if not rows or (len(rows) < size and not include_partial):
+                    break
+
+                leaves = [AuditCheckpointService.leaf(r.id, r.session_id, r.payload_hash) for r in rows]
+                checkpoint = AuditCheckpoint(
+                    start_id=rows[0].id,
+                    end_id=rows[-1].id,
+                    leaf_count=len(rows),
+                    merkle_root=merkle_root(leaves),
+                    previous_root=previous_root,
+                    first_timestamp=rows[0].timestamp,
+                    last_timestamp=rows[-1].timestamp,
+                )
+                db.add(checkpoint)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another process sealed this range first
+                    db.rollback()
+                    break
+
+                created.append(checkpoint)
+                last_end, previous_root = checkpoint.end_id, checkpoint.merkle_root
+
+        return created
+
+    @staticmethod
+    def proof_for(db: Session, entry_id: int) -> Optional[dict]:
+        """Inclusion proof for one audit entry, or None if it is not yet sealed.
+
+        Raises:
+            LookupError: If the entry does not exist.
+        """
+        checkpoint = (
+            db.query(AuditCheckpoint)
+            .filter(AuditCheckpoint.start_id <= entry_id, AuditCheckpoint.end_id >= entry_id)
+            .first()
+        )
+        if not checkpoint:
+            if not db.query(AuditLog.id).filter(AuditLog.id == entry_id).first():
+                raise LookupError(f"Audit entry {entry_id} not found")
+            return None
+
+        rows = AuditCheckpointService._range_rows(db, checkpoint.start_id, checkpoint.end_id)
+        index = next((i for i, row in enumerate(rows) if row[0] == entry_id), None)
+        if index is None:
+            raise LookupError(f"Audit entry {entry_id} not found")
+
+        leaves = [AuditCheckpointService.leaf(*row) for row in rows]
+        proof = inclusion_proof(leaves, index)
+        _, session_id, payload_hash = rows[index]
+
+        return {
+            "entry_id": entry_id,
+            "session_id": session_id,
+            "payload_hash": payload_hash,
+            "leaf": leaves[index],
+            "leaf_index": index,
+            "proof": proof,
+            "checkpoint": AuditCheckpointService.to_dict(checkpoint),
+            "verified": verify_inclusion(leaves[index], proof, checkpoint.merkle_root),
+        }
+
+    @staticmethod
+    def verify_checkpoint(db: Session, checkpoint_id: int) -> Optional[dict]:
+        """Recompute one checkpoint's root from the rows it covers."""
+        checkpoint = db.query(AuditCheckpoint).filter(AuditCheckpoint.id == checkpoint_id).first()
+        if not checkpoint:
+            return None
+
+        rows = AuditCheckpointService._range_rows(db, checkpoint.start_id, checkpoint.end_id)
+        leaves = [AuditCheckpointService.leaf(*row) for row in rows]
+        root = merkle_root(leaves)
+        return {
+            "checkpoint": AuditCheckpointService.to_dict(checkpoint),
+            "recomputed_root": root,
+            "leaf_count": len(leaves),
+            "valid": root == checkpoint.merkle_root and len(leaves) == checkpoint.leaf_count,
+        }
+
+    @staticmethod
+    def to_dict(checkpoint: AuditCheckpoint) -> dict:
+        return {
+            "id": checkpoint.id,
+            "start_id": checkpoint.start_id,
+            "end_id": checkpoint.end_id,
+            "leaf_count": checkpoint.leaf_count,
+            "merkle_root": checkpoint.merkle_root,
+            "previous_root": checkpoint.previous_root,
+            "first_timestamp": checkpoint.first_timestamp.isoformat() if checkpoint.first_timestamp else None,
+            "last_timestamp": checkpoint.last_timestamp.isoformat() if checkpoint.last_timestamp else None,
+            "created_at": checkpoint.created_at.isoformat() if checkpoint.created_at else None,
+        }
+
+
+def seal_checkpoints_job():
+    """Scheduler entry point: seal every full range that is pending."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        AuditCheckpointService.seal_pending(db)
+    finally:
+        db.close()
@@ -0,0 +1,177 @@
+"""
+Audit Export — Streams audit_logs as NDJSON or CSV with flat memory use.
+
+Rows are read in fixed-size pages using an `id` keyset cursor (never OFFSET),
+serialized page by page, and handed to a StreamingResponse, so an export of
+any size holds at most one page in memory.
+
+Entries moved to cold storage (see audit_archive) are merged back in id
+order: each archived member is opened only once the live cursor reaches its
+first id, so memory grows with the number of archived trails that overlap in
+id range, not with the size of the archive.
+"""
+import csv
+import heapq
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import func
+
+from app.models.audit import AuditLog
+
+EXPORT_COLUMNS = [
+    "id", "session_id", "action", "payload_hash", "previous_hash", "content_hash",
+    "ip_address", "user_agent", "timestamp", "log_metadata",
+]
+
+
+def iter_audit_pages(
+    session_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page_size: int = 1000,
+) -> Iterator[list[dict]]:
+    """Yield pages of matching audit rows (as dicts) in id order, archived
+    entries included.
+
+    Uses its own DB session because the response body is produced after the
+    request's dependencies have been torn down.
+    """
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = _merge_archived(
+            db, _iter_live_rows(db, session_id, action, since, until, page_size),
+            session_id, action, since, until,
+        )
+        page = []
+        for row in rows:
+            page.append(row)
+            if len(page) == page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+    finally:
+        db.close()
+
+
+def _iter_live_rows(db, session_id, action, since, until, page_size) -> Iterator[dict]:
+    """Matching audit_logs rows in id order, read a page at a time."""
+    columns = [getattr(AuditLog, name) for name in EXPORT_COLUMNS]
+    last_id = 0
+    if since:
+        # Jump straight to the first row in the window via the timestamp index
+        first_id = db.query(func.min(AuditLog.id)).filter(AuditLog.timestamp >= since).scalar()
+        if first_id is None:
+            return
+        last_id = first_id - 1
+
+    while True:
+        query = db.query(*columns).filter(AuditLog.id > last_id)
+        if session_id:
+            query = query.filter(AuditLog.session_id == session_id)
+        if action:
+            query = query.filter(AuditLog.action == action)
+        if since:
+            query = query.filter(AuditLog.timestamp >= since)
+        if until:
+            query = query.filter(AuditLog.timestamp <= until)
+
+        rows = query.order_by(AuditLog.id.asc()).limit(page_size).all()
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(EXPORT_COLUMNS, row))
+        last_id = rows[-1][0]
+
+
+def _merge_archived(db, live: Iterator[dict], session_id, action, since, until) -> Iterator[dict]:
+    """Merge matching archived entries into the live rows by id."""
+    from app.services.audit_archive import AuditArchiveService, read_part
+
+    parts = iter(AuditArchiveService.parts_in_id_order(db, session_id))
+    next_part = next(parts, None)
+    open_parts: list = []   # heap of (id, seq, row, iterator) for members being read
+    seq = 0
+
+    def matches(row: dict) -> bool:
+        if action and row["action"] != action:
+            return False
+        if since and (row["timestamp"] is None or row["timestamp"] < since):
+            return False
+        if until and (row["timestamp"] is None or row["timestamp"] > until):
+            return False
+        return True
+
+    def archived_rows(part) -> Iterator[dict]:
+        for row in read_part(part):
+            if row.get("timestamp"):
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            row = {name: row.get(name) for name in EXPORT_COLUMNS}
+            if matches(row):
+                yield row
+
+    def push(rows: Iterator[dict]):
+        nonlocal seq
+        row = next(rows, None)
+        if row is not None:
+            seq += 1
+            heapq.heappush(open_parts, (row["id"], seq, row, rows))
+
+    def frontier() -> float:
+        """Id of the next row we would emit (inf when nothing is pending)."""
+        return min(
+            live_row["id"] if live_row else float("inf"),
+            open_parts[0][0] if open_parts else float("inf"),
+        )
+
+    live_row = next(live, None)
+    while True:
+        # Open every member that starts before the next row we would emit;
+        # with nothing else pending, open just the next one.
+        while next_part is not None and (next_part.first_id <= frontier() or frontier() == float("inf")):
+            push(archived_rows(next_part))
+            next_part = next(parts, None)
+
+        if open_parts and (live_row is None or open_parts[0][0] < live_row["id"]):
+            _, _, row, rows = heapq.heappop(open_parts)
+            push(rows)
+            yield row
+        elif live_row is not None:
+            yield live_row
+            live_row = next(live, None)
+        else:
+            return
+
+
+def _jsonable(row: dict) -> dict:
+    row["timestamp"] = row["timestamp"].isoformat() if row["timestamp"] else None
+    return row
+
+
+def ndjson_stream(pages: Iterator[list[dict]]) -> Iterator[str]:
+    """One JSON object per line, one chunk per page."""
+    for page in pages:
+        yield "".join(json.dumps(_jsonable(row), default=str) + "\n" for row in page)
+
+
+def csv_stream(pages: Iterator[list[dict]]) -> Iterator[str]:
+    """CSV with a header row; log_metadata is embedded as a JSON string."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in page:
+            row = _jsonable(row)
+            row["log_metadata"] = json.dumps(row["log_metadata"] or {}, default=str)
+            writer.writerow([row[name] for name in EXPORT_COLUMNS])
+        yield buffer.getvalue()
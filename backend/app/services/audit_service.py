@@ -1,21 +1,45 @@
 """
 Audit Service — Manages the immutable, hash-chained audit trail.
+Appends run on the async request path; reads and verification are used by
+admin tooling on the sync engine.
+
+Entries join the caller's transaction and are committed together with the
+domain change they record. The session's chain lock is held until that
+transaction ends, so the cached head only ever advances on commit. A
+transaction joins the writer queue before it takes any chain lock: the
+queue is otherwise taken at the first write, which would lock in the opposite
+order to routes that write before they audit. When
+AUDIT_WRITE_BEHIND is enabled, entries are handed to the buffered AuditWriter
+once the transaction commits instead of being inserted with it.
 """
 from datetime import datetime
 from typing import Optional, Dict
 
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.models.audit import AuditLog
-from app.utils.hashing import generate_hash, generate_chain_hash
+from app.services.audit_archive import AuditArchiveService, to_audit_log
+from app.services.audit_chain import chain_heads
+from app.services.audit_writer import audit_writer
+from app.services.funnel_service import FunnelService
+from app.utils.hashing import generate_hash, link_hash, verify_chain_links
+
+settings = get_settings()
+
+# Session.info key: session_id -> {"head", "queued"} for every
+# audit chain the current transaction has appended to (and holds the lock of).
+_CHAINS_KEY = "audit_chains"
 
 
 class AuditService:
     """Creates tamper-evident audit log entries with hash chaining."""
 
     @staticmethod
-    def log(
-        db: Session,
+    async def log(
+        db: AsyncSession,
         session_id: str,
         action: str,
         payload: Optional[Dict] = None,
@@ -26,7 +50,7 @@ class AuditService:
         """Create an audit log entry with hash chaining.
 
         Args:
-            db: Database session.
+            db: Async database session.
             session_id: Session this action belongs to.
             action: Action identifier (e.g. SESSION_START, KYC_SCAN).
             payload: Data payload to hash.
@@ -35,43 +59,147 @@ class AuditService:
             metadata: Additional metadata to store.
 
         Returns:
-            The created AuditLog entry.
+            The created AuditLog entry, persisted when the caller's transaction commits.
         """
-        # Get the hash of the last entry for this session (chain linking)
-        last_entry = (
-            db.query(AuditLog)
-            .filter(AuditLog.session_id == session_id)
-            .order_by(AuditLog.id.desc())
-            .first()
+        payload_data = payload or {}
+
+        # The chain lock is held until the transaction ends (see the session
+        # events below), so two requests can never chain onto the same head.
+        await _wait_for_audit_writer(db)
+        if not db.in_transaction():
+            await db.begin()
+        chains = db.info.setdefault(_CHAINS_KEY, {})
+        chain = chains.get(session_id)
+        if chain is None:
+            await _join_writer_queue(db)
+            await chain_heads.acquire_session_lock(session_id)
+            chain = chains[session_id] = {"head": None, "queued": []}
+
+        previous_hash = chain["head"]
+        if previous_hash is None:
+            previous_hash = await AuditService._chain_head(db, session_id)
+        return AuditService._append(
+            db, chain, session_id, action, payload_data, previous_hash, ip_address, user_agent, metadata,
         )
-        previous_hash = last_entry.payload_hash if last_entry else ""
 
-        # Generate hashes
-        payload_data = payload or {}
-        payload_hash = generate_hash(payload_data)
-        chain_hash = generate_chain_hash(payload_data, previous_hash)
+    @staticmethod
+    async def log_batch(
+        db: AsyncSession,
+        session_ids: list[str],
+        action: str,
+        payloads: Optional[Dict[str, Dict]] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> list[AuditLog]:
+        """Append the same action to many sessions' chains in one go.
+
+        Chain locks are taken in sorted session-id order, so two batches that
+        overlap can never each hold a lock the other is waiting for. Chain heads
+        that are neither pending nor cached are read with one query.
+
+        Args:
+            payloads: Per-session payload, keyed by session id (default: empty).
+
+        Returns:
+            The created entries, in sorted session-id order.
+        """
+        payloads = payloads or {}
+        ordered = sorted(set(session_ids))
+
+        await _wait_for_audit_writer(db)
+        if not db.in_transaction():
+            await db.begin()
+        chains = db.info.setdefault(_CHAINS_KEY, {})
+        await _join_writer_queue(db)
+        for session_id in ordered:
+            if session_id not in chains:
+                await chain_heads.acquire_session_lock(session_id)
+                chains[session_id] = {"head": None, "queued": []}
+
+        heads = {}
+        unknown = []
+        for session_id in ordered:
+            head = chains[session_id]["head"] or audit_writer.pending_head(session_id) or chain_heads.get(session_id)
+            if head is None:
+                unknown.append(session_id)
+            else:
+                heads[session_id] = head
+        if unknown:
+            newest = (
+                select(func.max(AuditLog.id))
+                .where(AuditLog.session_id.in_(unknown))
+                .group_by(AuditLog.session_id)
+            )
+            rows = await db.execute(
+                select(AuditLog.session_id, AuditLog.payload_hash).where(AuditLog.id.in_(newest))
+            )
+            heads.update({session_id: head for session_id, head in rows})
+            for session_id in unknown:
+                if session_id not in heads:
+                    heads[session_id] = await db.run_sync(AuditArchiveService.archived_head, session_id) or ""
+
+        return [
+            AuditService._append(
+                db, chains[session_id], session_id, action, payloads.get(session_id) or {},
+                heads[session_id], ip_address, user_agent, metadata,
+            )
+            for session_id in ordered
+        ]
+
+    @staticmethod
+    def _append(db, chain: dict, session_id: str, action: str, payload_data: Dict, previous_hash: str,
+                ip_address, user_agent, metadata) -> AuditLog:
+        """Chain one entry onto `previous_hash` and stage it. Caller holds the chain lock."""
+        content_hash = generate_hash(payload_data)
+        chain_hash = link_hash(previous_hash, content_hash)
 
         entry = AuditLog(
             session_id=session_id,
             action=action,
             payload_hash=chain_hash,
             previous_hash=previous_hash,
+            content_hash=content_hash,
             ip_address=ip_address,
             user_agent=user_agent,
             log_metadata=metadata or {},
             timestamp=datetime.utcnow(),
         )
 
-        db.add(entry)
-        db.commit()
-        db.refresh(entry)
+        if settings.AUDIT_WRITE_BEHIND:
+            chain["queued"].append(entry)
+        else:
+            db.add(entry)
+        chain["head"] = chain_hash
+        FunnelService.record(db, session_id, action, entry.timestamp)
 
         return entry
 
+    @staticmethod
+    async def _chain_head(db: AsyncSession, session_id: str) -> str:
+        """Hash of the newest entry for a session: queued, cached, or from the DB."""
+        head = audit_writer.pending_head(session_id)
+        if head is None:
+            head = chain_heads.get(session_id)
+        if head is None:
+            head = await db.scalar(
+                select(AuditLog.payload_hash)
+                .where(AuditLog.session_id == session_id)
+                .order_by(AuditLog.id.desc())
+                .limit(1)
+            )
+            if head is None:
+                head = await db.run_sync(AuditArchiveService.archived_head, session_id) or ""
+        return head
+
     @staticmethod
     def get_trail(db: Session, session_id: str) -> list[AuditLog]:
-        """Get the full audit trail for a session, ordered chronologically."""
-        return (
+        """Get the full audit trail for a session, ordered chronologically.
+        Entries moved to cold storage are read back from their archive segment."""
+        if settings.AUDIT_WRITE_BEHIND:
+            audit_writer.flush()
+        archived = [to_audit_log(row) for row in AuditArchiveService.archived_entries(db, session_id)]
+        return archived + (
             db.query(AuditLog)
             .filter(AuditLog.session_id == session_id)
             .order_by(AuditLog.timestamp.asc())
@@ -85,8 +213,18 @@ class AuditService:
         Returns:
             dict with 'valid' (bool), 'total_entries', and 'broken_at' (if invalid).
         """
-        entries = (
-            db.query(AuditLog)
+        if settings.AUDIT_WRITE_BEHIND:
+            audit_writer.flush()
+
+        archived = [
+            (e["id"], e["action"], e["payload_hash"], e["previous_hash"], e.get("content_hash"))
+            for e in AuditArchiveService.archived_entries(db, session_id)
+        ]
+        entries = archived + (
+            db.query(
+                AuditLog.id, AuditLog.action, AuditLog.payload_hash,
+                AuditLog.previous_hash, AuditLog.content_hash,
+            )
             .filter(AuditLog.session_id == session_id)
             .order_by(AuditLog.id.asc())
             .all()
@@ -95,14 +233,50 @@ class AuditService:
         if not entries:
             return {"valid": True, "total_entries": 0, "broken_at": None}
 
-        for i, entry in enumerate(entries):
-            expected_prev = entries[i - 1].payload_hash if i > 0 else ""
-            if entry.previous_hash != expected_prev:
-                return {
-                    "valid": False,
-                    "total_entries": len(entries),
-                    "broken_at": entry.id,
-                    "message": f"Chain broken at entry {entry.id} ({entry.action})",
-                }
+        broken = verify_chain_links(entries)
+        if broken:
+            entry_id, action, reason = broken
+            return {
+                "valid": False,
+                "total_entries": len(entries),
+                "broken_at": entry_id,
+                "message": f"Chain broken at entry {entry_id} ({action}): {reason}",
+            }
 
         return {"valid": True, "total_entries": len(entries), "broken_at": None}
+
+
+async def _join_writer_queue(db: AsyncSession):
+    """Writer queue before chain locks, always (see SerializedWriteSession)."""
+    begin_write = getattr(db, "begin_write", None)
+    if begin_write is not None:
+        await begin_write()
+
+
+async def _wait_for_audit_writer(db: AsyncSession):
+    """Write-behind backpressure, applied only while the transaction holds no
+    lock yet: the flush would otherwise wait on a write lock we hold."""
+    if not settings.AUDIT_WRITE_BEHIND or db.info.get(_CHAINS_KEY) or getattr(db, "holds_writer", False):
+        return
+    await audit_writer.wait_for_room()
+
+
+# ─── Transaction hooks ──────────────────────────────────────────────
+
+@event.listens_for(Session, "after_commit")
+def _publish_chain_heads(session: Session):
+    """Advance cached heads (and hand queued entries to the writer) on commit."""
+    for session_id, chain in session.info.get(_CHAINS_KEY, {}).items():
+        for entry in chain["queued"]:
+            audit_writer.enqueue(entry)
+        chain_heads.set(session_id, chain["head"])
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_chain_locks(session: Session, transaction):
+    """Release chain locks when the outermost transaction ends. After a rollback
+    the cached heads were never advanced, so nothing else needs undoing."""
+    if transaction.parent is not None:
+        return
+    for session_id in session.info.pop(_CHAINS_KEY, {}):
+        chain_heads.release_session_lock(session_id)
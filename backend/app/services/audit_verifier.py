@@ -0,0 +1,298 @@
+"""
+Audit Verifier — Bulk, resumable hash-chain verification across all sessions.
+
+Streams `audit_logs` in (session_id, id) order with keyset pagination, hands
+complete session chains to a process pool, and checkpoints progress to a JSON
+file so an interrupted run can resume where it stopped.
+
+The pool is only ever started by `manage.py verify-audit`. Forking the API
+server would copy its event loop, driver threads and open SQLite connections
+into every worker, so the admin endpoint runs that command as a child process
+instead and reports progress from the checkpoint file.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy import tuple_
+
+from app.config import BASE_DIR, get_settings
+from app.database import SessionLocal
+from app.models.audit import AuditLog, ArchivedAuditPart
+from app.services.audit_archive import AuditArchiveService
+from app.utils.hashing import verify_chain_links
+
+settings = get_settings()
+
+CHECKPOINT_FILE = os.path.join(settings.DATA_DIR, "audit_verify_checkpoint.json")
+MAX_REPORTED_BROKEN = 1000   # Broken sessions listed in the summary (all are counted)
+SESSIONS_PER_TASK = 200      # Session chains shipped to a worker per task
+
+_run_lock = threading.Lock()
+_process_lock = threading.Lock()
+_process: Optional[subprocess.Popen] = None   # Run started by start_subprocess()
+
+
+def _verify_sessions(chains: list) -> list:
+    """Worker entry point: verify a batch of (session_id, rows, start_hash) chains.
+    Returns (session_id, entry_count, broken) per chain."""
+    return [
+        (session_id, len(rows), verify_chain_links(rows, start_hash))
+        for session_id, rows, start_hash in chains
+    ]
+
+
+def _verify_archived_parts(parts: list) -> list:
+    """Worker entry point: verify archived gzip members against their index rows.
+    Returns (session_id, entry_count, broken) per part."""
+    from app.services.audit_archive import read_part
+
+    results = []
+    for part in parts:
+        try:
+            entries = read_part(part)
+        except (OSError, ValueError) as e:
+            results.append((part.session_id, 0, (part.first_id, None, f"Archive segment unreadable: {e}")))
+            continue
+        rows = [
+            (e["id"], e["action"], e["payload_hash"], e["previous_hash"], e.get("content_hash"))
+            for e in entries
+        ]
+        broken = verify_chain_links(rows, part.first_previous_hash or "")
+        if not broken and (len(rows) != part.entry_count or rows[-1][2] != part.head_hash):
+            broken = (part.first_id, None, "Archived member does not match its index entry")
+        results.append((part.session_id, len(rows), broken))
+    return results
+
+
+def _iter_session_chains(chunk_size: int, after_session: Optional[str]):
+    """Yield (session_id, rows) for every session after `after_session`, in order.
+    Memory is bounded by the chunk size plus the longest single chain."""
+
+    last_session, last_id = after_session, None
+    current_id, current_rows = None, []
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(
+                AuditLog.session_id, AuditLog.id, AuditLog.action,
+                AuditLog.payload_hash, AuditLog.previous_hash, AuditLog.content_hash,
+            )
+            if last_id is not None:
+                query = query.filter(tuple_(AuditLog.session_id, AuditLog.id) > (last_session, last_id))
+            elif last_session:
+                query = query.filter(AuditLog.session_id > last_session)
+            rows = query.order_by(AuditLog.session_id, AuditLog.id).limit(chunk_size).all()
+            if not rows:
+                break
+
+            for session_id, entry_id, action, payload_hash, previous_hash, content_hash in rows:
+                if session_id != current_id:
+                    if current_rows:
+                        yield current_id, current_rows
+                    current_id, current_rows = session_id, []
+                current_rows.append((entry_id, action, payload_hash, previous_hash, content_hash))
+
+            last_session, last_id = rows[-1][0], rows[-1][1]
+    finally:
+        db.close()
+
+    if current_rows:
+        yield current_id, current_rows
+
+
+def load_checkpoint(path: str = CHECKPOINT_FILE) -> Optional[dict]:
+    """Read the last saved progress/summary, if any."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_checkpoint(state: dict, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state["updated_at"] = datetime.utcnow().isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_bulk_verification(
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    resume: bool = False,
+    checkpoint_path: str = CHECKPOINT_FILE,
+) -> dict:
+    """Verify every session's audit chain and return a summary.
+
+    Args:
+        workers: Worker processes (defaults to AUDIT_VERIFY_WORKERS, 0 = CPU count).
+        chunk_size: Rows fetched per keyset page.
+        resume: Continue from the saved checkpoint instead of starting over.
+        checkpoint_path: Where progress is written after every completed batch.
+
+    Raises:
+        RuntimeError: If another bulk verification is already running in this process.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise RuntimeError("A bulk audit verification is already running")
+
+    state = None
+    try:
+        workers = workers or settings.AUDIT_VERIFY_WORKERS or os.cpu_count() or 1
+        chunk_size = chunk_size or settings.AUDIT_VERIFY_CHUNK_SIZE
+
+        state = load_checkpoint(checkpoint_path) if resume else None
+        if not state or state.get("completed"):
+            state = {
+                "started_at": datetime.utcnow().isoformat(),
+                "completed": False,
+                "last_session_id": None,
+                "live_completed": False,
+                "sessions_checked": 0,
+                "entries_checked": 0,
+                "archived_parts_checked": 0,
+                "archived_entries_checked": 0,
+                "broken_count": 0,
+                "broken_sessions": [],
+            }
+        state["status"] = "running"
+        _save_checkpoint(state, checkpoint_path)
+
+        def record(batch_results: list, last_session_id: str):
+            for session_id, count, broken in batch_results:
+                state["sessions_checked"] += 1
+                state["entries_checked"] += count
+                if broken:
+                    _record_broken(state, session_id, broken)
+            state["last_session_id"] = last_session_id
+            _save_checkpoint(state, checkpoint_path)
+
+        def submit(pool, batch: list):
+            # Sessions with archived history continue from the archived head
+            heads = AuditArchiveService.archived_heads(db, [sid for sid, _ in batch])
+            chains = [(sid, rows, heads.get(sid, "")) for sid, rows in batch]
+            return pool.submit(_verify_sessions, chains), batch[-1][0]
+
+        # Futures are drained in submission order so the checkpoint always marks
+        # a prefix of sessions that has been fully verified.
+        in_flight: list = []
+        db = SessionLocal()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                if not state.get("live_completed"):
+                    batch: list = []
+                    for chain in _iter_session_chains(chunk_size, state["last_session_id"]):
+                        batch.append(chain)
+                        if len(batch) >= SESSIONS_PER_TASK:
+                            in_flight.append(submit(pool, batch))
+                            batch = []
+                            while len(in_flight) > workers * 2:
+                                future, last_id = in_flight.pop(0)
+                                record(future.result(), last_id)
+                    if batch:
+                        in_flight.append(submit(pool, batch))
+                    for future, last_id in in_flight:
+                        record(future.result(), last_id)
+                    state["live_completed"] = True
+                    _save_checkpoint(state, checkpoint_path)
+
+                _verify_archive(db, pool, state)
+        finally:
+            db.close()
+
+        state["completed"] = True
+        state["status"] = "completed"
+        state["valid"] = state["broken_count"] == 0
+        state["finished_at"] = datetime.utcnow().isoformat()
+        _save_checkpoint(state, checkpoint_path)
+        return state
+    except Exception as e:
+        if state:
+            state["status"] = "failed"
+            state["error"] = str(e)
+            _save_checkpoint(state, checkpoint_path)
+        raise
+    finally:
+        _run_lock.release()
+
+
+def _record_broken(state: dict, session_id: str, broken: tuple):
+    state["broken_count"] += 1
+    if len(state["broken_sessions"]) < MAX_REPORTED_BROKEN:
+        entry_id, action, reason = broken
+        state["broken_sessions"].append({
+            "session_id": session_id,
+            "broken_at": entry_id,
+            "action": action,
+            "reason": reason,
+        })
+
+
+def _verify_archive(db, pool, state: dict):
+    """Verify every archived member, and that a session's parts chain onto each other."""
+    columns = ["session_id", "segment", "offset", "length", "entry_count",
+               "first_id", "first_previous_hash", "head_hash"]
+    parts = [
+        SimpleNamespace(**dict(zip(columns, row)))
+        for row in db.query(*[getattr(ArchivedAuditPart, c) for c in columns])
+        .order_by(ArchivedAuditPart.session_id, ArchivedAuditPart.first_id)
+        .all()
+    ]
+
+    previous = None
+    for part in parts:
+        expected = previous.head_hash if previous and previous.session_id == part.session_id else ""
+        if (part.first_previous_hash or "") != expected:
+            _record_broken(state, part.session_id, (part.first_id, None, "Archived part does not continue the previous part"))
+        previous = part
+
+    futures = [
+        pool.submit(_verify_archived_parts, parts[i:i + SESSIONS_PER_TASK])
+        for i in range(0, len(parts), SESSIONS_PER_TASK)
+    ]
+    for future in futures:
+        for session_id, count, broken in future.result():
+            state["archived_parts_checked"] += 1
+            state["archived_entries_checked"] += count
+            if broken:
+                _record_broken(state, session_id, broken)
+
+
+def start_subprocess(workers: Optional[int] = None, resume: bool = False) -> int:
+    """Start `manage.py verify-audit` in a child process and return its pid.
+    Output goes to LOG_DIR/audit_verify.log.
+
+    Raises:
+        RuntimeError: If a run started from this process is still going.
+    """
+    global _process
+    with _process_lock:
+        if is_running():
+            raise RuntimeError("A bulk audit verification is already running")
+        command = [sys.executable, os.path.join(BASE_DIR, "manage.py"), "verify-audit"]
+        if workers:
+            command += ["--workers", str(workers)]
+        if resume:
+            command.append("--resume")
+        os.makedirs(settings.LOG_DIR, exist_ok=True)
+        with open(os.path.join(settings.LOG_DIR, "audit_verify.log"), "ab") as log:
+            _process = subprocess.Popen(
+                command, cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            )
+        print(f"[AUDIT VERIFY] Started bulk verification (pid {_process.pid})")
+        return _process.pid
+
+
+def is_running() -> bool:
+    """Whether a bulk verification is in progress in this process or in a
+    child it started."""
+    return _run_lock.locked() or (_process is not None and _process.poll() is None)
@@ -0,0 +1,185 @@
+"""
+Audit Writer — Opt-in write-behind buffer for the audit trail.
+
+Queues audit entries in memory and persists them in one transaction when the
+queue reaches a size threshold or a flush interval elapses, instead of paying
+a commit per action. Entries arrive already hash-chained by AuditService, so
+flushed rows are identical to what the synchronous path would have written.
+
+Entries are enqueued from a commit hook, which for async sessions runs on the
+event loop, so enqueueing never writes to the database. Backpressure is
+applied before the next transaction instead: while more than
+AUDIT_MAX_QUEUE entries are waiting, AuditService awaits a flush in the
+threadpool before it takes any lock.
+"""
+import threading
+import time
+from typing import Optional, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.models.audit import AuditLog
+
+settings = get_settings()
+
+
+class AuditWriter:
+    """Buffers audit entries and flushes them in batches from a background thread."""
+
+    def __init__(self, batch_size: int, flush_interval_ms: int, max_queue: int):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.max_queue = max(self.batch_size, max_queue)
+
+        self._queue: list[dict] = []
+        self._heads: Dict[str, str] = {}   # session_id -> chain hash of newest queued entry
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Metrics
+        self._flushes = 0
+        self._flushed_entries = 0
+        self._failed_flushes = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._over_limit = 0       # Entries queued while the queue was already full
+        self._backpressure_waits = 0
+
+    # ─── Lifecycle ──────────────────────────────────────────────────
+
+    def start(self):
+        """Start the background flush thread (idempotent)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and synchronously persist everything still queued."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread:
+            thread.join(timeout=10)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._stopping and len(self._queue) < self.batch_size:
+                    self._wakeup.wait(timeout=self.flush_interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+    # ─── Enqueue ────────────────────────────────────────────────────
+
+    def pending_head(self, session_id: str) -> Optional[str]:
+        """Chain hash of the newest queued (unflushed) entry for a session, if any."""
+        with self._lock:
+            return self._heads.get(session_id)
+
+    def enqueue(self, entry: AuditLog):
+        """Queue an already chained entry. The caller must hold the session's chain
+        lock so that entries for one session are queued in chain order."""
+        row = {
+            column.key: getattr(entry, column.key)
+            for column in AuditLog.__table__.columns
+            if column.key != "id"
+        }
+        with self._lock:
+            self._queue.append(row)
+            self._heads[entry.session_id] = entry.payload_hash
+            depth = len(self._queue)
+            if depth > self.max_queue:
+                self._over_limit += 1
+            if depth >= self.batch_size:
+                self._wakeup.notify()
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return len(self._queue) >= self.max_queue
+
+    async def wait_for_room(self):
+        """Backpressure for async callers: flush in the threadpool while the
+        queue is full. Call it only while holding no writer or chain lock."""
+        while self.is_full():
+            with self._lock:
+                self._backpressure_waits += 1
+            if not await run_in_threadpool(self.flush):
+                return   # Failed or raced with the flusher; the background thread retries
+
+    # ─── Flush ──────────────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Persist all queued entries in a single transaction. Returns rows written."""
+        from app.database import SessionLocal
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                db.bulk_insert_mappings(AuditLog, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    # Put the batch back in front so chain order is preserved for the retry
+                    self._queue[:0] = batch
+                    self._failed_flushes += 1
+                print(f"[AUDIT WRITER] Flush of {len(batch)} entries failed: {e}")
+                return 0
+            finally:
+                db.close()
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                pending = {row["session_id"] for row in self._queue}
+                self._heads = {s: h for s, h in self._heads.items() if s in pending}
+
+                self._flushes += 1
+                self._flushed_entries += len(batch)
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            return len(batch)
+
+    # ─── Metrics ────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """Queue depth and flush latency counters."""
+        with self._lock:
+            return {
+                "enabled": settings.AUDIT_WRITE_BEHIND,
+                "running": bool(self._thread and self._thread.is_alive()),
+                "queue_depth": len(self._queue),
+                "flushes": self._flushes,
+                "flushed_entries": self._flushed_entries,
+                "failed_flushes": self._failed_flushes,
+                "over_limit_entries": self._over_limit,
+                "backpressure_waits": self._backpressure_waits,
+                "last_flush_ms": round(self._last_flush_ms, 2),
+                "max_flush_ms": round(self._max_flush_ms, 2),
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 2) if self._flushes else 0.0,
+            }
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_FLUSH_BATCH_SIZE,
+    flush_interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+    max_queue=settings.AUDIT_MAX_QUEUE,
+)
@@ -0,0 +1,174 @@
+"""
+Commission Service — PoP agent commission ledger, payouts and balances.
+
+Issuing a PRAN for a session attributed to an agent appends one ledger row and
+bumps the agent's running balance in the same transaction, so a rolled-back
+issuance earns nothing. A payout batch settles every unsettled row up to a
+cutoff with a single UPDATE and moves the settled amounts into the balances.
+Dashboards read the balance row (one primary-key lookup) and never rescan
+sessions or the ledger.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import dialect_insert
+from app.models.commission import CommissionBalance, CommissionEntry, CommissionPayout
+from app.models.session import UserSession
+
+settings = get_settings()
+
+
+def _credit(db, agent_id: str, amount: int, entries: int = 1):
+    """Upsert adding earned commission to an agent's balance."""
+    stmt = dialect_insert(db, CommissionBalance).values(agent_id=agent_id, entry_count=entries, earned=amount, paid=0)
+    return stmt.on_conflict_do_update(
+        index_elements=[CommissionBalance.agent_id],
+        set_={
+            "entry_count": CommissionBalance.entry_count + stmt.excluded.entry_count,
+            "earned": CommissionBalance.earned + stmt.excluded.earned,
+            "updated_at": datetime.utcnow(),
+        },
+    )
+
+
+class CommissionService:
+    """Ledger writes, settlement and balance reads."""
+
+    @staticmethod
+    async def record(db: AsyncSession, session: UserSession, pran: str) -> Optional[CommissionEntry]:
+        """Earn the commission for a PRAN issued to an agent-attributed session.
+        Joins the caller's transaction; a session earns at most once."""
+        if not session.pop_agent_id:
+            return None
+        if await db.scalar(select(CommissionEntry.id).where(CommissionEntry.session_id == session.id)):
+            return None
+
+        entry = CommissionEntry(
+            agent_id=session.pop_agent_id,
+            session_id=session.id,
+            pran=pran,
+            amount=settings.POP_COMMISSION_PAISA,
+            created_at=datetime.utcnow(),
+        )
+        db.add(entry)
+        await db.execute(_credit(db, entry.agent_id, entry.amount))
+        return entry
+
+    @staticmethod
+    async def balance(db: AsyncSession, agent_id: str) -> dict:
+        """An agent's commission summary in rupees."""
+        balance = await db.get(CommissionBalance, agent_id)
+        earned = balance.earned if balance else 0
+        paid = balance.paid if balance else 0
+        return {
+            "rate_per_enrollment": settings.POP_COMMISSION_PAISA / 100,
+            "total_earned": earned / 100,
+            "pending_payout": (earned - paid) / 100,
+            "last_payout_date": (
+                balance.last_payout_at.strftime("%d %b %Y") if balance and balance.last_payout_at else "—"
+            ),
+        }
+
+    @staticmethod
+    def create_payout(
+        db: Session,
+        agent_id: Optional[str] = None,
+        cutoff: Optional[datetime] = None,
+        reference: Optional[str] = None,
+    ) -> Optional[CommissionPayout]:
+        """Settle all unsettled entries created at or before `cutoff` (default
+        now), for one agent or all of them. Returns None if nothing was due."""
+        now = datetime.utcnow()
+        cutoff = cutoff or now
+        payout = CommissionPayout(agent_id=agent_id, cutoff=cutoff, reference=reference, created_at=now)
+        try:
+            db.add(payout)
+            db.flush()
+
+            ledger = CommissionEntry.__table__
+            settle = (
+                update(ledger)
+                .where(ledger.c.payout_id.is_(None), ledger.c.created_at <= cutoff)
+                .values(payout_id=payout.id)
+            )
+            if agent_id:
+                settle = settle.where(ledger.c.agent_id == agent_id)
+            if db.execute(settle).rowcount == 0:
+                db.rollback()
+                return None
+
+            totals = (
+                db.query(CommissionEntry.agent_id, func.count(CommissionEntry.id), func.sum(CommissionEntry.amount))
+                .filter(CommissionEntry.payout_id == payout.id)
+                .group_by(CommissionEntry.agent_id)
+                .all()
+            )
+            balances = CommissionBalance.__table__
+            for agent, count, amount in totals:
+                db.execute(
+                    update(balances)
+                    .where(balances.c.agent_id == agent)
+                    .values(paid=balances.c.paid + amount, last_payout_at=now, updated_at=now)
+                )
+            payout.entry_count = sum(count for _, count, _ in totals)
+            payout.total_amount = sum(amount for _, _, amount in totals)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        print(f"[COMMISSION] Payout #{payout.id}: {payout.entry_count} entries, ₹{payout.total_amount / 100:,.2f}")
+        return payout
+
+    @staticmethod
+    def rebuild_balances(db: Session) -> int:
+        """Recompute every balance from the ledger. Returns the number of agents."""
+        balances = CommissionBalance.__table__
+        try:
+            db.query(CommissionBalance).delete()
+            rows = (
+                db.query(
+                    CommissionEntry.agent_id,
+                    func.count(CommissionEntry.id),
+                    func.sum(CommissionEntry.amount),
+                    func.sum(case((CommissionEntry.payout_id.isnot(None), CommissionEntry.amount), else_=0)),
+                    func.max(CommissionPayout.created_at),
+                )
+                .outerjoin(CommissionPayout, CommissionPayout.id == CommissionEntry.payout_id)
+                .group_by(CommissionEntry.agent_id)
+                .all()
+            )
+            if rows:
+                db.execute(insert(balances), [
+                    {"agent_id": a, "entry_count": n, "earned": earned, "paid": paid, "last_payout_at": last}
+                    for a, n, earned, paid, last in rows
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    @staticmethod
+    def ensure_initialized(db: Session):
+        """Backfill the ledger from already issued, agent-attributed sessions
+        when it is empty (first start after upgrade)."""
+        if db.query(CommissionEntry.id).first() is not None:
+            return
+        issued = (
+            select(
+                UserSession.pop_agent_id, UserSession.id, UserSession.pran,
+                literal(settings.POP_COMMISSION_PAISA),
+                func.coalesce(UserSession.completed_at, UserSession.created_at),
+            )
+            .where(UserSession.pop_agent_id.isnot(None), UserSession.pran.isnot(None))
+        )
+        db.execute(insert(CommissionEntry.__table__).from_select(
+            ["agent_id", "session_id", "pran", "amount", "created_at"], issued,
+        ))
+        db.commit()
+        CommissionService.rebuild_balances(db)
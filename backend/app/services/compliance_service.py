@@ -42,6 +42,5 @@ class ComplianceService:
         )
         
         db.add(artifact)
-        db.commit()
-        db.refresh(artifact)
+        db.flush()  # Assigns the ID; the caller's unit of work commits
         return artifact
@@ -0,0 +1,290 @@
+"""
+Dashboard Rollups — Session counters kept in step with every session write.
+
+Any flush that inserts, deletes or changes the status / kyc_method /
+risk_level of a UserSession adjusts `dashboard_rollups` in the same
+transaction, and completing a session adds its duration to a fixed-bucket
+`completion_histogram` (count + summed seconds per bucket). The admin
+dashboard therefore reads a handful of rows instead of aggregating the
+sessions table, and derives the average and percentiles from the histogram.
+A periodic reconciliation job rebuilds the counters and the histogram from
+scratch, which also corrects writes that bypass the ORM unit of work (bulk
+UPDATE statements, manual SQL).
+"""
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import case, delete, event, func, insert, inspect, update
+from sqlalchemy.orm import Session
+
+from app.models.dashboard import CompletionHistogramBucket, DashboardRollup
+from app.models.session import UserSession
+from app.services.event_bus import DELTAS_KEY, VERSION_KEY
+
+ROLLUP_DIMENSIONS = ("status", "kyc_method", "risk_level")
+# Single counter bumped by every transaction that changes the others; stream
+# viewers use it to tell which updates a snapshot already contains
+VERSION_DIMENSION = "version"
+
+# Upper bounds (seconds) of the completion-time buckets; the last one catches everything
+COMPLETION_BUCKETS = (
+    30, 60, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 2700, 3600,
+    7200, 14400, 28800, 86400, 259200, 604800, 2**31 - 1,
+)
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_for(seconds: float) -> int:
+    for bound in COMPLETION_BUCKETS:
+        if seconds <= bound:
+            return bound
+    return COMPLETION_BUCKETS[-1]
+
+
+def _completion_seconds(session: UserSession) -> Optional[float]:
+    if session.status != "completed" or not session.completed_at or not session.created_at:
+        return None
+    return max(round((session.completed_at - session.created_at).total_seconds(), 3), 0.0)
+
+
+def _value(value) -> str:
+    return "" if value is None else str(value)
+
+
+class DashboardRollupService:
+    """Maintains and reads the dashboard rollup counters."""
+
+    @staticmethod
+    def flush_deltas(session: Session) -> Counter:
+        """Counter changes implied by the UserSession rows in a flush."""
+        deltas: Counter = Counter()
+        for obj in session.new:
+            if isinstance(obj, UserSession):
+                deltas[("total", "")] += 1
+                for dim in ROLLUP_DIMENSIONS:
+                    deltas[(dim, _value(getattr(obj, dim)))] += 1
+        for obj in session.deleted:
+            if isinstance(obj, UserSession):
+                deltas[("total", "")] -= 1
+                for dim in ROLLUP_DIMENSIONS:
+                    history = inspect(obj).attrs[dim].history
+                    old = history.deleted[0] if history.deleted else getattr(obj, dim)
+                    deltas[(dim, _value(old))] -= 1
+        for obj in session.dirty:
+            if isinstance(obj, UserSession) and obj not in session.deleted:
+                for dim in ROLLUP_DIMENSIONS:
+                    history = inspect(obj).attrs[dim].history
+                    # An attribute set without its old value loaded has no
+                    # deleted history; reconciliation corrects that case.
+                    if history.added and history.deleted and history.added[0] != history.deleted[0]:
+                        deltas[(dim, _value(history.deleted[0]))] -= 1
+                        deltas[(dim, _value(history.added[0]))] += 1
+        return deltas
+
+    @staticmethod
+    def completion_deltas(session: Session) -> dict:
+        """{bucket: [count, seconds]} for sessions that completed in a flush."""
+        deltas: dict = {}
+        for obj in (*session.new, *session.dirty):
+            if not isinstance(obj, UserSession):
+                continue
+            history = inspect(obj).attrs.completed_at.history
+            if obj in session.dirty and not (history.added and not any(history.deleted)):
+                continue   # Only the first time completed_at is set
+            seconds = _completion_seconds(obj)
+            if seconds is None:
+                continue
+            entry = deltas.setdefault(bucket_for(seconds), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+        return deltas
+
+    @staticmethod
+    def apply_completions(connection, deltas: dict):
+        table = CompletionHistogramBucket.__table__
+        for bound, (count, seconds) in sorted(deltas.items()):
+            result = connection.execute(
+                update(table)
+                .where(table.c.upper_bound_seconds == bound)
+                .values(count=table.c.count + count, seconds_sum=table.c.seconds_sum + seconds)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(upper_bound_seconds=bound, count=count, seconds_sum=seconds))
+
+    @staticmethod
+    def bump_version(connection) -> int:
+        """Increment the rollup version in the caller's transaction and return it."""
+        table = DashboardRollup.__table__
+        version = connection.execute(
+            update(table)
+            .where(table.c.dimension == VERSION_DIMENSION, table.c.value == "")
+            .values(count=table.c.count + 1)
+            .returning(table.c.count)
+        ).scalar()
+        if version is None:
+            version = 1
+            connection.execute(insert(table).values(dimension=VERSION_DIMENSION, value="", count=version))
+        return version
+
+    @staticmethod
+    def apply(connection, deltas: Counter):
+        """Add deltas to the counters using the caller's connection/transaction."""
+        table = DashboardRollup.__table__
+        for (dimension, value), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            result = connection.execute(
+                update(table)
+                .where(table.c.dimension == dimension, table.c.value == value)
+                .values(count=table.c.count + delta)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(dimension=dimension, value=value, count=delta))
+
+    @staticmethod
+    def read(db: Session) -> dict:
+        """{dimension: {value: count}} for all non-zero counters."""
+        rollups: dict = {}
+        for dimension, value, count in db.query(
+            DashboardRollup.dimension, DashboardRollup.value, DashboardRollup.count
+        ):
+            if count:
+                rollups.setdefault(dimension, {})[value] = count
+        return rollups
+
+    @staticmethod
+    def completion_stats(db: Session) -> dict:
+        """Average and estimated percentiles of completion time, from the histogram.
+        Percentiles interpolate linearly inside the bucket they fall in."""
+        buckets = (
+            db.query(
+                CompletionHistogramBucket.upper_bound_seconds,
+                CompletionHistogramBucket.count,
+                CompletionHistogramBucket.seconds_sum,
+            )
+            .filter(CompletionHistogramBucket.count > 0)
+            .order_by(CompletionHistogramBucket.upper_bound_seconds)
+            .all()
+        )
+        total = sum(count for _, count, _ in buckets)
+        if not total:
+            return {"count": 0, "avg_seconds": 0.0, "percentiles": {f"p{p}": 0.0 for p in PERCENTILES}}
+
+        percentiles = {}
+        for p in PERCENTILES:
+            target = total * p / 100
+            seen = 0
+            for bound, count, seconds_sum in buckets:
+                if seen + count >= target:
+                    index = COMPLETION_BUCKETS.index(bound) if bound in COMPLETION_BUCKETS else 0
+                    lower = COMPLETION_BUCKETS[index - 1] if index > 0 else 0
+                    if bound == COMPLETION_BUCKETS[-1]:
+                        bound = max(lower, seconds_sum / count)   # Open-ended: use the bucket mean
+                    percentiles[f"p{p}"] = round(lower + (bound - lower) * (target - seen) / count, 1)
+                    break
+                seen += count
+
+        return {
+            "count": total,
+            "avg_seconds": sum(s for _, _, s in buckets) / total,
+            "percentiles": percentiles,
+        }
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute every counter and the completion histogram from the sessions table.
+
+        The DELETE runs first so the transaction holds SQLite's write lock while
+        aggregating: no session write can commit between the count and the swap.
+
+        Returns:
+            Number of counters whose value was corrected.
+        """
+        table = DashboardRollup.__table__
+        histogram = CompletionHistogramBucket.__table__
+        counters = table.c.dimension != VERSION_DIMENSION
+        before = {
+            (d, v): c for d, v, c in db.query(table.c.dimension, table.c.value, table.c.count).filter(counters)
+        }
+        try:
+            db.execute(delete(table).where(counters))
+            db.execute(delete(histogram))
+            counts = {("total", ""): db.query(func.count(UserSession.id)).scalar() or 0}
+            for dim in ROLLUP_DIMENSIONS:
+                column = getattr(UserSession, dim)
+                for value, count in db.query(column, func.count(UserSession.id)).group_by(column):
+                    counts[(dim, _value(value))] = count
+            db.execute(insert(table), [
+                {"dimension": d, "value": v, "count": c} for (d, v), c in counts.items()
+            ])
+
+            # Durations and bucketing are computed by SQLite, not by loading sessions
+            # Rounded to the millisecond: julianday() arithmetic is not exact,
+            # and a duration on a bucket bound must land where the hook put it
+            seconds = func.round(
+                (func.julianday(UserSession.completed_at) - func.julianday(UserSession.created_at)) * 86400, 3
+            )
+            bucket = case(
+                *[(seconds <= bound, bound) for bound in COMPLETION_BUCKETS[:-1]],
+                else_=COMPLETION_BUCKETS[-1],
+            )
+            rows = (
+                db.query(bucket, func.count(UserSession.id), func.sum(func.max(seconds, 0)))
+                .filter(
+                    UserSession.status == "completed",
+                    UserSession.completed_at.isnot(None),
+                    UserSession.created_at.isnot(None),
+                )
+                .group_by(bucket)
+                .all()
+            )
+            if rows:
+                db.execute(insert(histogram), [
+                    {"upper_bound_seconds": b, "count": c, "seconds_sum": s or 0.0} for b, c, s in rows
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return sum(
+            1 for key in set(before) | set(counts)
+            if before.get(key, 0) != counts.get(key, 0)
+        )
+
+    @staticmethod
+    def ensure_initialized(db: Session):
+        """Build the counters once when the table is empty (first start after upgrade)."""
+        if db.query(DashboardRollup.id).first() is None:
+            DashboardRollupService.rebuild(db)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_rollups(session: Session, flush_context):
+    deltas = DashboardRollupService.flush_deltas(session)
+    if any(deltas.values()):
+        DashboardRollupService.apply(session.connection(), deltas)
+        # Published to dashboard stream viewers if the transaction commits
+        session.info.setdefault(DELTAS_KEY, Counter()).update(deltas)
+        session.info[VERSION_KEY] = DashboardRollupService.bump_version(session.connection())
+    completions = DashboardRollupService.completion_deltas(session)
+    if completions:
+        DashboardRollupService.apply_completions(session.connection(), completions)
+
+
+def reconcile_dashboard_job():
+    """Scheduler entry point: rebuild rollups and report drift, then rebuild
+    the PoP leaderboard stats and commission balances."""
+    from app.database import SessionLocal
+    from app.services.commission_service import CommissionService
+    from app.services.pop_stats_service import PopStatsService
+
+    db = SessionLocal()
+    try:
+        corrected = DashboardRollupService.rebuild(db)
+        if corrected:
+            print(f"[DASHBOARD] Reconciled rollups: {corrected} counters corrected")
+        PopStatsService.rebuild(db)
+        CommissionService.rebuild_balances(db)
+    finally:
+        db.close()
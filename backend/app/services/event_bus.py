@@ -0,0 +1,145 @@
+"""
+Dashboard Event Bus — In-process fan-out of committed session state changes.
+
+Routes call `publish_on_commit(db, event, session_id)` next to the change they
+make. Nothing is delivered until that transaction commits (see the hooks at
+the bottom); a rolled-back request publishes nothing. Each delivered message
+carries the dashboard counter deltas of the transaction, taken from the
+rollup hook, so viewers update their counters without re-reading anything,
+and the rollup version that transaction committed (see dashboard_service).
+
+Delivery is one non-blocking queue put per subscriber. A subscriber that
+falls behind is flagged and resynchronised with a fresh snapshot instead of
+slowing down publishers. Other worker processes are not notified.
+"""
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Session.info keys: events published in the current transaction, and the
+# dashboard counter deltas its flushes applied and the rollup version they
+# produced (both written by dashboard_service)
+_EVENTS_KEY = "dashboard_events"
+DELTAS_KEY = "dashboard_deltas"
+VERSION_KEY = "dashboard_version"
+
+
+class Subscription:
+    """One connected viewer: a bounded queue bound to the viewer's event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def _put(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, message: dict):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(message)
+        elif not self.loop.is_closed():
+            # Commits from sync sessions run in worker threads
+            self.loop.call_soon_threadsafe(self._put, message)
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class EventBus:
+    """Publish/subscribe hub for dashboard updates."""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, message: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._published += 1
+            self._dropped += sum(1 for sub in subscribers if sub.overflowed)
+        for sub in subscribers:
+            if not sub.overflowed:
+                sub.deliver(message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self._published,
+                "dropped": self._dropped,
+                "max_queue": self.max_queue,
+            }
+
+
+dashboard_bus = EventBus(max_queue=settings.DASHBOARD_STREAM_QUEUE_SIZE)
+
+
+def publish_on_commit(db, event_type: str, session_id: Optional[str] = None):
+    """Queue a dashboard event to be published if the caller's transaction commits."""
+    db.info.setdefault(_EVENTS_KEY, []).append({"type": event_type, "session_id": session_id})
+
+
+def _nested(deltas: Counter) -> dict:
+    """{(dimension, value): n} -> {dimension: {value: n}}, as the dashboard reads it."""
+    nested: dict = {}
+    for (dimension, value), delta in deltas.items():
+        if delta:
+            nested.setdefault(dimension, {})[value] = delta
+    return nested
+
+
+# ─── Commit hooks ───────────────────────────────────────────────────
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session):
+    events = session.info.pop(_EVENTS_KEY, None)
+    deltas = session.info.pop(DELTAS_KEY, None)
+    version = session.info.pop(VERSION_KEY, None)
+    if not events and not any((deltas or {}).values()):
+        return
+    dashboard_bus.publish({
+        "events": events or [{"type": "update", "session_id": None}],
+        "deltas": _nested(deltas or Counter()),
+        "version": version,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back_events(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_EVENTS_KEY, None)
+        session.info.pop(DELTAS_KEY, None)
+        session.info.pop(VERSION_KEY, None)
@@ -0,0 +1,231 @@
+"""
+Funnel Metrics — Hourly and daily onboarding funnel counts.
+
+`AuditService.log` records every funnel action (see FUNNEL_STAGES) in the
+caller's transaction; just before that transaction commits, the matching
+`funnel_buckets` rows for the hour and the day are incremented, split by the
+session's kyc_method and PoP agent. A rolled-back request therefore never
+counts. Counts are events, not distinct sessions: a session that repeats KYC
+counts twice in kyc_done.
+
+Range queries read at most one row per bucket and split, so a year of daily
+data is a few thousand rows regardless of how many sessions it covers.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, func, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.audit import AuditLog
+from app.models.dashboard import FunnelBucket
+from app.models.session import UserSession
+from app.services.audit_archive import AuditArchiveService, read_part
+
+# Audit action -> funnel stage
+FUNNEL_STAGES = {
+    "SESSION_START": "started",
+    "KYC_SCAN": "kyc_done",
+    "DIGILOCKER_FETCH": "kyc_done",
+    "ESIGN_COMPLETED": "esign_done",
+    "PAYMENT_COMPLETED": "payment_done",
+    "PRAN_ISSUED": "pran_issued",
+}
+STAGE_ORDER = ("started", "kyc_done", "esign_done", "payment_done", "pran_issued")
+GRANULARITIES = ("hour", "day")
+GROUP_COLUMNS = {"kyc_method": FunnelBucket.kyc_method, "pop_agent": FunnelBucket.pop_agent_id}
+
+# Session.info key: (stage, session_id, timestamp) for funnel actions logged
+# in the current transaction
+_EVENTS_KEY = "funnel_events"
+
+
+def truncate(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _bucket_column(dialect: str, granularity: str):
+    """SQL expression grouping audit timestamps by bucket. Databases without a
+    known truncation function group by the raw timestamp; the caller
+    truncates in Python either way."""
+    if dialect == "sqlite":
+        fmt = "%Y-%m-%d %H:00:00" if granularity == "hour" else "%Y-%m-%d 00:00:00"
+        return func.strftime(fmt, AuditLog.timestamp)
+    if dialect == "postgresql":
+        return func.date_trunc(granularity, AuditLog.timestamp)
+    return AuditLog.timestamp
+
+
+def _find_session(session: Session, session_id: str) -> Optional[UserSession]:
+    # A session created in this transaction is still pending (not in the identity map)
+    for obj in session.new:
+        if isinstance(obj, UserSession) and obj.id == session_id:
+            return obj
+    return session.get(UserSession, session_id)
+
+
+class FunnelService:
+    """Maintains and queries the bucketed funnel counters."""
+
+    @staticmethod
+    def record(db, session_id: str, action: str, timestamp: datetime):
+        """Note a logged audit action; no-op for actions outside the funnel."""
+        stage = FUNNEL_STAGES.get(action)
+        if stage:
+            db.info.setdefault(_EVENTS_KEY, []).append((stage, session_id, timestamp))
+
+    @staticmethod
+    def apply(connection, deltas: Counter):
+        """Add {(granularity, bucket_start, stage, kyc_method, pop_agent_id): n}
+        to the buckets using the caller's connection/transaction."""
+        table = FunnelBucket.__table__
+        for (granularity, bucket_start, stage, kyc_method, agent), delta in sorted(deltas.items()):
+            key = (
+                table.c.granularity == granularity,
+                table.c.bucket_start == bucket_start,
+                table.c.stage == stage,
+                table.c.kyc_method == kyc_method,
+                table.c.pop_agent_id == agent,
+            )
+            result = connection.execute(update(table).where(*key).values(count=table.c.count + delta))
+            if result.rowcount == 0:
+                connection.execute(insert(table).values(
+                    granularity=granularity, bucket_start=bucket_start, stage=stage,
+                    kyc_method=kyc_method, pop_agent_id=agent, count=delta,
+                ))
+
+    @staticmethod
+    def query(
+        db: Session,
+        start: datetime,
+        end: datetime,
+        granularity: str = "day",
+        group_by: Optional[str] = None,
+    ) -> list[dict]:
+        """Per-bucket stage counts in [start, end), optionally split by
+        "kyc_method" or "pop_agent"."""
+        group_column = GROUP_COLUMNS.get(group_by)
+        columns = [FunnelBucket.bucket_start, FunnelBucket.stage]
+        if group_column is not None:
+            columns.append(group_column)
+
+        rows = (
+            db.query(*columns, func.sum(FunnelBucket.count))
+            .filter(
+                FunnelBucket.granularity == granularity,
+                FunnelBucket.bucket_start >= truncate(start, granularity),
+                FunnelBucket.bucket_start < end,
+            )
+            .group_by(*columns)
+            .order_by(FunnelBucket.bucket_start)
+            .all()
+        )
+
+        buckets: dict = {}
+        for row in rows:
+            bucket_start, stage = row[0], row[1]
+            group = (row[2] or None) if group_column is not None else None
+            entry = buckets.get((bucket_start, group))
+            if entry is None:
+                entry = buckets[(bucket_start, group)] = {"bucket_start": bucket_start.isoformat()}
+                if group_column is not None:
+                    entry[group_by] = group
+                entry.update({s: 0 for s in STAGE_ORDER})
+            entry[stage] += row[-1]
+        return list(buckets.values())
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute all buckets from the live audit log and the archive.
+        Events are split by each session's current kyc_method and agent, where
+        incremental updates use the values at the time of the event.
+
+        Returns:
+            Number of funnel events counted.
+        """
+        deltas: Counter = Counter()
+        try:
+            db.query(FunnelBucket).delete()
+            for granularity in GRANULARITIES:
+                bucket = _bucket_column(db.get_bind().dialect.name, granularity)
+                rows = (
+                    db.query(
+                        bucket, AuditLog.action,
+                        func.coalesce(UserSession.kyc_method, ""),
+                        func.coalesce(UserSession.pop_agent_id, ""),
+                        func.count(AuditLog.id),
+                    )
+                    .join(UserSession, UserSession.id == AuditLog.session_id)
+                    .filter(AuditLog.action.in_(FUNNEL_STAGES))
+                    .group_by(bucket, AuditLog.action, UserSession.kyc_method, UserSession.pop_agent_id)
+                )
+                for bucket_start, action, kyc_method, agent, count in rows:
+                    if bucket_start is None:
+                        continue
+                    if isinstance(bucket_start, str):
+                        bucket_start = datetime.fromisoformat(bucket_start)
+                    key = (granularity, truncate(bucket_start, granularity), FUNNEL_STAGES[action], kyc_method, agent)
+                    deltas[key] += count
+            FunnelService._count_archived(db, deltas)
+            FunnelService.apply(db.connection(), deltas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return sum(count for key, count in deltas.items() if key[0] == "day")
+
+    @staticmethod
+    def _count_archived(db: Session, deltas: Counter):
+        """Add funnel events from archived trails, one gzip member at a time."""
+        parts = AuditArchiveService.parts_in_id_order(db)
+        session_ids = list({part.session_id for part in parts})
+        groups = {}
+        for i in range(0, len(session_ids), 500):
+            chunk = session_ids[i:i + 500]
+            for session_id, kyc_method, agent in (
+                db.query(UserSession.id, UserSession.kyc_method, UserSession.pop_agent_id)
+                .filter(UserSession.id.in_(chunk))
+            ):
+                groups[session_id] = (kyc_method or "", agent or "")
+
+        for part in parts:
+            if part.session_id not in groups:
+                continue   # Same as the inner join on the live log
+            kyc_method, agent = groups[part.session_id]
+            for row in read_part(part):
+                stage = FUNNEL_STAGES.get(row["action"])
+                if stage is None or not row["timestamp"]:
+                    continue
+                timestamp = datetime.fromisoformat(row["timestamp"])
+                for granularity in GRANULARITIES:
+                    deltas[(granularity, truncate(timestamp, granularity), stage, kyc_method, agent)] += 1
+
+    @staticmethod
+    def ensure_initialized(db: Session):
+        """Backfill from the audit log once when the table is empty (first start after upgrade)."""
+        if db.query(FunnelBucket.id).first() is None:
+            FunnelService.rebuild(db)
+
+
+@event.listens_for(Session, "before_commit")
+def _update_funnel(session: Session):
+    events = session.info.pop(_EVENTS_KEY, None)
+    if not events:
+        return
+    deltas: Counter = Counter()
+    for stage, session_id, timestamp in events:
+        user_session = _find_session(session, session_id)
+        kyc_method = (user_session.kyc_method if user_session else None) or ""
+        agent = (user_session.pop_agent_id if user_session else None) or ""
+        for granularity in GRANULARITIES:
+            deltas[(granularity, truncate(timestamp, granularity), stage, kyc_method, agent)] += 1
+    FunnelService.apply(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back_events(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_EVENTS_KEY, None)
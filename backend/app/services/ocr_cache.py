@@ -0,0 +1,168 @@
+"""
+OCR Result Cache — Content-addressed cache of Gemini extractions.
+
+Users often re-upload the same document image after a retry or a
+back-navigation. Extractions are keyed by SHA-256 over the image bytes, its
+MIME type, the prompt and the model name, so a byte-identical upload is
+answered without calling Gemini, while a prompt or model change misses.
+Only the parsed model output is cached; confidence scoring and risk rules
+still run on every scan, so changing them needs no cache flush.
+
+Two tiers: a bounded in-memory LRU (per process), then JSON files under
+DATA_DIR/ocr_cache shared by all workers. Disk entries expire after
+OCR_CACHE_DISK_TTL_HOURS; expired files are removed when read and by the
+"ocr-cache-prune" job. The files hold extracted identity fields, so they
+live next to the database and are kept no longer than the TTL. Async callers
+use `aget`/`aput`, which do the disk I/O in the threadpool.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+CACHE_DIR = os.path.join(settings.DATA_DIR, "ocr_cache")
+
+
+def cache_key(contents: bytes, content_type: str, prompt: str, model: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(contents).digest())
+    for part in (content_type or "", prompt, model):
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """Memory LRU in front of a TTL'd directory of JSON files."""
+
+    def __init__(self, directory: str, max_entries: int, memory_ttl: float, disk_ttl: float):
+        self.directory = directory
+        self.disk_ttl = disk_ttl
+        self._memory = TTLCache(max_entries, memory_ttl)
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """A copy of the cached extraction, or None."""
+        result = self._memory.get(key)
+        tier = "memory"
+        if result is None and self.disk_ttl > 0:
+            result = self._read(key)
+            tier = "disk"
+            if result is not None:
+                self._memory.put(key, result)
+
+        with self._lock:
+            if result is None:
+                self._misses += 1
+            elif tier == "memory":
+                self._memory_hits += 1
+            else:
+                self._disk_hits += 1
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key: str, result: dict):
+        result = copy.deepcopy(result)
+        self._memory.put(key, result)
+        if self.disk_ttl > 0:
+            self._write(key, result)
+        with self._lock:
+            self._stores += 1
+
+    async def aget(self, key: str) -> Optional[dict]:
+        """`get` for the event loop: disk lookups run in the threadpool."""
+        if self.disk_ttl <= 0:
+            return self.get(key)
+        return await run_in_threadpool(self.get, key)
+
+    async def aput(self, key: str, result: dict):
+        """`put` for the event loop: the disk write runs in the threadpool."""
+        if self.disk_ttl <= 0:
+            self.put(key, result)
+        else:
+            await run_in_threadpool(self.put, key, result)
+
+    def _read(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, result: dict):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp, path)   # Atomic: readers never see a partial file
+        except OSError as e:
+            print(f"[OCR_CACHE] Could not write {path}: {e}")
+
+    def prune(self) -> int:
+        """Delete expired disk entries. Returns the number removed."""
+        removed = 0
+        cutoff = time.time() - self.disk_ttl
+        if not os.path.isdir(self.directory):
+            return 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+        if removed:
+            print(f"[OCR_CACHE] Pruned {removed} expired entries")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            hits = self._memory_hits + self._disk_hits
+            return {
+                "lookups": lookups,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "stores": self._stores,
+                "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0,
+                "memory": self._memory.stats(),
+                "disk_ttl_hours": self.disk_ttl / 3600,
+            }
+
+
+ocr_cache = OCRResultCache(
+    CACHE_DIR,
+    max_entries=settings.OCR_CACHE_SIZE,
+    memory_ttl=settings.OCR_CACHE_MEMORY_TTL_SECONDS,
+    disk_ttl=settings.OCR_CACHE_DISK_TTL_HOURS * 3600,
+)
+
+
+def prune_ocr_cache_job():
+    """Scheduler entry point: delete expired disk entries."""
+    ocr_cache.prune()
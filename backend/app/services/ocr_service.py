@@ -1,15 +1,25 @@
 """
 OCR Service — Google Gemini 1.5 Flash AI Document Extraction.
 Handles document scanning, field extraction, and confidence scoring.
+Extractions are cached by image content (see ocr_cache).
+
+The Gemini SDK call is synchronous. It runs on a dedicated pool of
+OCR_MAX_CONCURRENCY threads so a scan never blocks the event loop; a
+semaphore admits that many calls at a time, and the SDK and the caller both
+give up after OCR_TIMEOUT_SECONDS. A slot is only freed when its thread is,
+so calls that timed out still count against the limit until Gemini returns.
 """
+import asyncio
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 
 import google.generativeai as genai
 
 from app.config import get_settings
+from app.services.ocr_cache import cache_key, ocr_cache
 from app.utils.validators import validate_pan
 
 settings = get_settings()
@@ -35,6 +45,18 @@ def get_ocr_model():
     return _model
 
 
+_executor = ThreadPoolExecutor(max_workers=settings.OCR_MAX_CONCURRENCY, thread_name_prefix="ocr")
+_slots = asyncio.Semaphore(settings.OCR_MAX_CONCURRENCY)
+
+
+class OCRBusyError(Exception):
+    """Every OCR slot stayed taken for OCR_QUEUE_TIMEOUT_SECONDS."""
+
+
+class OCRTimeoutError(Exception):
+    """Gemini did not answer within OCR_TIMEOUT_SECONDS."""
+
+
 # Deterministic extraction prompt
 OCR_PROMPT = """You are a deterministic OCR extractor for Indian KYC documents (PAN Card, Aadhaar Card, Driving License, Passport).
 
@@ -73,7 +95,46 @@ class OCRService:
 
         Raises:
             ValueError: If AI fails or returns invalid data.
+            OCRBusyError: If no OCR slot freed up in time.
+            OCRTimeoutError: If Gemini did not answer in time.
         """
+        # Identical image, prompt and model: reuse the earlier extraction
+        key = cache_key(file_contents, content_type, OCR_PROMPT, settings.GEMINI_MODEL)
+        extracted = await ocr_cache.aget(key)
+        if extracted is None:
+            extracted = await OCRService._extract(file_contents, content_type)
+            await ocr_cache.aput(key, extracted)
+
+        # Post-processing: normalize keys
+        if "id_number" in extracted and "pan" not in extracted:
+            extracted["pan"] = extracted["id_number"]
+
+        # Confidence scoring
+        confidence = extracted.get("confidence", 100)
+        pan_valid = validate_pan(extracted.get("pan"))
+
+        if not pan_valid and extracted.get("document_type", "").upper() == "PAN":
+            confidence = min(confidence, 40)
+
+        extracted["pan_valid"] = pan_valid
+        extracted["ai_confidence"] = confidence
+
+        # Risk evaluation based on OCR result
+        risk_level = "Standard"
+        reasons = []
+        if confidence < settings.OCR_CONFIDENCE_THRESHOLD:
+            risk_level = "Enhanced"
+            reasons.append("Low Confidence AI Extraction")
+
+        extracted["risk_level"] = risk_level
+        extracted["reasons"] = reasons
+        extracted["source"] = "Gemini 1.5 Flash (Production AI)"
+
+        return extracted
+
+    @staticmethod
+    async def _extract(file_contents: bytes, content_type: str) -> dict:
+        """Ask Gemini for the document's fields and parse its JSON reply."""
         model = get_ocr_model()
         if not model:
             raise ValueError(
@@ -84,9 +145,12 @@ class OCRService:
         # Prepare multimodal input
         image_part = {"mime_type": content_type, "data": file_contents}
 
-        # Query Gemini
+        # Query Gemini off the event loop
         try:
-            response = model.generate_content(contents=[OCR_PROMPT, image_part])
+            response = await _generate(model, [OCR_PROMPT, image_part])
+        except (OCRBusyError, OCRTimeoutError) as e:
+            _log(f"Gemini API call not made or abandoned: {e}")
+            raise
         except Exception as e:
             _log(f"Gemini API call failed: {e}")
             raise ValueError(f"AI processing failed: {str(e)}")
@@ -116,33 +180,40 @@ class OCRService:
         except json.JSONDecodeError:
             _log(f"JSON parse failed: {cleaned}")
             raise ValueError("AI returned invalid format. Please try a clearer photo.")
+        if not isinstance(extracted, dict):
+            raise ValueError("AI returned invalid format. Please try a clearer photo.")
+        return extracted
 
-        # Post-processing: normalize keys
-        if "id_number" in extracted and "pan" not in extracted:
-            extracted["pan"] = extracted["id_number"]
-
-        # Confidence scoring
-        confidence = extracted.get("confidence", 100)
-        pan_valid = validate_pan(extracted.get("pan"))
-
-        if not pan_valid and extracted.get("document_type", "").upper() == "PAN":
-            confidence = min(confidence, 40)
 
-        extracted["pan_valid"] = pan_valid
-        extracted["ai_confidence"] = confidence
+async def _generate(model, contents: list):
+    """model.generate_content on the OCR pool, bounded by the slot semaphore."""
+    try:
+        await asyncio.wait_for(_slots.acquire(), settings.OCR_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise OCRBusyError(f"all {settings.OCR_MAX_CONCURRENCY} OCR slots busy")
 
-        # Risk evaluation based on OCR result
-        risk_level = "Standard"
-        reasons = []
-        if confidence < settings.OCR_CONFIDENCE_THRESHOLD:
-            risk_level = "Enhanced"
-            reasons.append("Low Confidence AI Extraction")
+    loop = asyncio.get_running_loop()
+    try:
+        call = loop.run_in_executor(
+            _executor,
+            lambda: model.generate_content(
+                contents=contents, request_options={"timeout": settings.OCR_TIMEOUT_SECONDS},
+            ),
+        )
+    except BaseException:
+        _slots.release()
+        raise
 
-        extracted["risk_level"] = risk_level
-        extracted["reasons"] = reasons
-        extracted["source"] = "Gemini 1.5 Flash (Production AI)"
+    def _finished(future: asyncio.Future):
+        _slots.release()
+        if not future.cancelled():
+            future.exception()   # Retrieved, so an abandoned call's error is not reported as unhandled
 
-        return extracted
+    call.add_done_callback(_finished)
+    try:
+        return await asyncio.wait_for(asyncio.shield(call), settings.OCR_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise OCRTimeoutError(f"no response within {settings.OCR_TIMEOUT_SECONDS:g}s")
 
 
 def _log(message: str):
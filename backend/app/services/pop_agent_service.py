@@ -0,0 +1,212 @@
+"""
+PoP Agent Registry — Agent lookup, PIN verification and registry import.
+
+Agents live in the `pop_agents` table. Lookups go through a bounded TTL
+read-through cache (unknown agent IDs are cached too, so a mistyped ID does not
+hit the database on every attempt). PINs are stored as bcrypt hashes; bcrypt
+is deliberately slow, so verification runs in the threadpool and a successful
+agent/PIN pair is remembered for a short while so repeated logins skip it.
+Neither cache is shared across worker processes; the TTLs bound how long a
+registry change takes to show up there.
+"""
+import csv
+import hashlib
+import hmac
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional
+
+import bcrypt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.database import dialect_insert
+from app.models.pop import PopAgent
+from app.utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+PROFILE_FIELDS = (
+    "name", "organization", "branch", "pop_id", "registration_no", "role", "tier", "photo_initials",
+)
+
+# Demo registry used for local development (see POP_SEED_DEMO_AGENTS)
+DEMO_AGENTS = [
+    {"agent_id": "SBI-2024-001", "pin": "1234", "name": "Rajesh Kumar", "organization": "State Bank of India",
+     "branch": "Connaught Place, New Delhi", "pop_id": "POP-SBI-00142", "registration_no": "PFRDA/POP/2024/SBI/001",
+     "role": "Relationship Manager", "tier": "platinum", "photo_initials": "RK"},
+    {"agent_id": "HDFC-2024-005", "pin": "5678", "name": "Priya Sharma", "organization": "HDFC Bank",
+     "branch": "Bandra West, Mumbai", "pop_id": "POP-HDFC-00087", "registration_no": "PFRDA/POP/2024/HDFC/005",
+     "role": "Branch Manager", "tier": "gold", "photo_initials": "PS"},
+    {"agent_id": "CSC-2024-012", "pin": "9012", "name": "Amit Patel", "organization": "Common Service Centre",
+     "branch": "Gram Panchayat, Varanasi", "pop_id": "POP-CSC-00321", "registration_no": "PFRDA/POP/2024/CSC/012",
+     "role": "CSC Operator", "tier": "silver", "photo_initials": "AP"},
+    {"agent_id": "POST-2024-008", "pin": "3456", "name": "Sunita Devi", "organization": "India Post",
+     "branch": "Head Post Office, Jaipur", "pop_id": "POP-POST-00198", "registration_no": "PFRDA/POP/2024/POST/008",
+     "role": "Postal Agent", "tier": "silver", "photo_initials": "SD"},
+]
+
+
+def hash_pin(pin: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.POP_PIN_BCRYPT_ROUNDS)
+    return bcrypt.hashpw(pin.encode(), salt).decode()
+
+
+def _check_pin(pin: str, pin_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(pin.encode(), pin_hash.encode())
+    except ValueError:   # Malformed hash
+        return False
+
+
+_MISSING = object()
+
+# agent_id -> {"profile", "pin_hash", "active"}, or None for unknown IDs
+agent_cache = TTLCache(settings.POP_AGENT_CACHE_SIZE, settings.POP_AGENT_CACHE_TTL_SECONDS)
+# keyed HMAC of (agent_id, PIN, hash) -> True; never holds a PIN in the clear
+verified_pins = TTLCache(settings.POP_AGENT_CACHE_SIZE, settings.POP_PIN_CACHE_TTL_SECONDS)
+
+
+def _credential_key(agent_id: str, pin: str, pin_hash: str) -> str:
+    message = f"{agent_id}\0{pin}\0{pin_hash}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _entry(agent: PopAgent) -> dict:
+    profile = {"agent_id": agent.agent_id, **{f: getattr(agent, f) for f in PROFILE_FIELDS}}
+    return {"profile": profile, "pin_hash": agent.pin_hash, "active": bool(agent.active)}
+
+
+class PopAgentService:
+    """Registry access for PoP agents."""
+
+    @staticmethod
+    async def get(db: AsyncSession, agent_id: str) -> Optional[dict]:
+        """Public profile of an active agent, or None."""
+        entry = await PopAgentService._lookup(db, agent_id)
+        if entry is None or not entry["active"]:
+            return None
+        return dict(entry["profile"])
+
+    @staticmethod
+    async def _lookup(db: AsyncSession, agent_id: str) -> Optional[dict]:
+        agent_id = agent_id.upper()
+        entry = agent_cache.get(agent_id, _MISSING)
+        if entry is _MISSING:
+            agent = await db.scalar(select(PopAgent).where(PopAgent.agent_id == agent_id))
+            entry = _entry(agent) if agent else None
+            agent_cache.put(agent_id, entry)
+        return entry
+
+    @staticmethod
+    async def authenticate(db: AsyncSession, agent_id: str, pin: str) -> Optional[dict]:
+        """Profile of the agent if the PIN is correct, else None.
+
+        Raises:
+            LookupError: if the agent is not registered or not active.
+        """
+        entry = await PopAgentService._lookup(db, agent_id)
+        if entry is None or not entry["active"]:
+            raise LookupError(agent_id)
+
+        key = _credential_key(entry["profile"]["agent_id"], pin, entry["pin_hash"])
+        if not verified_pins.get(key):
+            if not await run_in_threadpool(_check_pin, pin, entry["pin_hash"]):
+                return None
+            verified_pins.put(key, True)
+        return dict(entry["profile"])
+
+    @staticmethod
+    def upsert(db: Session, rows: list[dict]) -> int:
+        """Insert or update agents by agent_id. Rows carry `pin_hash`, not a PIN."""
+        if not rows:
+            return 0
+        stmt = dialect_insert(db, PopAgent).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PopAgent.agent_id],
+            set_={c: stmt.excluded[c] for c in rows[0] if c != "agent_id"},
+        )
+        db.execute(stmt)
+        db.commit()
+        agent_cache.invalidate([row["agent_id"] for row in rows])
+        return len(rows)
+
+    @staticmethod
+    def ensure_seeded(db: Session):
+        """Insert the demo agents when the registry is empty."""
+        if not settings.POP_SEED_DEMO_AGENTS or db.query(PopAgent.id).first() is not None:
+            return
+        PopAgentService.upsert(db, [_registry_row(agent) for agent in DEMO_AGENTS])
+
+    @staticmethod
+    def stats() -> dict:
+        return {"agents": agent_cache.stats(), "verified_pins": verified_pins.stats()}
+
+
+# ─── Registry import ────────────────────────────────────────────────
+
+def _registry_row(record: dict) -> dict:
+    """Normalise one registry record to table columns, hashing its PIN."""
+    row = {"agent_id": str(record["agent_id"]).strip().upper()}
+    row.update({f: record.get(f) or None for f in PROFILE_FIELDS})
+    if not row["name"]:
+        raise ValueError(f"{row['agent_id']}: name is required")
+    if record.get("pin_hash"):
+        row["pin_hash"] = record["pin_hash"]
+    elif record.get("pin"):
+        row["pin_hash"] = hash_pin(str(record["pin"]))
+    else:
+        raise ValueError(f"{row['agent_id']}: pin or pin_hash is required")
+    if "active" in record and record["active"] not in (None, ""):
+        row["active"] = str(record["active"]).strip().lower() not in ("0", "false", "no", "n")
+    else:
+        row["active"] = True
+    if not row["photo_initials"]:
+        row["photo_initials"] = "".join(part[0] for part in row["name"].split()[:2]).upper()
+    return row
+
+
+def _read_registry(path: str):
+    """Records from a CSV (with a header row) or JSON / JSON-lines registry file."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+def import_registry(db: Session, path: str, batch_size: int = 1000, workers: int = 1) -> dict:
+    """Bulk-load a PFRDA PoP registry file into `pop_agents`.
+
+    PINs are hashed across `workers` processes; each batch is upserted in one
+    statement and committed, so an interrupted import can simply be re-run.
+
+    Returns:
+        dict with 'imported' and 'batches'.
+    """
+    summary = {"imported": 0, "batches": 0}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        records = _read_registry(path)
+        while batch := list(islice(records, batch_size)):
+            if pool:
+                rows = list(pool.map(_registry_row, batch, chunksize=max(1, len(batch) // (workers * 4))))
+            else:
+                rows = [_registry_row(record) for record in batch]
+            summary["imported"] += PopAgentService.upsert(db, rows)
+            summary["batches"] += 1
+            print(f"[POP] Imported {summary['imported']} agents")
+    finally:
+        if pool:
+            pool.shutdown()
+    return summary
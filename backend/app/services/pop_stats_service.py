@@ -0,0 +1,266 @@
+"""
+PoP Agent Statistics — Per-agent dashboard aggregates and the leaderboard.
+
+The agent dashboard aggregates the sessions table directly; every query is a
+range on the (pop_agent_id, created_at) index, so its cost depends on one
+agent's sessions, not the whole table.
+
+The leaderboard ranks all agents over a date range, which would otherwise
+group every session in that range. It reads `pop_agent_daily_stats` instead:
+a flush hook moves each UserSession's contribution (attributed on the day it
+was created, completed on the day it completed) whenever its agent, status or
+completion time changes. The dashboard reconciliation job rebuilds it.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.pop import PopAgent, PopAgentDailyStats
+from app.models.session import UserSession
+from app.utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+# Attributes that decide a session's contribution to the daily stats
+_TRACKED = ("pop_agent_id", "status", "created_at", "completed_at")
+
+_leaderboard_cache = TTLCache(256, settings.POP_LEADERBOARD_CACHE_SECONDS)
+
+
+def _contribution(values: dict) -> Counter:
+    """{(agent_id, day, column): n} that one session with these values adds."""
+    contribution: Counter = Counter()
+    agent = values["pop_agent_id"]
+    if not agent:
+        return contribution
+    if values["created_at"]:
+        contribution[(agent, values["created_at"].date(), "sessions")] += 1
+    if values["status"] == "completed" and values["completed_at"]:
+        contribution[(agent, values["completed_at"].date(), "completed")] += 1
+    return contribution
+
+
+def _values(obj: UserSession, old: bool) -> dict:
+    values = {}
+    for attr in _TRACKED:
+        history = inspect(obj).attrs[attr].history
+        if old and history.deleted:
+            values[attr] = history.deleted[0]
+        elif old and history.added:
+            values[attr] = None   # Set for the first time in this flush
+        else:
+            values[attr] = getattr(obj, attr)
+    return values
+
+
+class PopStatsService:
+    """Aggregates for the PoP agent dashboard and leaderboard."""
+
+    @staticmethod
+    async def agent_stats(db: AsyncSession, agent_id: str) -> dict:
+        """Totals over all of an agent's sessions, computed in one indexed query."""
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        completed = UserSession.status == "completed"
+        minutes = (func.julianday(UserSession.completed_at) - func.julianday(UserSession.created_at)) * 1440
+        row = (await db.execute(
+            select(
+                func.count(UserSession.id),
+                func.sum(case((completed, 1), else_=0)),
+                func.sum(case((UserSession.status.in_(("completed", "expired")), 0), else_=1)),
+                func.sum(case((UserSession.created_at >= today, 1), else_=0)),
+                func.avg(case((completed & UserSession.completed_at.isnot(None), minutes))),
+            ).where(UserSession.pop_agent_id == agent_id)
+        )).one()
+        total, done, in_progress, today_count, avg_minutes = row
+        total = total or 0
+        done = done or 0
+        return {
+            "total_sessions": total,
+            "completed": done,
+            "in_progress": in_progress or 0,
+            "success_rate": round((done / total * 100) if total > 0 else 0, 1),
+            "avg_completion_minutes": round(avg_minutes, 1) if avg_minutes is not None else 0.0,
+            "today_count": today_count or 0,
+        }
+
+    @staticmethod
+    async def leaderboard(
+        db: AsyncSession,
+        start: date,
+        end: date,
+        sort: str = "completions",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> dict:
+        """Agents ranked over [start, end] by completions or conversion
+        (completed / attributed sessions). Results are cached briefly."""
+        key = f"{start}|{end}|{sort}|{limit}|{offset}"
+        cached = _leaderboard_cache.get(key)
+        if cached is not None:
+            return cached
+
+        sessions = func.sum(PopAgentDailyStats.sessions)
+        completions = func.sum(PopAgentDailyStats.completed)
+        conversion = case((sessions > 0, completions * 1.0 / sessions), else_=0.0)
+        order = (completions.desc(), conversion.desc()) if sort == "completions" else (conversion.desc(), completions.desc())
+
+        in_range = (
+            PopAgentDailyStats.day >= start,
+            PopAgentDailyStats.day <= end,
+            # Rows zeroed by re-attribution stay behind with no activity
+            (PopAgentDailyStats.sessions != 0) | (PopAgentDailyStats.completed != 0),
+        )
+        ranked = (
+            select(
+                PopAgentDailyStats.agent_id,
+                sessions.label("sessions"),
+                completions.label("completed"),
+                conversion.label("conversion"),
+            )
+            .where(*in_range)
+            .group_by(PopAgentDailyStats.agent_id)
+            .order_by(*order, PopAgentDailyStats.agent_id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        rows = (await db.execute(
+            select(ranked, PopAgent.name, PopAgent.organization, PopAgent.tier)
+            .outerjoin(PopAgent, PopAgent.agent_id == ranked.c.agent_id)
+        )).all()
+        total_agents = await db.scalar(
+            select(func.count(func.distinct(PopAgentDailyStats.agent_id))).where(*in_range)
+        )
+
+        rows = sorted(rows, key=lambda r: (
+            (-r.completed, -r.conversion) if sort == "completions" else (-r.conversion, -r.completed), r.agent_id,
+        ))
+        result = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "sort": sort,
+            "total_agents": total_agents or 0,
+            "agents": [
+                {
+                    "rank": offset + i + 1,
+                    "agent_id": r.agent_id,
+                    "name": r.name,
+                    "organization": r.organization,
+                    "tier": r.tier,
+                    "sessions": r.sessions,
+                    "completed": r.completed,
+                    "conversion_rate": round(r.conversion * 100, 1),
+                }
+                for i, r in enumerate(rows)
+            ],
+        }
+        _leaderboard_cache.put(key, result)
+        return result
+
+    # ─── Daily stats maintenance ────────────────────────────────────
+
+    @staticmethod
+    def flush_deltas(session: Session) -> Counter:
+        deltas: Counter = Counter()
+        for obj in session.new:
+            if isinstance(obj, UserSession):
+                deltas.update(_contribution(_values(obj, old=False)))
+        for obj in session.deleted:
+            if isinstance(obj, UserSession):
+                deltas.subtract(_contribution(_values(obj, old=True)))
+        for obj in session.dirty:
+            if isinstance(obj, UserSession) and obj not in session.deleted:
+                state = inspect(obj)
+                if any(state.attrs[attr].history.has_changes() for attr in _TRACKED):
+                    deltas.update(_contribution(_values(obj, old=False)))
+                    deltas.subtract(_contribution(_values(obj, old=True)))
+        return deltas
+
+    @staticmethod
+    def retag_deltas(rows, agent_id: str) -> Counter:
+        """Deltas for moving sessions to `agent_id` with a bulk UPDATE, which the
+        flush hook never sees. `rows` carry the _TRACKED columns (current values)."""
+        deltas: Counter = Counter()
+        for row in rows:
+            old = {attr: getattr(row, attr) for attr in _TRACKED}
+            deltas.update(_contribution({**old, "pop_agent_id": agent_id}))
+            deltas.subtract(_contribution(old))
+        return deltas
+
+    @staticmethod
+    def apply(connection, deltas: Counter):
+        table = PopAgentDailyStats.__table__
+        for (agent_id, day, column), delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            result = connection.execute(
+                update(table)
+                .where(table.c.day == day, table.c.agent_id == agent_id)
+                .values({column: table.c[column] + delta})
+            )
+            if result.rowcount == 0:
+                values = {"day": day, "agent_id": agent_id, "sessions": 0, "completed": 0}
+                values[column] = delta
+                connection.execute(insert(table).values(**values))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute the daily stats from the sessions table. Returns the number of rows."""
+        table = PopAgentDailyStats.__table__
+        try:
+            db.execute(delete(table))
+            counts: Counter = Counter()
+            created_day = func.date(UserSession.created_at)
+            for agent, day, n in (
+                db.query(UserSession.pop_agent_id, created_day, func.count(UserSession.id))
+                .filter(UserSession.pop_agent_id.isnot(None), UserSession.created_at.isnot(None))
+                .group_by(UserSession.pop_agent_id, created_day)
+            ):
+                counts[(agent, day, "sessions")] += n
+            completed_day = func.date(UserSession.completed_at)
+            for agent, day, n in (
+                db.query(UserSession.pop_agent_id, completed_day, func.count(UserSession.id))
+                .filter(
+                    UserSession.pop_agent_id.isnot(None),
+                    UserSession.status == "completed",
+                    UserSession.completed_at.isnot(None),
+                )
+                .group_by(UserSession.pop_agent_id, completed_day)
+            ):
+                counts[(agent, day, "completed")] += n
+
+            rows: dict = {}
+            for (agent, day, column), n in counts.items():
+                row = rows.setdefault((agent, day), {
+                    "agent_id": agent, "day": date.fromisoformat(day), "sessions": 0, "completed": 0,
+                })
+                row[column] = n
+            if rows:
+                db.execute(insert(table), list(rows.values()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        _leaderboard_cache.invalidate()
+        return len(rows)
+
+    @staticmethod
+    def ensure_initialized(db: Session):
+        if db.query(PopAgentDailyStats.id).first() is None:
+            PopStatsService.rebuild(db)
+
+
+def default_range(days: int = 30) -> tuple[date, date]:
+    end = datetime.utcnow().date()
+    return end - timedelta(days=days - 1), end
+
+
+@event.listens_for(Session, "after_flush")
+def _update_daily_stats(session: Session, flush_context):
+    deltas = PopStatsService.flush_deltas(session)
+    if any(deltas.values()):
+        PopStatsService.apply(session.connection(), deltas)
@@ -0,0 +1,70 @@
+"""
+Profile Service — Reads and writes a session's profile as key/value fields.
+
+Sessions created before profile fields existed keep their captured data in
+`UserSession.data`; that blob is read as the base layer and never written
+again, with field rows taking precedence.
+
+New keys are written with an upsert, so two requests adding the same key at
+once both succeed and the last write wins, as with the old JSON merge.
+"""
+from datetime import datetime
+from typing import Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.session import UserSession, ProfileField
+from app.services.session_cache import mark_changed
+
+
+class ProfileService:
+    """Incremental profile storage for onboarding sessions."""
+
+    @staticmethod
+    async def _rows(db: AsyncSession, session_id: str) -> Dict[str, ProfileField]:
+        rows = await db.scalars(select(ProfileField).where(ProfileField.session_id == session_id))
+        return {row.key: row for row in rows}
+
+    @staticmethod
+    async def get_profile(db: AsyncSession, session: UserSession) -> Dict:
+        """Full profile of a session (legacy blob overlaid with field rows)."""
+        profile = dict(session.data or {})
+        profile.update({key: row.value for key, row in (await ProfileService._rows(db, session.id)).items()})
+        return profile
+
+    @staticmethod
+    async def update_fields(db: AsyncSession, session: UserSession, fields: Dict) -> Tuple[Dict, Dict]:
+        """Apply profile fields, writing only those whose value changed.
+
+        Returns:
+            Tuple of (full profile after the update, {key: value} actually changed).
+        """
+        rows = await ProfileService._rows(db, session.id)
+        profile = dict(session.data or {})
+        profile.update({key: row.value for key, row in rows.items()})
+
+        changed = {}
+        added = []
+        for key, value in fields.items():
+            if key in profile and profile[key] == value:
+                continue
+            row = rows.get(key)
+            if row is None:
+                added.append({"session_id": session.id, "key": key, "value": value, "updated_at": datetime.utcnow()})
+            else:
+                row.value = value
+            profile[key] = value
+            changed[key] = value
+
+        if added:
+            stmt = dialect_insert(db, ProfileField).values(added)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[ProfileField.session_id, ProfileField.key],
+                set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+            ))
+            # The upsert bypasses the unit of work: invalidate the cached snapshot on commit
+            mark_changed(db, [session.id])
+
+        return profile, changed
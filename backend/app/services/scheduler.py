@@ -0,0 +1,71 @@
+"""
+Scheduler — Lightweight in-process runner for periodic maintenance jobs.
+Each job runs on its own daemon thread; a failing run is logged and retried
+at the next interval.
+"""
+import threading
+from typing import Callable
+
+
+class PeriodicJob:
+    """Calls `fn` every `interval` seconds until stopped."""
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.runs = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.fn()
+                self.runs += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"[SCHEDULER] Job '{self.name}' failed: {e}")
+
+
+class Scheduler:
+    """Registry of periodic jobs started and stopped with the application."""
+
+    def __init__(self):
+        self.jobs: dict[str, PeriodicJob] = {}
+
+    def add_job(self, name: str, interval: float, fn: Callable[[], object]):
+        """Register a job. Jobs with a non-positive interval are disabled."""
+        if interval > 0:
+            self.jobs[name] = PeriodicJob(name, interval, fn)
+
+    def start(self):
+        for job in self.jobs.values():
+            job.start()
+
+    def stop(self):
+        for job in self.jobs.values():
+            job.stop()
+
+    def stats(self) -> dict:
+        return {
+            name: {"interval_seconds": job.interval, "runs": job.runs, "failures": job.failures}
+            for name, job in self.jobs.items()
+        }
+
+
+scheduler = Scheduler()
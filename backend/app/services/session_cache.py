@@ -0,0 +1,180 @@
+"""
+Session Cache — Bounded TTL cache of UserSession snapshots.
+
+Serves the hot `session-id` lookups (the frontend polls /api/session/status)
+from memory. Snapshots are plain dicts of the fields the status API returns,
+never live ORM objects. Any committed change to a session, made through any
+ORM session in this process, invalidates its entry (see the hooks at the
+bottom). Other worker processes are not notified, so the TTL bounds how stale
+an entry can get there.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.session import UserSession, ProfileField
+
+settings = get_settings()
+
+# Session.info key: ids of sessions whose row or profile fields were flushed
+# in the current transaction
+_CHANGED_KEY = "changed_user_sessions"
+
+
+def snapshot(session: UserSession, data: Optional[dict]) -> dict:
+    """Detached copy of the fields served by the status and resume endpoints,
+    with the session's assembled profile as `data`."""
+    return {
+        "session_id": session.id,
+        "status": session.status,
+        "risk_level": session.risk_level,
+        "kyc_method": session.kyc_method,
+        "esign_complete": session.esign_complete,
+        "payment_status": session.payment_status,
+        "pran": session.pran,
+        "resume_token": session.resume_token,
+        "data": copy.deepcopy(data),
+        "created_at": session.created_at,
+    }
+
+
+class SessionSnapshotCache:
+    """LRU of session_id -> snapshot with a per-entry TTL and a resume-token index."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._by_token: dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a read that raced with one is not cached
+        self._epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    # ─── Lookups ────────────────────────────────────────────────────
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Cached snapshot for a session, or None on a miss or expiry."""
+        with self._lock:
+            return self._lookup(session_id)
+
+    def get_by_resume_token(self, resume_token: str) -> Optional[dict]:
+        with self._lock:
+            session_id = self._by_token.get(resume_token)
+            if session_id is None:
+                self._misses += 1
+                return None
+            return self._lookup(session_id)
+
+    def _lookup(self, session_id: str) -> Optional[dict]:
+        entry = self._entries.get(session_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(session_id)
+            self._misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self._hits += 1
+        return copy.deepcopy(entry[1])
+
+    # ─── Population / invalidation ──────────────────────────────────
+
+    def epoch(self) -> int:
+        """Token to take before reading a session from the database."""
+        with self._lock:
+            return self._epoch
+
+    def put(self, snap: dict, epoch: int):
+        """Cache a snapshot read after `epoch()` returned `epoch`. Skipped if any
+        session was invalidated in between, since the read may predate that write."""
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            session_id = snap["session_id"]
+            self._drop(session_id)
+            self._entries[session_id] = (time.monotonic() + self.ttl, snap)
+            if snap.get("resume_token"):
+                self._by_token[snap["resume_token"]] = session_id
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, session_ids=None):
+        """Drop the given sessions (or everything)."""
+        with self._lock:
+            self._epoch += 1
+            if session_ids is None:
+                self._entries.clear()
+                self._by_token.clear()
+                return
+            for session_id in session_ids:
+                if self._drop(session_id):
+                    self._invalidations += 1
+
+    def _drop(self, session_id: str) -> bool:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return False
+        token = entry[1].get("resume_token")
+        if token and self._by_token.get(token) == session_id:
+            del self._by_token[token]
+        return True
+
+    # ─── Metrics ────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cached_sessions": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": round(self._hits / lookups * 100, 1) if lookups else 0.0,
+            }
+
+
+session_cache = SessionSnapshotCache(
+    max_entries=settings.SESSION_CACHE_SIZE,
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+)
+
+
+# ─── Write-through invalidation ─────────────────────────────────────
+
+def mark_changed(db, session_ids):
+    """Invalidate sessions changed by statements that bypass the unit of work
+    (bulk UPDATEs), once the caller's transaction commits."""
+    db.info.setdefault(_CHANGED_KEY, set()).update(session_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_sessions(session: Session, flush_context):
+    changed = session.info.setdefault(_CHANGED_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, UserSession):
+            changed.add(obj.id)
+        elif isinstance(obj, ProfileField):
+            changed.add(obj.session_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_sessions(session: Session):
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed:
+        session_cache.invalidate(changed)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rolled_back_changes(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
@@ -15,6 +15,31 @@ def generate_chain_hash(current_data: dict, previous_hash: str = "") -> str:
     """Generate a chain hash: SHA-256(previous_hash + current_payload).
     Creates a tamper-evident linked chain for the audit trail.
     """
-    current_hash = generate_hash(current_data)
-    chain_input = f"{previous_hash}{current_hash}".encode("utf-8")
+    return link_hash(previous_hash, generate_hash(current_data))
+
+
+def link_hash(previous_hash: str, content_hash: str) -> str:
+    """Chain hash from an already computed payload hash."""
+    chain_input = f"{previous_hash}{content_hash}".encode("utf-8")
     return hashlib.sha256(chain_input).hexdigest()
+
+
+def verify_chain_links(entries, start_hash: str = "") -> tuple | None:
+    """Walk one session's audit entries in chain order.
+
+    Args:
+        entries: Iterable of (id, action, payload_hash, previous_hash, content_hash)
+            tuples. content_hash may be None for rows written before it was stored.
+        start_hash: Expected previous_hash of the first entry.
+
+    Returns:
+        None if the chain is intact, else (entry_id, action, reason) for the first break.
+    """
+    expected_prev = start_hash
+    for entry_id, action, payload_hash, previous_hash, content_hash in entries:
+        if (previous_hash or "") != expected_prev:
+            return entry_id, action, "previous_hash does not match the preceding entry"
+        if content_hash and link_hash(expected_prev, content_hash) != payload_hash:
+            return entry_id, action, "payload_hash does not match the recomputed hash"
+        expected_prev = payload_hash
+    return None
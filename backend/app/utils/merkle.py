@@ -0,0 +1,66 @@
+"""
+Merkle Tree Utilities — Roots and inclusion proofs over audit log ranges.
+
+Leaves and interior nodes are domain-separated (0x00 / 0x01 prefixes, as in
+RFC 6962) so a leaf can never be passed off as an interior node. An odd node
+at the end of a level is promoted unchanged to the next level.
+"""
+import hashlib
+
+
+def leaf_hash(data: str) -> str:
+    """SHA-256 of a leaf, prefixed with 0x00."""
+    return hashlib.sha256(b"\x00" + data.encode("utf-8")).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    """SHA-256 of two child hashes, prefixed with 0x01."""
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_root(leaves: list[str]) -> str:
+    """Root over already hashed leaves ('' for an empty tree)."""
+    if not leaves:
+        return ""
+    level = list(leaves)
+    while len(level) > 1:
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+    return level[0]
+
+
+def inclusion_proof(leaves: list[str], index: int) -> list[dict]:
+    """Sibling path from leaf `index` up to the root.
+
+    Returns:
+        List of {"hash", "position"} steps, where position says which side the
+        sibling sits on ("left" or "right"). Promoted odd nodes add no step.
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError("Leaf index out of range")
+
+    proof = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"hash": level[sibling], "position": "left" if sibling < index else "right"})
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        index //= 2
+    return proof
+
+
+def verify_inclusion(leaf: str, proof: list[dict], root: str) -> bool:
+    """Recompute the root from a leaf hash and its proof."""
+    current = leaf
+    for step in proof:
+        if step["position"] == "left":
+            current = node_hash(step["hash"], current)
+        else:
+            current = node_hash(current, step["hash"])
+    return current == root
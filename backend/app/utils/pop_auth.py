@@ -0,0 +1,86 @@
+"""
+PoP Agent Tokens — Signed, expiring bearer tokens for PoP agents.
+
+`pop_login` issues an HS256 JWT signed with SECRET_KEY that embeds the agent's
+profile. The `current_pop_agent` dependency checks the signature and expiry
+only, with no database or registry lookup, and remembers a verified token for
+the rest of its lifetime so repeat calls skip even that. A deactivated agent's
+existing tokens therefore stay valid until they expire.
+"""
+import hashlib
+import time
+import uuid
+from typing import Optional
+
+import jwt
+from fastapi import Header, HTTPException
+
+from app.config import get_settings
+from app.utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+ALGORITHM = "HS256"
+TOKEN_TYPE = "pop"
+
+# sha256(token) -> agent profile; entries live until the token's exp
+_verified_tokens = TTLCache(settings.POP_TOKEN_CACHE_SIZE, settings.POP_TOKEN_TTL_MINUTES * 60)
+
+
+def issue_token(agent: dict) -> tuple[str, int]:
+    """Signed token for an authenticated agent.
+
+    Returns:
+        Tuple of (token, expiry as a Unix timestamp).
+    """
+    now = int(time.time())
+    expires = now + settings.POP_TOKEN_TTL_MINUTES * 60
+    claims = {
+        "sub": agent["agent_id"],
+        "typ": TOKEN_TYPE,
+        "agent": agent,
+        "iat": now,
+        "exp": expires,
+        "jti": uuid.uuid4().hex,
+    }
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=ALGORITHM), expires
+
+
+def verify_token(token: str) -> dict:
+    """Agent profile from a valid token.
+
+    Raises:
+        HTTPException(401): if the token is malformed, forged or expired.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    agent = _verified_tokens.get(key)
+    if agent is not None:
+        return agent
+
+    try:
+        claims = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="PoP session expired, please log in again")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid PoP token")
+    if claims.get("typ") != TOKEN_TYPE or not isinstance(claims.get("agent"), dict):
+        raise HTTPException(status_code=401, detail="Invalid PoP token")
+
+    agent = claims["agent"]
+    _verified_tokens.put(key, agent, ttl=max(0, claims["exp"] - time.time()))
+    return agent
+
+
+async def current_pop_agent(authorization: Optional[str] = Header(None)) -> dict:
+    """FastAPI dependency: the PoP agent named by the `Authorization: Bearer` token."""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(
+            status_code=401, detail="PoP token required", headers={"WWW-Authenticate": "Bearer"},
+        )
+    return verify_token(authorization[7:].strip())
+
+
+def token_cache_stats() -> dict:
+    return _verified_tokens.stats()
@@ -1,41 +1,300 @@
 """
-Simple Memory-based Rate Limiter for PoC.
-In production, use Redis or a dedicated middleware like slowapi.
+Token-bucket rate limiter.
+
+Each limited route gets a bucket per client key holding up to `requests`
+tokens, refilled continuously at `requests / window` per second; a request
+spends one token. Unlike a fixed window this never admits a 2x burst at a
+window boundary.
+
+Buckets live in a bounded table split into shards, each with its own lock and
+LRU order, so concurrent requests for different keys rarely contend. Expiry is
+lazy: a bucket idle long enough to refill completely carries no state, so
+such buckets are dropped when their shard is next written instead of by a
+sweeper. When a shard is still over its share of RATE_LIMIT_MAX_KEYS, its
+least recently used bucket is evicted (that client starts again with a full
+bucket).
+
+That table is per process, so `run.py --workers N` would admit N times the
+limit. RATE_LIMIT_BACKEND=sqlite keeps the buckets in a small SQLite file
+shared by every worker on the host instead: each check is one atomic UPSERT
+... RETURNING statement, so concurrent workers never both spend the last
+token. Those checks can wait on the file lock, so they run in the threadpool.
 """
+import os
+import sqlite3
+import threading
 import time
-from fastapi import Request, HTTPException
-from typing import Dict, Tuple
+from collections import OrderedDict
+from typing import Callable, Union
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "allowed", "limited", "expired", "evicted")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [tokens, last refill (monotonic), seconds until full again]
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.allowed = self.limited = self.expired = self.evicted = 0
+
+
+class BucketStore:
+    """Bounded, sharded table of token buckets."""
+
+    blocking = False   # hit() only touches memory: safe to call on the event loop
+
+    def __init__(self, max_keys: int, shards: int):
+        self.shards = [_Shard() for _ in range(max(1, shards))]
+        self.max_per_shard = max(1, max_keys // len(self.shards))
+
+    def _shard(self, key: str) -> _Shard:
+        return self.shards[hash(key) % len(self.shards)]
 
-# In-memory storage: {ip: (timestamp, count)}
-_rate_limit_store: Dict[str, Tuple[float, int]] = {}
+    def hit(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Spend one token from `key`'s bucket.
 
-def rate_limit(requests: int, window: int):
+        Returns:
+            0.0 if the request is allowed, else seconds until a token is available.
+        """
+        now = time.monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            buckets = shard.buckets
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                buckets.move_to_end(key)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            full_in = (capacity - tokens) / refill_per_second
+            if bucket is None:
+                buckets[key] = [tokens, now, full_in]
+                self._trim(shard, now)
+            else:
+                bucket[0], bucket[1], bucket[2] = tokens, now, full_in
+
+            if allowed:
+                shard.allowed += 1
+                return 0.0
+            shard.limited += 1
+            return (1 - tokens) / refill_per_second
+
+    def _trim(self, shard: _Shard, now: float):
+        buckets = shard.buckets
+        # Lazy expiry: refilled buckets at the cold end are indistinguishable from absent ones
+        while buckets:
+            _, (_, updated, full_in) = next(iter(buckets.items()))
+            if updated + full_in > now:
+                break
+            buckets.popitem(last=False)
+            shard.expired += 1
+        while len(buckets) > self.max_per_shard:
+            buckets.popitem(last=False)
+            shard.evicted += 1
+
+    def stats(self) -> dict:
+        totals = {"keys": 0, "allowed": 0, "limited": 0, "expired": 0, "evicted": 0}
+        for shard in self.shards:
+            with shard.lock:
+                totals["keys"] += len(shard.buckets)
+                for counter in ("allowed", "limited", "expired", "evicted"):
+                    totals[counter] += getattr(shard, counter)
+        return {
+            "backend": "memory",
+            **totals,
+            "max_keys": self.max_per_shard * len(self.shards),
+            "shards": len(self.shards),
+        }
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by worker processes.
+
+    Buckets are refilled and spent inside a single UPSERT, which SQLite runs
+    under its write lock. The file holds throwaway state only, so it runs in
+    WAL mode without fsync. Fully refilled buckets, then the oldest ones past
+    `max_keys`, are deleted every `prune_every` checks made by a process.
     """
-    Decorator/Dependency for rate limiting.
-    Example: Depends(rate_limit(requests=5, window=60))
+
+    blocking = True    # hit() may wait on the file lock: run it in the threadpool
+
+    # Tokens in the bucket after refilling it up to now
+    _REFILLED = "min(:capacity, tokens + max(0.0, :now - updated_at) * :rate)"
+    _HIT = f"""
+        INSERT INTO rate_buckets (key, tokens, updated_at, full_at, limited)
+        VALUES (:key, :capacity - 1, :now, :now + 1 / :rate, 0)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = {_REFILLED} - ({_REFILLED} >= 1),
+            limited = {_REFILLED} < 1,
+            full_at = :now + (:capacity - {_REFILLED} + ({_REFILLED} >= 1)) / :rate,
+            updated_at = :now
+        RETURNING tokens, limited
     """
-    def limiter(request: Request):
-        ip = request.client.host if request.client else "unknown"
+
+    def __init__(self, path: str, max_keys: int, prune_every: int = 1000):
+        self.path = path
+        self.max_keys = max_keys
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._allowed = 0
+        self._limited = 0
+        self._errors = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL,"
+            " full_at REAL NOT NULL, limited INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_buckets_full_at ON rate_buckets (full_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Spend one token from `key`'s bucket. Same contract as BucketStore.hit;
+        fails open (allows) if the file stays locked past the busy timeout."""
         now = time.time()
-        
-        if ip not in _rate_limit_store:
-            _rate_limit_store[ip] = (now, 1)
-            return True
-            
-        last_ts, count = _rate_limit_store[ip]
-        
-        # Reset window if expired
-        if now - last_ts > window:
-            _rate_limit_store[ip] = (now, 1)
-            return True
-            
-        if count >= requests:
+        try:
+            conn = self._connection()
+            tokens, limited = conn.execute(
+                self._HIT, {"key": key, "capacity": capacity, "rate": refill_per_second, "now": now},
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            with self._lock:
+                self._errors += 1
+            print(f"[RATELIMIT] Shared bucket check failed, allowing request: {e}")
+            return 0.0
+
+        with self._lock:
+            self._checks += 1
+            prune = self._checks % self.prune_every == 0
+            if limited:
+                self._limited += 1
+            else:
+                self._allowed += 1
+        if prune:
+            self._prune(conn, now)
+        return (1 - tokens) / refill_per_second if limited else 0.0
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        try:
+            conn.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+            excess = conn.execute("SELECT count(*) FROM rate_buckets").fetchone()[0] - self.max_keys
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM rate_buckets WHERE key IN"
+                    " (SELECT key FROM rate_buckets ORDER BY full_at LIMIT ?)", (excess,),
+                )
+        except sqlite3.OperationalError as e:
+            print(f"[RATELIMIT] Pruning shared buckets failed: {e}")
+
+    def stats(self) -> dict:
+        keys = self._connection().execute("SELECT count(*) FROM rate_buckets").fetchone()[0]
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "keys": keys,
+                "max_keys": self.max_keys,
+                # Counters below are for this worker process only
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "errors": self._errors,
+            }
+
+
+def _create_store():
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        path = settings.RATE_LIMIT_DB_PATH or os.path.join(settings.DATA_DIR, "rate_limits.db")
+        return SQLiteBucketStore(path, settings.RATE_LIMIT_MAX_KEYS)
+    return BucketStore(settings.RATE_LIMIT_MAX_KEYS, settings.RATE_LIMIT_SHARDS)
+
+
+_store = _create_store()
+
+
+# ─── Client keys ────────────────────────────────────────────────────
+
+def _ip_key(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _session_key(request: Request) -> str:
+    session_id = request.headers.get("session-id")
+    return f"session:{session_id}" if session_id else _ip_key(request)
+
+
+def _pop_agent_key(request: Request) -> str:
+    from app.utils.pop_auth import verify_token
+
+    authorization = request.headers.get("authorization") or ""
+    if authorization.lower().startswith("bearer "):
+        try:
+            return f"agent:{verify_token(authorization[7:].strip())['agent_id']}"
+        except HTTPException:
+            pass
+    return _ip_key(request)
+
+
+KEY_FUNCTIONS: dict[str, Callable[[Request], str]] = {
+    "ip": _ip_key,
+    "session": _session_key,
+    "pop_agent": _pop_agent_key,
+}
+
+
+def rate_limit(requests: int, window: int, key: Union[str, Callable[[Request], str], None] = None):
+    """
+    Dependency for rate limiting: `requests` per `window` seconds per client,
+    counted separately for each route.
+    Example: Depends(rate_limit(requests=5, window=60))
+
+    `key` picks the client: "ip", "session" (the session-id header) or
+    "pop_agent" (the PoP bearer token), falling back to the IP when the
+    request has neither; or any callable taking the Request. Defaults to
+    RATE_LIMIT_KEY.
+    """
+    key_fn = key if callable(key) else KEY_FUNCTIONS[key or settings.RATE_LIMIT_KEY]
+    refill = requests / window
+
+    async def limiter(request: Request):
+        route = request.scope.get("route")
+        scope = route.path if route is not None else request.url.path
+        key = f"{scope}|{key_fn(request)}"
+        if _store.blocking:
+            retry_after = await run_in_threadpool(_store.hit, key, requests, refill)
+        else:
+            retry_after = _store.hit(key, requests, refill)
+        if retry_after:
             raise HTTPException(
-                status_code=429, 
-                detail=f"Rate limit exceeded. Try again in {int(window - (now - last_ts))} seconds."
+                status_code=429,
+                detail=f"Rate limit exceeded. Try again in {int(retry_after) + 1} seconds.",
+                headers={"Retry-After": str(int(retry_after) + 1)},
             )
-            
-        _rate_limit_store[ip] = (last_ts, count + 1)
         return True
-        
+
     return limiter
+
+
+def rate_limit_stats() -> dict:
+    return _store.stats()
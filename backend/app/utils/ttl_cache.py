@@ -0,0 +1,59 @@
+"""
+TTL Cache — Bounded in-process LRU whose entries expire.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TTLCache:
+    """Small thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: str, value, ttl: Optional[float] = None):
+        """Store a value for `ttl` seconds (default: the cache's TTL)."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys=None):
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups * 100, 1) if lookups else 0.0,
+            }
@@ -0,0 +1,16 @@
+"""
+Shared benchmark bootstrap — points the app at a throwaway SQLite database.
+Import this before anything from `app` so Settings picks up the overrides.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix="nps-bench-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}")
+os.environ.setdefault("LOG_DIR", os.path.join(TMP_DIR, "logs"))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,112 @@
+"""
+Benchmark — audit appends/sec with and without the chain-head cache.
+
+"before" replays the original AuditService.log: SELECT the newest entry for the
+session, INSERT, COMMIT, then REFRESH the row. "after" is the current
+implementation (cached head, one INSERT per append). Both run as concurrent
+tasks on the async engine, like the request handlers that call them.
+
+Usage:
+    python benchmarks/bench_audit_append.py --appends 2000 --sessions 50 --concurrency 4
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import _setup  # noqa: F401
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, init_db
+from app.models.audit import AuditLog
+from app.services.audit_chain import chain_heads
+from app.services.audit_service import AuditService
+from app.utils.hashing import generate_chain_hash
+
+
+async def legacy_log(db, session_id: str, action: str, payload: dict):
+    last_entry = await db.scalar(
+        select(AuditLog)
+        .where(AuditLog.session_id == session_id)
+        .order_by(AuditLog.id.desc())
+        .limit(1)
+    )
+    previous_hash = last_entry.payload_hash if last_entry else ""
+    entry = AuditLog(
+        session_id=session_id,
+        action=action,
+        payload_hash=generate_chain_hash(payload, previous_hash),
+        previous_hash=previous_hash,
+        log_metadata={},
+        timestamp=datetime.utcnow(),
+    )
+    db.add(entry)
+    await db.commit()
+    await db.refresh(entry)
+
+
+async def cached_log(db, session_id: str, action: str, payload: dict):
+    await AuditService.log(db, session_id, action, payload=payload)
+    await db.commit()
+
+
+async def run(label: str, log_fn, appends: int, sessions: list[str], concurrency: int) -> float:
+    per_task = appends // concurrency
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        async with AsyncSessionLocal() as db:
+            for i in range(per_task):
+                await log_fn(db, rng.choice(sessions), "BENCH", {"i": i, "seed": seed})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    # Pooled async connections belong to this run's event loop
+    await async_engine.dispose()
+
+    rate = per_task * concurrency / elapsed
+    print(f"  {label:<8} {per_task * concurrency:>7} appends in {elapsed:6.2f}s  ->  {rate:8.0f} appends/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit append throughput benchmark")
+    parser.add_argument("--appends", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    init_db()
+    print(f"Audit append benchmark ({args.concurrency} concurrent tasks, {args.sessions} sessions)")
+
+    before = asyncio.run(run(
+        "before", legacy_log,
+        args.appends, [f"legacy-{i}" for i in range(args.sessions)], args.concurrency,
+    ))
+
+    chain_heads.invalidate()
+    after = asyncio.run(run(
+        "after",
+        cached_log,
+        args.appends, [f"cached-{i}" for i in range(args.sessions)], args.concurrency,
+    ))
+
+    print(f"  speedup  {after / before:.2f}x   cache: {chain_heads.stats()}")
+
+    db = SessionLocal()
+    try:
+        for prefix in ("legacy", "cached"):
+            broken = sum(
+                not AuditService.verify_chain(db, f"{prefix}-{i}")["valid"]
+                for i in range(args.sessions)
+            )
+            print(f"  {prefix} chains: {args.sessions - broken} valid, {broken} forked")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark — requests/sec of sync vs async database handlers under concurrency.
+
+Builds two identical micro-apps over the real models: one with `def` handlers
+on the sync engine (run in FastAPI's threadpool, as the routes used to be),
+one with `async def` handlers on the async engine (as they are now). Each
+serves a session status lookup and a session insert; clients issue a 4:1
+read/write mix in-process over ASGI, so the numbers measure the app and
+database layers rather than the network.
+
+Usage:
+    python benchmarks/bench_db_modes.py --requests 4000 --concurrency 1,50,200
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import _setup  # noqa: F401
+
+import httpx
+from fastapi import Depends, FastAPI, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, async_engine, get_async_db, get_db, init_db
+from app.models.session import UserSession
+
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/status")
+    def status(session_id: str = Header(..., alias="session-id"), db: Session = Depends(get_db)):
+        session = db.query(UserSession).filter(UserSession.id == session_id).first()
+        if not session:
+            raise HTTPException(status_code=404)
+        return {"status": session.status, "risk_level": session.risk_level}
+
+    @app.post("/start")
+    def start(db: Session = Depends(get_db)):
+        session = UserSession(id=str(uuid.uuid4()), resume_token=uuid.uuid4().hex, account_type="citizen")
+        db.add(session)
+        db.commit()
+        return {"session_id": session.id}
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/status")
+    async def status(session_id: str = Header(..., alias="session-id"), db: AsyncSession = Depends(get_async_db)):
+        session = await db.get(UserSession, session_id)
+        if not session:
+            raise HTTPException(status_code=404)
+        return {"status": session.status, "risk_level": session.risk_level}
+
+    @app.post("/start")
+    async def start(db: AsyncSession = Depends(get_async_db)):
+        session = UserSession(id=str(uuid.uuid4()), resume_token=uuid.uuid4().hex, account_type="citizen")
+        db.add(session)
+        await db.commit()
+        return {"session_id": session.id}
+
+    return app
+
+
+async def run(label: str, app: FastAPI, total: int, concurrency: int, session_ids: list[str]) -> float:
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(seed: int):
+            nonlocal errors
+            rng = random.Random(seed)
+            for _ in remaining:
+                start = time.perf_counter()
+                if rng.random() < 0.8:
+                    r = await client.get("/status", headers={"session-id": rng.choice(session_ids)})
+                else:
+                    r = await client.post("/start")
+                latencies.append(time.perf_counter() - start)
+                if r.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    # Pooled async connections belong to this run's event loop
+    await async_engine.dispose()
+
+    rate = total / elapsed
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {label:<6} c={concurrency:<4} {rate:8.0f} req/s   p50 {p50:7.1f}ms   p99 {p99:7.1f}ms   errors {errors}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async DB handler throughput")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", default="1,50,200", help="Comma-separated client concurrency levels")
+    parser.add_argument("--sessions", type=int, default=500, help="Sessions seeded for status lookups")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    session_ids = [str(uuid.uuid4()) for _ in range(args.sessions)]
+    db.add_all([UserSession(id=sid, resume_token=uuid.uuid4().hex, account_type="citizen") for sid in session_ids])
+    db.commit()
+    db.close()
+
+    print(f"DB mode benchmark ({args.requests} requests per run, 80% reads / 20% writes)")
+    sync_app, async_app = build_sync_app(), build_async_app()
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        before = asyncio.run(run("sync", sync_app, args.requests, concurrency, session_ids))
+        after = asyncio.run(run("async", async_app, args.requests, concurrency, session_ids))
+        print(f"  {'':<6} c={concurrency:<4} async/sync {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
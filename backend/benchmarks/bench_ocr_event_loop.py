@@ -0,0 +1,144 @@
+"""
+Benchmark — latency of other endpoints while document scans are in flight.
+
+A local stand-in replaces the Gemini model: it sleeps `--latency` seconds in
+generate_content, like the blocking SDK round trip, and returns a fixed PAN
+extraction. `--scans` concurrent POST /api/kyc/scan requests (distinct
+images, so the OCR cache never answers) run against the app in-process while
+a prober calls GET /api/session/status every 10 ms and records its latency.
+
+"before" calls generate_content directly on the event loop, as scan_document
+originally did; "after" is the current bounded OCR thread pool.
+
+Usage:
+    python benchmarks/bench_ocr_event_loop.py --scans 16 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("OCR_CACHE_DISK_TTL_HOURS", "0")   # Keep stand-in results off disk
+
+import _setup  # noqa: F401
+
+import httpx
+
+import app.services.ocr_service as ocr_service
+from app.config import get_settings
+from app.main import app
+
+settings = get_settings()
+
+EXTRACTION = json.dumps({
+    "full_name": "Rajesh Kumar", "father_name": "Suresh Kumar", "dob": "15/06/1990", "gender": "Male",
+    "id_number": "ABCPK1234F", "address": None, "document_type": "PAN", "confidence": 96,
+})
+
+
+class StandInResponse:
+    text = EXTRACTION
+    candidates = []
+
+
+class StandInModel:
+    """Blocks its calling thread for `latency` seconds, like the real SDK."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, contents, request_options=None):
+        time.sleep(self.latency)
+        return StandInResponse()
+
+
+async def blocking_generate(model, contents: list):
+    """The original call: synchronous, on the event loop."""
+    return model.generate_content(contents=contents)
+
+
+def client(ip: str = "127.0.0.1") -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(ip, 50000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+async def start_session(http: httpx.AsyncClient) -> str:
+    response = await http.post("/api/session/start", json={"account_type": "citizen"})
+    return response.json()["session_id"]
+
+
+async def scan(i: int) -> int:
+    # One client IP per scan so the per-IP rate limit does not interfere
+    async with client(f"10.9.{i // 250}.{i % 250 + 1}") as http:
+        session_id = await start_session(http)
+        image = os.urandom(2048)
+        response = await http.post(
+            "/api/kyc/scan", headers={"session-id": session_id},
+            files={"file": ("pan.jpg", image, "image/jpeg")},
+        )
+        return response.status_code
+
+
+async def probe(http: httpx.AsyncClient, session_id: str, stop: asyncio.Event) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await http.get("/api/session/status", headers={"session-id": session_id})
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def run(label: str, scans: int) -> dict:
+    async with client() as http:
+        session_id = await start_session(http)
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(http, session_id, stop))
+        await asyncio.sleep(0.1)   # Baseline samples before the scans start
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(scan(i) for i in range(scans)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        latencies = sorted(await prober)
+    return {
+        "label": label,
+        "scans_ok": sum(1 for s in statuses if s == 200),
+        "scan_wall_s": elapsed,
+        "probes": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scans", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    ocr_service.get_ocr_model = lambda: StandInModel(args.latency)
+    threaded_generate = ocr_service._generate
+
+    async with app.router.lifespan_context(app):
+        results = []
+        ocr_service._generate = blocking_generate
+        results.append(await run("before", args.scans))
+        ocr_service._generate = threaded_generate
+        results.append(await run("after", args.scans))
+
+    print(f"\n{args.scans} concurrent scans, stand-in model latency {args.latency}s, "
+          f"OCR_MAX_CONCURRENCY={settings.OCR_MAX_CONCURRENCY}")
+    print(f"{'':>7} {'scans ok':>9} {'scan wall s':>12} {'probes':>7} "
+          f"{'status p50 ms':>14} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['label']:>7} {r['scans_ok']:>9} {r['scan_wall_s']:>12.2f} {r['probes']:>7} "
+              f"{r['p50_ms']:>14.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark — rate limiter throughput and memory at many distinct client keys.
+
+"before" replays the original limiter: a module-level dict of
+{key: (window start, count)} that is never evicted. "after" is the sharded
+token-bucket BucketStore. Each run draws `--ops` checks over `--keys`
+distinct keys (100k by default) from `--threads` threads, then a scan of
+`--scan-keys` never-repeated keys shows how each table grows. Finally a
+boundary test counts how many requests each admits in a burst straddling a
+window edge.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py --keys 100000 --ops 500000 --threads 1,8
+"""
+import argparse
+import random
+import threading
+import time
+import tracemalloc
+
+import _setup  # noqa: F401
+
+from app.utils.rate_limiter import BucketStore
+
+REQUESTS = 5
+WINDOW = 60
+
+
+class LegacyLimiter:
+    """The original fixed-window dict, minus FastAPI."""
+
+    def __init__(self):
+        self.store: dict = {}
+
+    def hit(self, key: str, requests: int, window: int, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        if key not in self.store:
+            self.store[key] = (now, 1)
+            return True
+        last_ts, count = self.store[key]
+        if now - last_ts > window:
+            self.store[key] = (now, 1)
+            return True
+        if count >= requests:
+            return False
+        self.store[key] = (last_ts, count + 1)
+        return True
+
+
+def legacy_check(limiter: LegacyLimiter):
+    return lambda key: limiter.hit(key, REQUESTS, WINDOW)
+
+
+def bucket_check(store: BucketStore):
+    return lambda key: store.hit(key, REQUESTS, REQUESTS / WINDOW) == 0.0
+
+
+def throughput(check, keys: list[str], ops: int, threads: int) -> float:
+    per_thread = ops // threads
+    samples = [random.Random(seed).choices(keys, k=per_thread) for seed in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(sample):
+        barrier.wait()
+        for key in sample:
+            check(key)
+
+    pool = [threading.Thread(target=worker, args=(sample,)) for sample in samples]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def scan_memory(check, n: int) -> float:
+    """MiB retained after `n` checks from never-repeated keys."""
+    tracemalloc.start()
+    for i in range(n):
+        check(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}|{i}")
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 2**20
+
+
+def boundary_burst() -> tuple[int, int]:
+    """Requests admitted in 2 * REQUESTS attempts around a window edge."""
+    legacy = LegacyLimiter()
+    legacy.hit("k", REQUESTS, WINDOW, now=0.0)
+    admitted_legacy = 1 + sum(legacy.hit("k", REQUESTS, WINDOW, now=WINDOW - 0.1) for _ in range(REQUESTS - 1))
+    admitted_legacy += sum(legacy.hit("k", REQUESTS, WINDOW, now=WINDOW + 0.1) for _ in range(REQUESTS))
+
+    store = BucketStore(1000, 1)
+    admitted_bucket = sum(store.hit("k", REQUESTS, REQUESTS / WINDOW) == 0.0 for _ in range(2 * REQUESTS))
+    return admitted_legacy, admitted_bucket
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100000)
+    parser.add_argument("--ops", type=int, default=500000)
+    parser.add_argument("--threads", default="1,8")
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--scan-keys", type=int, default=500000)
+    args = parser.parse_args()
+
+    keys = [f"/api/kyc/scan|10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+    print(f"{args.keys:,} distinct keys, {args.ops:,} checks, {args.shards} shards\n")
+
+    print(f"{'threads':>7} {'before ops/s':>14} {'after ops/s':>14}")
+    for threads in (int(t) for t in args.threads.split(",")):
+        before = throughput(legacy_check(LegacyLimiter()), keys, args.ops, threads)
+        after = throughput(bucket_check(BucketStore(args.keys, args.shards)), keys, args.ops, threads)
+        print(f"{threads:>7} {before:>14,.0f} {after:>14,.0f}")
+
+    bounded = BucketStore(args.keys, args.shards)
+    before_mb = scan_memory(legacy_check(LegacyLimiter()), args.scan_keys)
+    after_mb = scan_memory(bucket_check(bounded), args.scan_keys)
+    print(f"\nscan of {args.scan_keys:,} unique keys: before {before_mb:.1f} MiB, "
+          f"after {after_mb:.1f} MiB ({bounded.stats()['keys']:,} buckets kept, "
+          f"{bounded.stats()['evicted']:,} evicted)")
+
+    legacy_burst, bucket_burst = boundary_burst()
+    print(f"burst across a window edge ({REQUESTS}/{WINDOW}s): before admits {legacy_burst}, after admits {bucket_burst}")
+
+
+if __name__ == "__main__":
+    main()
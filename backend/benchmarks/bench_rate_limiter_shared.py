@@ -0,0 +1,96 @@
+"""
+Benchmark — per-call overhead of the rate limiter backends, and what N worker
+processes actually admit.
+
+Part one times BucketStore.hit (memory) against SQLiteBucketStore.hit
+(sqlite) in one process over `--keys` keys. Part two starts `--workers`
+processes that all hammer the same `--limit`-per-hour keys, the way uvicorn
+workers behind one port would, and counts how many checks each backend
+admitted in total: the memory backend admits `workers` times the limit, the
+shared one admits the limit.
+
+Usage:
+    python benchmarks/bench_rate_limiter_shared.py --calls 50000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+
+import _setup
+
+from app.utils.rate_limiter import BucketStore, SQLiteBucketStore
+
+DB_PATH = os.path.join(_setup.TMP_DIR, "rate_limits.db")
+
+
+def make_store(backend: str, max_keys: int):
+    if backend == "sqlite":
+        return SQLiteBucketStore(DB_PATH, max_keys)
+    return BucketStore(max_keys, 64)
+
+
+def overhead(backend: str, calls: int, keys: int) -> list[float]:
+    store = make_store(backend, keys)
+    timings = []
+    for i in range(calls):
+        key = f"/api/kyc/scan|10.0.{i % keys >> 8 & 255}.{i % keys & 255}"
+        start = time.perf_counter()
+        store.hit(key, 5, 5 / 60)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def hammer(backend: str, keys: int, limit: int, attempts: int, start_at: float, results):
+    store = make_store(backend, keys * 10)
+    while time.time() < start_at:
+        time.sleep(0.001)
+    admitted = 0
+    for i in range(attempts):
+        admitted += store.hit(f"shared-{backend}|{i % keys}", limit, limit / 3600) == 0.0
+    results.put(admitted)
+
+
+def admitted_by_workers(backend: str, workers: int, keys: int, limit: int) -> int:
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0
+    procs = [
+        multiprocessing.Process(target=hammer, args=(backend, keys, limit, keys * limit * 2, start_at, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    total = sum(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--shared-keys", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"per-call overhead, {args.calls:,} checks over {args.keys:,} keys")
+    print(f"{'backend':>8} {'mean µs':>9} {'p50 µs':>8} {'p99 µs':>8}")
+    for backend in ("memory", "sqlite"):
+        timings = sorted(overhead(backend, args.calls, args.keys))
+        print(f"{backend:>8} {statistics.mean(timings) * 1e6:>9.1f} "
+              f"{timings[len(timings) // 2] * 1e6:>8.1f} {timings[int(len(timings) * 0.99)] * 1e6:>8.1f}")
+
+    expected = args.shared_keys * args.limit
+    print(f"\n{args.workers} workers, {args.shared_keys} keys at {args.limit}/hour (limit allows {expected:,} in total)")
+    for backend in ("memory", "sqlite"):
+        start = time.perf_counter()
+        admitted = admitted_by_workers(backend, args.workers, args.shared_keys, args.limit)
+        elapsed = time.perf_counter() - start - 1.0
+        print(f"{backend:>8}: admitted {admitted:,} ({admitted / expected:.1f}x the limit) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark — write throughput and lock errors under high write concurrency.
+
+Runs the same workload against a fresh database under three profiles:
+
+    defaults  driver defaults (rollback journal), no writer queue
+    wal       SQLite profile PRAGMAs only
+    profile   PRAGMAs + single-writer queue (the shipped configuration)
+
+Each of --processes worker processes runs --concurrency async tasks that
+mimic a request handler: load a session, update it, append an audit entry
+and commit both in one transaction. "database is locked" failures are
+counted separately from other errors.
+
+Usage:
+    python benchmarks/bench_sqlite_writes.py --processes 4 --concurrency 100 --transactions 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+PROFILES = {
+    "defaults": {"SQLITE_TUNING": "false", "DB_SERIALIZE_WRITES": "false", "DB_POOL_SIZE": "5", "DB_MAX_OVERFLOW": "10"},
+    "wal": {"SQLITE_TUNING": "true", "DB_SERIALIZE_WRITES": "false"},
+    "profile": {"SQLITE_TUNING": "true", "DB_SERIALIZE_WRITES": "true"},
+}
+
+
+# ─── Worker process ─────────────────────────────────────────────────
+
+async def worker_main(concurrency: int, transactions: int, sessions: int, seed: int) -> dict:
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import AsyncSessionLocal, async_engine
+    from app.models.session import UserSession
+    from app.services.audit_service import AuditService
+
+    result = {"ok": 0, "lock_errors": 0, "other_errors": 0}
+
+    async def task(n: int):
+        rng = random.Random(seed * 100000 + n)
+        for i in range(transactions):
+            session_id = f"bench-{rng.randrange(sessions)}"
+            try:
+                async with AsyncSessionLocal() as db:
+                    session = await db.get(UserSession, session_id)
+                    session.contribution_amount = (session.contribution_amount or 0) + 1
+                    session.status = "payment_done"
+                    await AuditService.log(db, session_id, "BENCH_WRITE", payload={"n": n, "i": i})
+                    await db.commit()
+                result["ok"] += 1
+            except OperationalError as e:
+                key = "lock_errors" if "locked" in str(e) else "other_errors"
+                result[key] += 1
+            except Exception:
+                result["other_errors"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(task(n) for n in range(concurrency)))
+    result["elapsed"] = time.perf_counter() - start
+    await async_engine.dispose()
+    return result
+
+
+def child(args):
+    import _setup  # noqa: F401
+    from app.database import SessionLocal, init_db
+    from app.models.session import UserSession
+
+    if args.init:
+        init_db()
+        db = SessionLocal()
+        db.add_all([
+            UserSession(id=f"bench-{i}", resume_token=uuid.uuid4().hex, account_type="citizen")
+            for i in range(args.sessions)
+        ])
+        db.commit()
+        db.close()
+        return
+
+    result = asyncio.run(worker_main(args.concurrency, args.transactions, args.sessions, args.seed))
+    print(json.dumps(result))
+
+
+# ─── Driver ─────────────────────────────────────────────────────────
+
+def run_profile(name: str, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix=f"nps-bench-{name}-")
+    env = {
+        **os.environ,
+        **PROFILES[name],
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "LOG_DIR": os.path.join(tmp, "logs"),
+        "DATA_DIR": tmp,
+    }
+    common = [sys.executable, __file__, "--child", "--sessions", str(args.sessions)]
+    subprocess.run(common + ["--init"], env=env, check=True)
+
+    start = time.perf_counter()
+    procs = [
+        subprocess.Popen(
+            common + ["--concurrency", str(args.concurrency), "--transactions", str(args.transactions), "--seed", str(p)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        for p in range(args.processes)
+    ]
+    results = [json.loads(proc.communicate()[0].strip().splitlines()[-1]) for proc in procs]
+    elapsed = time.perf_counter() - start
+
+    total = {k: sum(r[k] for r in results) for k in ("ok", "lock_errors", "other_errors")}
+    attempted = args.processes * args.concurrency * args.transactions
+    print(
+        f"  {name:<9} {total['ok']:>6}/{attempted} ok in {elapsed:6.2f}s  ->  {total['ok'] / elapsed:7.0f} txn/s"
+        f"   lock errors {total['lock_errors']:>5}   other errors {total['other_errors']}"
+    )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite write concurrency benchmark")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=100, help="Async tasks per process")
+    parser.add_argument("--transactions", type=int, default=5, help="Write transactions per task")
+    parser.add_argument("--sessions", type=int, default=200, help="Distinct rows being updated")
+    parser.add_argument("--profiles", default="defaults,wal,profile")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--init", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args)
+
+    print(
+        f"SQLite write benchmark ({args.processes} processes x {args.concurrency} tasks x "
+        f"{args.transactions} transactions, {args.sessions} hot rows)"
+    )
+    for name in args.profiles.split(","):
+        run_profile(name, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+NPS Backend — Maintenance Commands
+Operational jobs that run outside the API server.
+
+Usage:
+    python manage.py verify-audit [--workers N] [--chunk-size N] [--resume]
+    python manage.py checkpoint-audit [--size N] [--include-partial]
+    python manage.py archive-audit [--older-than-days N] [--vacuum]
+    python manage.py import-pop-agents FILE [--batch-size N] [--workers N]
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def cmd_verify_audit(args) -> int:
+    """Verify every session's audit hash chain."""
+    from app.database import init_db
+    from app.services.audit_verifier import run_bulk_verification, CHECKPOINT_FILE
+
+    init_db()
+    summary = run_bulk_verification(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        resume=args.resume,
+    )
+    print(json.dumps(summary, indent=2))
+    print(f"\nCheckpoint: {CHECKPOINT_FILE}")
+    return 0 if summary["valid"] else 1
+
+
+def cmd_checkpoint_audit(args) -> int:
+    """Seal Merkle checkpoints over audit entries not yet covered."""
+    from app.database import init_db, SessionLocal
+    from app.services.audit_checkpoint_service import AuditCheckpointService
+
+    init_db()
+    db = SessionLocal()
+    try:
+        created = AuditCheckpointService.seal_pending(db, size=args.size, include_partial=args.include_partial)
+        for checkpoint in created:
+            print(f"  #{checkpoint.id}: entries {checkpoint.start_id}-{checkpoint.end_id} "
+                  f"({checkpoint.leaf_count}) root={checkpoint.merkle_root}")
+        print(f"Sealed {len(created)} checkpoint(s)")
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_archive_audit(args) -> int:
+    """Move audit trails of old completed sessions into compressed segments."""
+    from sqlalchemy import text
+    from app.database import init_db, SessionLocal, engine
+    from app.services.audit_archive import AuditArchiveService, ARCHIVE_DIR
+
+    init_db()
+    db = SessionLocal()
+    try:
+        summary = AuditArchiveService.archive_completed(db, older_than_days=args.older_than_days)
+    finally:
+        db.close()
+    print(json.dumps(summary, indent=2))
+    print(f"\nArchive directory: {ARCHIVE_DIR}")
+
+    if args.vacuum and summary["entries"]:
+        # Deleted rows only free pages for reuse; VACUUM shrinks the file itself
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print("Database vacuumed")
+    return 0
+
+
+def cmd_import_pop_agents(args) -> int:
+    """Load a PFRDA PoP registry file (CSV, JSON or JSON lines) into pop_agents."""
+    from app.database import init_db, SessionLocal
+    from app.services.pop_agent_service import import_registry
+
+    init_db()
+    db = SessionLocal()
+    try:
+        summary = import_registry(db, args.file, batch_size=args.batch_size, workers=args.workers)
+    except (KeyError, ValueError) as e:
+        print(f"Import failed: {e}")
+        return 1
+    finally:
+        db.close()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NPS Digital Onboarding maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    verify = sub.add_parser("verify-audit", help="Verify all audit chains (exit code 1 if any are broken)")
+    verify.add_argument("--workers", type=int, default=None, help="Worker processes (default: AUDIT_VERIFY_WORKERS or CPU count)")
+    verify.add_argument("--chunk-size", type=int, default=None, help="Rows fetched per query")
+    verify.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    verify.set_defaults(func=cmd_verify_audit)
+
+    checkpoint = sub.add_parser("checkpoint-audit", help="Seal Merkle checkpoints over the audit log")
+    checkpoint.add_argument("--size", type=int, default=None, help="Entries per checkpoint (default: AUDIT_CHECKPOINT_SIZE)")
+    checkpoint.add_argument("--include-partial", action="store_true", help="Also seal a trailing range smaller than --size")
+    checkpoint.set_defaults(func=cmd_checkpoint_audit)
+
+    archive = sub.add_parser("archive-audit", help="Archive audit trails of old completed sessions")
+    archive.add_argument("--older-than-days", type=int, default=None, help="Age cutoff (default: AUDIT_ARCHIVE_AFTER_DAYS)")
+    archive.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards to reclaim disk space")
+    archive.set_defaults(func=cmd_archive_audit)
+
+    pop = sub.add_parser("import-pop-agents", help="Bulk import PoP agents from a registry file")
+    pop.add_argument("file", help="Registry file: .csv (header row), .json (array) or .jsonl")
+    pop.add_argument("--batch-size", type=int, default=1000, help="Agents upserted per statement")
+    pop.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes hashing PINs (default: CPU count)")
+    pop.set_defaults(func=cmd_import_pop_agents)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Usage:
     python run.py --reload
 """
 import argparse
+import os
 import uvicorn
 
 
@@ -20,6 +21,12 @@ def main():
 
     args = parser.parse_args()
 
+    # Workers are separate processes: share rate limit buckets between them,
+    # and read audit chain heads from the database (no per-process cache)
+    if args.workers > 1:
+        os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+        os.environ.setdefault("AUDIT_CHAIN_CACHE", "false")
+
     print(f"""
     ========================================================
       NPS Digital Onboarding -- Backend Server
@@ -0,0 +1,69 @@
+"""
+Shared test setup: the whole run uses a throwaway database and data directory.
+
+Settings are read once at import time, so the environment is pointed at a
+temporary directory before any `app` module is imported.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+
+_TMP_DIR = tempfile.mkdtemp(prefix="nps-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/nps.db"
+os.environ["DATA_DIR"] = _TMP_DIR
+os.environ["LOG_DIR"] = os.path.join(_TMP_DIR, "logs")
+os.environ["RATE_LIMIT_BACKEND"] = "memory"
+os.environ["AUDIT_WRITE_BEHIND"] = "false"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.database import SessionLocal, async_engine, init_db
+from app.models.session import UserSession
+
+init_db()
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    return _TMP_DIR
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_session(db):
+    """Create and commit an onboarding session, returning its id."""
+
+    def make(**fields) -> str:
+        session_id = str(uuid.uuid4())
+        db.add(UserSession(id=session_id, account_type="citizen", status="started",
+                           created_at=datetime.utcnow(), **fields))
+        db.commit()
+        return session_id
+
+    return make
+
+
+def run_async(coro):
+    """Run a coroutine on a fresh loop and release the async engine's
+    connections before that loop closes."""
+
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(wrapper())
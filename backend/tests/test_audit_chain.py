@@ -0,0 +1,99 @@
+"""Hash-chain integrity under concurrent appends and across archival."""
+import asyncio
+import random
+from datetime import datetime
+
+from app.database import AsyncSessionLocal
+from app.models.session import UserSession
+from app.services.audit_archive import AuditArchiveService
+from app.services.audit_checkpoint_service import AuditCheckpointService
+from app.services.audit_service import AuditService
+from app.utils.merkle import verify_inclusion
+
+from conftest import run_async
+
+
+async def _log(session_id: str, action: str):
+    async with AsyncSessionLocal() as db:
+        await AuditService.log(db, session_id, action, {"at": action})
+        await db.commit()
+
+
+async def _log_batch(session_ids: list, action: str):
+    async with AsyncSessionLocal() as db:
+        await AuditService.log_batch(db, session_ids, action, {sid: {"batch": action} for sid in session_ids})
+        await db.commit()
+
+
+def test_verify_chain_after_concurrent_log_batch(db, make_session):
+    session_ids = [make_session() for _ in range(6)]
+    rng = random.Random(7)
+    batches = [rng.sample(session_ids, rng.randint(2, len(session_ids))) for _ in range(40)]
+    expected = {sid: sum(sid in batch for batch in batches) for sid in session_ids}
+
+    async def run():
+        # Interleave batches with single appends to the same chains
+        await asyncio.gather(
+            *(_log_batch(batch, f"BATCH_{i}") for i, batch in enumerate(batches)),
+            *(_log(sid, "SINGLE") for sid in session_ids),
+        )
+
+    run_async(run())
+
+    for sid in session_ids:
+        result = AuditService.verify_chain(db, sid)
+        assert result["valid"], result
+        assert result["total_entries"] == expected[sid] + 1
+
+
+def test_verify_chain_detects_tampering(db, make_session):
+    sid = make_session()
+    run_async(_log_batch([sid], "FIRST"))
+    run_async(_log(sid, "SECOND"))
+
+    entry = AuditService.get_trail(db, sid)[0]
+    entry.payload_hash = "0" * 64
+    db.commit()
+
+    result = AuditService.verify_chain(db, sid)
+    assert not result["valid"]
+    assert result["broken_at"] is not None
+
+
+def test_get_trail_across_archived_segment(db, make_session):
+    sid = make_session()
+    for action in ("SESSION_START", "KYC_SCAN", "ESIGN_COMPLETED"):
+        run_async(_log(sid, action))
+
+    session = db.get(UserSession, sid)
+    session.status, session.completed_at = "completed", datetime(2020, 1, 1)
+    db.commit()
+    summary = AuditArchiveService.archive_completed(db, older_than_days=0)
+    assert summary["entries"] >= 3
+    assert AuditArchiveService.archived_entries(db, sid)
+
+    # New entries chain onto the archived head and get fresh ids
+    run_async(_log(sid, "PRAN_ISSUED"))
+
+    trail = AuditService.get_trail(db, sid)
+    assert [e.action for e in trail] == ["SESSION_START", "KYC_SCAN", "ESIGN_COMPLETED", "PRAN_ISSUED"]
+    assert len({e.id for e in trail}) == 4
+    assert trail[-1].previous_hash == trail[-2].payload_hash
+    assert AuditService.verify_chain(db, sid) == {"valid": True, "total_entries": 4, "broken_at": None}
+
+
+def test_merkle_proof_for_archived_entry(db, make_session):
+    sid = make_session()
+    run_async(_log(sid, "SESSION_START"))
+    AuditCheckpointService.seal_pending(db, include_partial=True)
+    entry_id = AuditService.get_trail(db, sid)[0].id
+
+    session = db.get(UserSession, sid)
+    session.status, session.completed_at = "completed", datetime(2020, 1, 1)
+    db.commit()
+    AuditArchiveService.archive_completed(db, older_than_days=0)
+
+    proof = AuditCheckpointService.proof_for(db, entry_id)
+    assert proof is not None
+    assert proof["verified"]
+    assert verify_inclusion(proof["leaf"], proof["proof"], proof["checkpoint"]["merkle_root"])
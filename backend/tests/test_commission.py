@@ -0,0 +1,73 @@
+"""Commission payouts settle each ledger entry exactly once."""
+import threading
+from datetime import datetime
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.commission import CommissionBalance, CommissionPayout
+from app.models.session import UserSession
+from app.services.commission_service import CommissionService
+
+from conftest import run_async
+
+AGENT = "TEST-2024-001"
+
+
+def _earn(make_session, count: int) -> int:
+    async def record(session_id: str):
+        async with AsyncSessionLocal() as db:
+            session = await db.get(UserSession, session_id)
+            await CommissionService.record(db, session, pran=f"PRAN-{session_id[:8]}")
+            await db.commit()
+
+    for _ in range(count):
+        run_async(record(make_session(pop_agent_id=AGENT)))
+    return count
+
+
+def _balance(db) -> CommissionBalance:
+    db.expire_all()
+    return db.get(CommissionBalance, AGENT)
+
+
+def test_payout_never_pays_an_entry_twice(db, make_session):
+    _earn(make_session, 3)
+    earned = _balance(db).earned
+    assert earned > 0
+
+    payout = CommissionService.create_payout(db, agent_id=AGENT, reference="NEFT-1")
+    assert payout.entry_count == 3 and payout.total_amount == earned
+
+    # Nothing left to settle: a second payout is refused instead of overdrawing
+    assert CommissionService.create_payout(db, agent_id=AGENT, reference="NEFT-2") is None
+    balance = _balance(db)
+    assert balance.paid == balance.earned == earned
+
+
+def test_concurrent_payouts_do_not_overdraw(db, make_session):
+    _earn(make_session, 5)
+    before = _balance(db)
+    due = before.earned - before.paid
+    barrier = threading.Barrier(4)
+    results = []
+
+    def pay(i: int):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            results.append(CommissionService.create_payout(session, agent_id=AGENT, cutoff=datetime.utcnow(),
+                                                           reference=f"NEFT-C{i}"))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=pay, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    settled = sum(payout.total_amount for payout in results if payout is not None)
+    assert settled == due
+    balance = _balance(db)
+    assert balance.paid == balance.earned
+    assert db.query(CommissionPayout).filter(CommissionPayout.agent_id == AGENT).count() == \
+        1 + sum(payout is not None for payout in results)
@@ -0,0 +1,39 @@
+"""PoP bearer tokens: issue, verify, expiry and tampering."""
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.utils.pop_auth import ALGORITHM, TOKEN_TYPE, issue_token, verify_token
+
+settings = get_settings()
+
+AGENT = {"agent_id": "TEST-2024-002", "name": "Test Agent"}
+
+
+def test_issued_token_verifies():
+    token, expires = issue_token(AGENT)
+    assert expires > time.time()
+    assert verify_token(token)["agent_id"] == AGENT["agent_id"]
+
+
+def test_expired_token_is_rejected():
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": AGENT["agent_id"], "typ": TOKEN_TYPE, "agent": AGENT, "iat": now - 120, "exp": now - 60},
+        settings.SECRET_KEY, algorithm=ALGORITHM,
+    )
+    with pytest.raises(HTTPException) as exc:
+        verify_token(token)
+    assert exc.value.status_code == 401
+    assert "expired" in exc.value.detail
+
+
+def test_forged_token_is_rejected():
+    token, _ = issue_token(AGENT)
+    header, payload, signature = token.split(".")
+    with pytest.raises(HTTPException) as exc:
+        verify_token(f"{header}.{payload}.{signature[::-1]}")
+    assert exc.value.status_code == 401
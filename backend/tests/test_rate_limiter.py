@@ -0,0 +1,49 @@
+"""Token-bucket limiter: in-memory buckets, the shared SQLite store and the
+FastAPI dependency."""
+import os
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.rate_limiter import BucketStore, SQLiteBucketStore, rate_limit
+
+
+def test_bucket_allows_capacity_then_limits():
+    store = BucketStore(max_keys=100, shards=4)
+    assert [store.hit("k", 3, 3 / 60) for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = store.hit("k", 3, 3 / 60)
+    assert 0 < retry_after <= 20
+    assert store.hit("other", 3, 3 / 60) == 0.0
+
+
+def test_bucket_table_stays_bounded():
+    store = BucketStore(max_keys=8, shards=2)
+    for i in range(100):
+        store.hit(f"k{i}", 5, 5 / 3600)
+    stats = store.stats()
+    assert stats["keys"] <= 8
+    assert stats["evicted"] == 100 - stats["keys"]
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_dir):
+    path = os.path.join(tmp_dir, "rate_limits_shared.db")
+    first, second = SQLiteBucketStore(path, max_keys=100), SQLiteBucketStore(path, max_keys=100)
+    # Two workers spending from the same bucket admit the limit once in total
+    admitted = sum(store.hit("shared", 4, 4 / 3600) == 0.0 for store in (first, second) * 4)
+    assert admitted == 4
+    assert second.hit("shared", 4, 4 / 3600) > 0
+
+
+def test_dependency_returns_429_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(rate_limit(requests=2, window=60, key="ip"))])
+    def limited():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/limited").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/limited")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 31
+    assert "Rate limit exceeded" in response.json()["detail"]
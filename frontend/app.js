@@ -3017,8 +3017,9 @@ window.handleAltChannel = async function (type) {
   async function tagCurrentSession() {
     if (!popAgent || !state.sessionId) return;
     try {
-      await fetch(`${api.baseUrl}/api/pop/tag-session?session_id=${state.sessionId}&agent_id=${popAgent.agent_id}`, {
-        method: 'POST'
+      await fetch(`${api.baseUrl}/api/pop/tag-session?session_id=${state.sessionId}`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${popToken}` }
       });
     } catch (e) {
       console.warn('Session tagging (non-blocking):', e);
@@ -3045,7 +3046,14 @@ window.handleAltChannel = async function (type) {
 
   async function fetchDashboardData() {
     try {
-      const res = await fetch(`${api.baseUrl}/api/pop/dashboard/${popAgent.agent_id}`);
+      const res = await fetch(`${api.baseUrl}/api/pop/dashboard/${popAgent.agent_id}`, {
+        headers: { 'Authorization': `Bearer ${popToken}` }
+      });
+      if (res.status === 401) {
+        // Token expired: back to the login screen
+        btnPopLogout.click();
+        return;
+      }
       if (!res.ok) throw new Error('Dashboard fetch failed');
       const data = await res.json();
 